@@ -1,7 +1,7 @@
 from django.contrib import admin
 from mptt.admin import MPTTModelAdmin
 
-from .models import Tag, Post, PostReaction, Comment
+from .models import Tag, Post, PostReaction, Comment, Job
 
 
 @admin.register(Tag)
@@ -17,7 +17,7 @@ class PostAdmin(admin.ModelAdmin):
     """Настройка отображения модели Post в админке"""
     list_display = ('id', 'title', 'author', 'publication_date', 'changed')
     list_display_links = ('id', 'title')
-    readonly_fields = ('views', )
+    readonly_fields = ('views', 'likes_count', 'dislikes_count')
 
 
 @admin.register(PostReaction)
@@ -33,3 +33,12 @@ class CommentAdmin(MPTTModelAdmin, admin.ModelAdmin):
     list_display = ('profile', 'post', 'publication_date', 'id')
     list_display_links = ('profile', 'post')
     mptt_level_indent = 20
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Настройка отображения модели Job в админке"""
+    list_display = ('id', 'task', 'status', 'attempts', 'run_at', 'finished')
+    list_display_links = ('id', 'task')
+    list_filter = ('status', 'task')
+    readonly_fields = ('locked_at', 'locked_by', 'last_error', 'created', 'finished')
@@ -5,3 +5,7 @@ class ContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'content'
     verbose_name = 'Содержимое'
+
+    def ready(self):
+        import content.checks
+        import content.signals
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Кеши, которые не видны другим процессам: версии индексов в памяти в них не доходят до остальных процессов
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def process_local_cache_warnings(index_name, check_id) -> list:
+    """Предупреждение, если индекс index_name сверяет версию в кеше, не общем для процессов"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+
+    return [Warning(
+        f'Кеш default ({backend}) виден только своему процессу, '
+        f'поэтому {index_name} в других процессах не узнает об изменениях',
+        hint='Для запуска в несколько процессов укажите общий кеш, например Redis или Memcached.',
+        id=check_id,
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_tag_index_cache(app_configs, **kwargs):
+    return process_local_cache_warnings('индекс тегов', 'content.W001')
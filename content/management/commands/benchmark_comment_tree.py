@@ -0,0 +1,92 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from content.models import Comment, Post
+from content.services.comment_services import get_comment_threads, get_comment_replies
+from content.services.comment_storage import COMMENT_STORAGES, tree_fields
+
+# Количество комментариев в одной ветке: большие посты состоят из немногих, но очень длинных веток
+THREAD_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Сравнение стоимости добавления и чтения комментариев в хранилищах веток, изменения откатываются'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000],
+                            help='Количество комментариев поста')
+        parser.add_argument('--inserts', type=int, default=100, help='Количество добавляемых ответов')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"хранилище":<10}{"комментариев":>14}{"добавление, мс":>16}{"запросов":>10}'
+            f'{"страница, мс":>14}{"ответы, мс":>12}'
+        )
+        for size in options['sizes']:
+            for storage in COMMENT_STORAGES:
+                result = self._run(storage, size, options['inserts'], random.Random(options['seed']))
+                self.stdout.write(
+                    f'{storage:<10}{size:>14}{result["insert_ms"]:>16.3f}{result["insert_queries"]:>10.1f}'
+                    f'{result["threads_ms"]:>14.3f}{result["replies_ms"]:>12.3f}'
+                )
+
+    def _run(self, storage, size, inserts, rng) -> dict:
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'benchmark-{time.time_ns()}')
+            profile = user.profiles.get()
+            post = Post.objects.create(title='benchmark', caption='benchmark', author=profile)
+            comment_ids = self._load_comments(post, profile, size, rng)
+
+            with override_settings(COMMENT_TREE_STORAGE=storage):
+                # Ответы добавляются в первую, самую нагруженную ветку
+                parent_ids = [rng.choice(comment_ids[:THREAD_SIZE]) for _ in range(inserts)]
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for parent_id in parent_ids:
+                        Comment(post=post, profile=profile, text='reply', parent_id=parent_id).save()
+                    insert_seconds = time.perf_counter() - started
+
+                started = time.perf_counter()
+                get_comment_threads(post.pk)
+                threads_seconds = time.perf_counter() - started
+
+                started = time.perf_counter()
+                get_comment_replies(Comment.objects.get(pk=comment_ids[0]))
+                replies_seconds = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        return {
+            'insert_ms': insert_seconds * 1000 / max(inserts, 1),
+            'insert_queries': len(queries) / max(inserts, 1),
+            'threads_ms': threads_seconds * 1000,
+            'replies_ms': replies_seconds * 1000,
+        }
+
+    def _load_comments(self, post, profile, size, rng) -> list:
+        """Пакетная вставка случайного дерева комментариев с заполненными полями обоих хранилищ"""
+        first_id = (Comment.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        first_tree_id = (Comment.objects.aggregate(Max('tree_id'))['tree_id__max'] or 0) + 1
+
+        ids = list(range(first_id, first_id + size))
+        parents = {}
+        for position, comment_id in enumerate(ids):
+            thread_start = position - position % THREAD_SIZE
+            parents[comment_id] = ids[rng.randrange(thread_start, position)] if position > thread_start else None
+
+        fields = tree_fields(ids, parents, first_tree_id)
+        Comment.objects.bulk_create([
+            Comment(
+                id=comment_id, post=post, profile=profile, text='comment', parent_id=parents[comment_id],
+                **fields[comment_id]
+            )
+            for comment_id in ids
+        ], batch_size=1000)
+        return ids
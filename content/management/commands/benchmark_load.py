@@ -0,0 +1,288 @@
+import json
+import math
+import multiprocessing
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from content.models import Post, PostReaction, Tag
+from profiles.models import Profile
+
+DEFAULT_MIX = 'home=35,post_detail=25,tag=10,profile=10,reaction=8,comment=7,follow=5'
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+# Количество постов, тегов и профилей, среди которых выбираются адреса запросов
+TARGETS_LIMIT = 10000
+
+
+def _home(worker):
+    return worker.client.get(reverse('content:home'))
+
+
+def _post_detail(worker):
+    return worker.client.get(reverse('content:post_detail', args=[worker.rng.choice(worker.targets['posts'])]))
+
+
+def _tag(worker):
+    return worker.client.get(reverse('content:posts_by_tag', args=[worker.rng.choice(worker.targets['tags'])]))
+
+
+def _profile(worker):
+    slug = worker.rng.choice(worker.targets['profiles'])
+    return worker.client.get(reverse('content:profile_posts_list', args=[slug]))
+
+
+def _reaction(worker):
+    # Повторная реакция снимает предыдущую, поэтому запросы переключают лайк
+    post_id = worker.rng.choice(worker.targets['posts'])
+    return worker.client.get(reverse('content:post_reaction', args=[post_id, PostReaction.LIKE]), HTTP_REFERER='/')
+
+
+def _comment(worker):
+    post_id = worker.rng.choice(worker.targets['posts'])
+    return worker.client.post(
+        reverse('content:add_comment', args=[post_id]), {'text': 'benchmark comment'}, HTTP_REFERER='/')
+
+
+def _follow(worker):
+    # Отписка только от профилей, на которые подписался этот же поток, иначе она может ответить 404
+    slug = worker.rng.choice(worker.targets['profiles'])
+    option = int(slug not in worker.followed)
+    worker.followed.symmetric_difference_update({slug})
+    return worker.client.get(reverse('followers:follow', args=[slug, option]), HTTP_REFERER='/')
+
+
+ENDPOINTS = {
+    'home': _home,
+    'post_detail': _post_detail,
+    'tag': _tag,
+    'profile': _profile,
+    'reaction': _reaction,
+    'comment': _comment,
+    'follow': _follow,
+}
+
+
+def parse_mix(value) -> dict:
+    """Доли запросов из строки вида home=40,post_detail=60"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise CommandError(f'Неизвестная страница {name}, доступны: {", ".join(ENDPOINTS)}')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f'Неверная доля для {name}: {weight!r}')
+
+    if not any(mix.values()):
+        raise CommandError('Нужна хотя бы одна страница с ненулевой долей')
+    return mix
+
+
+def percentile(values, percent):
+    """Перцентиль отсортированного списка по ближайшему рангу"""
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def summarize(samples, elapsed) -> dict:
+    """Сводка по страницам: количество, ошибки, запросов в секунду и задержки в мс"""
+    by_endpoint = defaultdict(list)
+    errors = defaultdict(int)
+    for endpoint, seconds, ok in samples:
+        by_endpoint[endpoint].append(seconds * 1000)
+        errors[endpoint] += not ok
+
+    summary = {}
+    for endpoint, latencies in sorted(by_endpoint.items()):
+        latencies.sort()
+        summary[endpoint] = {
+            'requests': len(latencies),
+            'errors': errors[endpoint],
+            'throughput': round(len(latencies) / elapsed, 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(latencies[-1], 3),
+        }
+    return summary
+
+
+def compare(endpoints, baseline, tolerance) -> list:
+    """Изменения относительно прошлого замера: (страница, метрика, было, стало, изменение, ухудшение)
+
+    Ухудшение - рост задержки или падение пропускной способности больше чем на долю tolerance.
+    """
+    rows = []
+    for endpoint, current in endpoints.items():
+        previous = baseline.get(endpoint)
+        if previous is None:
+            continue
+        for metric in ('throughput', *LATENCY_METRICS):
+            before, after = previous[metric], current[metric]
+            change = (after - before) / before if before else 0.0
+            regressed = change < -tolerance if metric == 'throughput' else change > tolerance
+            rows.append((endpoint, metric, before, after, change, regressed))
+    return rows
+
+
+class Worker:
+    """Поток нагрузки: свой клиент с сессией пользователя и свой генератор случайных чисел"""
+
+    def __init__(self, user, targets, mix, seed):
+        self.client = Client(raise_request_exception=False)
+        self.client.force_login(user)
+        self.targets = targets
+        self.rng = random.Random(seed)
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.followed = set()
+
+    def request(self) -> tuple:
+        endpoint = self.rng.choices(self.names, self.weights)[0]
+        started = time.perf_counter()
+        try:
+            ok = ENDPOINTS[endpoint](self).status_code < 400
+        except Exception:
+            ok = False
+        return endpoint, time.perf_counter() - started, ok
+
+    def run(self, deadline, warmup) -> list:
+        try:
+            for _ in range(warmup):
+                self.request()
+            samples = []
+            while time.monotonic() < deadline:
+                samples.append(self.request())
+            return samples
+        finally:
+            # У каждого потока свое соединение с бд
+            connections.close_all()
+
+
+def load_targets() -> dict:
+    targets = {
+        'posts': list(Post.objects.filter(archived=False).order_by('-pk').values_list('pk', flat=True)[
+                      :TARGETS_LIMIT]),
+        'tags': list(Tag.objects.filter(tags__archived=False).order_by('pk').values_list(
+            'slug', flat=True).distinct()[:TARGETS_LIMIT]),
+        'profiles': list(Profile.objects.order_by('pk').values_list('slug', flat=True)[:TARGETS_LIMIT]),
+    }
+    empty = [name for name, values in targets.items() if not values]
+    if empty:
+        raise CommandError(f'В бд нет данных для запросов ({", ".join(empty)}), заполните ее командой seed')
+    return targets
+
+
+def run_process(options) -> list:
+    """Нагрузка из одного процесса: options['threads'] потоков до общего срока, возвращает замеры"""
+    first = options['process'] * options['threads']
+    workers = [
+        Worker(options['users'][(first + index) % len(options['users'])], options['targets'], options['mix'],
+               options['seed'] + first + index)
+        for index in range(options['threads'])
+    ]
+    with ThreadPoolExecutor(max_workers=len(workers), thread_name_prefix='load') as pool:
+        futures = [pool.submit(worker.run, options['deadline'], options['warmup']) for worker in workers]
+        return [sample for future in futures for sample in future.result()]
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер страниц из нескольких потоков и процессов на заполненной бд: '
+            'запросов в секунду и перцентили задержки по страницам, сравнение с прошлым замером. '
+            'Страницы-действия меняют данные в бд')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=20, help='Длительность замера, секунды')
+        parser.add_argument('--threads', type=int, default=8, help='Потоков в каждом процессе')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Процессов нагрузки, у каждого свой локальный кеш, как у процессов сервера')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='Доли страниц в нагрузке: страница=доля,...')
+        parser.add_argument('--warmup', type=int, default=5, help='Запросов каждого потока до начала замера')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+        parser.add_argument('--output', default='benchmark_load.json', help='Файл для результатов в JSON')
+        parser.add_argument('--baseline', help='Результаты прошлого замера в JSON для сравнения')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Допустимое ухудшение относительно прошлого замера, доля')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Завершиться с ошибкой, если есть ухудшения')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        workers_count = options['threads'] * options['processes']
+        users = list(User.objects.filter(profiles__used=True).order_by('pk')[:workers_count])
+        if not users:
+            raise CommandError('В бд нет пользователей, заполните ее командой seed')
+        targets = load_targets()
+
+        # Замер без панели отладки и записи запросов, как на рабочем сервере
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+            started = time.monotonic()
+            deadline = started + options['duration']
+            process_options = [
+                {'process': process, 'threads': options['threads'], 'users': users, 'targets': targets, 'mix': mix,
+                 'seed': options['seed'], 'deadline': deadline, 'warmup': options['warmup']}
+                for process in range(options['processes'])
+            ]
+            if options['processes'] == 1:
+                samples = run_process(process_options[0])
+            else:
+                # Соединения не должны переходить в дочерние процессы
+                connections.close_all()
+                with multiprocessing.get_context('fork').Pool(options['processes']) as pool:
+                    samples = [sample for result in pool.map(run_process, process_options) for sample in result]
+            elapsed = max(time.monotonic() - started, options['duration'])
+
+        endpoints = summarize(samples, elapsed)
+        results = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'settings': {name: options[name] for name in ('duration', 'threads', 'processes', 'mix', 'seed')},
+            'total': {
+                'requests': len(samples),
+                'errors': sum(not ok for _, _, ok in samples),
+                'throughput': round(len(samples) / elapsed, 2),
+            },
+            'endpoints': endpoints,
+        }
+
+        self.write_summary(results)
+        with open(options['output'], 'w') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+        self.stdout.write(f'Результаты сохранены в {options["output"]}')
+
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+            rows = compare(endpoints, baseline['endpoints'], options['tolerance'])
+            self.write_comparison(rows)
+            if options['fail_on_regression'] and any(row[-1] for row in rows):
+                raise CommandError('Есть ухудшения относительно прошлого замера')
+
+    def write_summary(self, results):
+        self.stdout.write(
+            f'{"страница":<14}{"запросов":>10}{"ошибок":>8}{"в сек":>9}'
+            f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+        )
+        for endpoint, row in results['endpoints'].items():
+            self.stdout.write(
+                f'{endpoint:<14}{row["requests"]:>10}{row["errors"]:>8}{row["throughput"]:>9.1f}'
+                f'{row["p50_ms"]:>10.1f}{row["p95_ms"]:>10.1f}{row["p99_ms"]:>10.1f}'
+            )
+        total = results['total']
+        self.stdout.write(f'{"всего":<14}{total["requests"]:>10}{total["errors"]:>8}{total["throughput"]:>9.1f}')
+
+    def write_comparison(self, rows):
+        self.stdout.write(f'{"страница":<14}{"метрика":<12}{"было":>10}{"стало":>10}{"изменение":>11}')
+        for endpoint, metric, before, after, change, regressed in rows:
+            line = f'{endpoint:<14}{metric:<12}{before:>10.1f}{after:>10.1f}{change:>+11.1%}'
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
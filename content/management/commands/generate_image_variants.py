@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from content.services.image_services import TRACKED_IMAGES, process_image
+
+
+class Command(BaseCommand):
+    help = 'Сохранение размеров и создание уменьшенных вариантов загруженных ранее изображений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересоздать варианты и для изображений, у которых размеры уже сохранены')
+
+    def handle(self, *args, **options):
+        for model, field_name, dependency_kind in TRACKED_IMAGES:
+            objects = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            if not options['all']:
+                objects = objects.filter(**{f'{field_name}_width__isnull': True})
+
+            processed = failed = 0
+            for pk, name in objects.values_list('pk', field_name).iterator():
+                try:
+                    process_image(model._meta.label, pk, field_name, name, dependency_kind)
+                except OSError as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                else:
+                    processed += 1
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: обработано {processed}, с ошибками {failed}'))
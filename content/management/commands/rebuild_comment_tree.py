@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from content.services.comment_storage import BATCH_SIZE, COMMENT_STORAGES, rebuild_comment_mptt, rebuild_comment_paths
+
+
+class Command(BaseCommand):
+    help = 'Пересчет хранилища веток комментариев по ссылкам на родителя'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--storage', choices=list(COMMENT_STORAGES), default=None,
+            help='Хранилище для пересчета, по умолчанию из COMMENT_TREE_STORAGE'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Размер пакета обновления')
+
+    def handle(self, *args, **options):
+        storage = options['storage'] or settings.COMMENT_TREE_STORAGE
+
+        with transaction.atomic():
+            if storage == 'path':
+                count = rebuild_comment_paths(options['batch_size'])
+            else:
+                count = rebuild_comment_mptt()
+
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано комментариев: {count}'))
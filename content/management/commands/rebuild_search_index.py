@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from content.services.search_services import rebuild_search_index, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Перестроение поискового индекса постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Размер пакета вставки')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = rebuild_search_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано постов: {indexed}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from content.services.timeline_services import rebuild_timelines, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Перестроение лент главной страницы всех профилей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Размер пакета вставки')
+
+    def handle(self, *args, **options):
+        created = rebuild_timelines(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Создано записей ленты: {created}'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from content.models import Post, Comment
+from content.services.counter_services import recount_reactions
+
+
+class Command(BaseCommand):
+    help = 'Пересчет счетчиков лайков и дизлайков постов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Количество объектов в пакете')
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            fixed = recount_reactions(model, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{model._meta.verbose_name_plural}: исправлено {fixed}'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from content.services.media_services import rehash_media, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Перенос загруженных ранее медиафайлов в хранилище по хешу содержимого'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Размер пакета чтения объектов')
+        parser.add_argument('--delete-originals', action='store_true',
+                            help='Удалить старые файлы, на которые больше не ссылается ни один объект')
+
+    def handle(self, *args, **options):
+        result = rehash_media(options['delete_originals'], options['batch_size'], log=self.stderr.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {result["moved"]}, не найдено: {result["missing"]}, '
+            f'удалено старых: {result["deleted"]}'
+        ))
@@ -0,0 +1,86 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.utils import timezone
+
+from content.services.job_services import claim_jobs, run_job, delete_finished_jobs
+
+
+def _run_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        # У каждого потока пула свое соединение с бд
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Обработчик фоновых задач: выполняет задачи из таблицы Job в пуле потоков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=settings.JOB_WORKER_THREADS, help='Размер пула потоков')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL,
+                            help='Пауза между проверками пустой очереди, секунды')
+        parser.add_argument('--once', action='store_true', help='Выполнить готовые задачи и завершиться')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        stopped = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+
+        deleted = delete_finished_jobs(timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS))
+        self.stdout.write(f'{worker}: удалено выполненных задач: {deleted}')
+
+        running = set()
+        processed = failed = 0
+        with ThreadPoolExecutor(max_workers=options['threads'], thread_name_prefix='job') as pool:
+            try:
+                while not stopped.is_set():
+                    free = options['threads'] - len(running)
+                    busy = False
+                    try:
+                        jobs = claim_jobs(worker, free) if free else []
+                    except OperationalError as error:
+                        # Бд занята, очередь проверяется снова после паузы
+                        self.stderr.write(f'{worker}: {error}')
+                        jobs, busy = [], True
+                    running.update(pool.submit(_run_in_thread, job) for job in jobs)
+
+                    if not running:
+                        if options['once'] and not busy:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    processed += len(done)
+                    failed += self.count_failed(worker, done)
+            except KeyboardInterrupt:
+                stopped.set()
+
+            # Начатые задачи доделываются, новые не берутся
+            done, _ = wait(running)
+            processed += len(done)
+            failed += self.count_failed(worker, done)
+
+        self.stdout.write(self.style.SUCCESS(f'{worker}: выполнено задач {processed}, с ошибками {failed}'))
+
+    def count_failed(self, worker, done) -> int:
+        """Количество неудачных задач среди завершенных; ошибка вне задачи не останавливает обработчик"""
+        failed = 0
+        for future in done:
+            try:
+                failed += not future.result()
+            except Exception as error:
+                # Например, результат так и не удалось записать: задача будет взята заново по JOB_LOCK_TIMEOUT
+                self.stderr.write(f'{worker}: {error!r}')
+                failed += 1
+        return failed
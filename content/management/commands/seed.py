@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.services.seed_services import BATCH_SIZE, SEED_PASSWORD, SEED_USERNAME, DatasetSeeder
+
+
+class Command(BaseCommand):
+    help = 'Создание синтетических пользователей, профилей, подписок, постов, комментариев и реакций'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Количество пользователей')
+        parser.add_argument('--profiles-per-user', type=int, default=3, help='Наибольшее число профилей пользователя')
+        parser.add_argument('--follows', type=int, default=20, help='Среднее число подписок профиля')
+        parser.add_argument('--posts', type=int, default=5, help='Среднее число постов профиля')
+        parser.add_argument('--comments', type=int, default=5, help='Среднее число комментариев поста')
+        parser.add_argument('--reactions', type=int, default=10, help='Среднее число реакций на пост')
+        parser.add_argument('--comment-reactions', type=int, default=1, help='Среднее число реакций на комментарий')
+        parser.add_argument('--tags', type=int, default=200, help='Количество тегов')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Строк в одной транзакции')
+
+    def handle(self, *args, **options):
+        seeder = DatasetSeeder(
+            options['users'], options['profiles_per_user'], options['follows'], options['posts'],
+            options['comments'], options['reactions'], options['comment_reactions'], options['tags'],
+            options['seed'], options['batch_size'], log=self.stdout.write
+        )
+
+        started = time.monotonic()
+        try:
+            counts = seeder.run()
+        except ValueError as error:
+            raise CommandError(error)
+
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count}')
+        username = SEED_USERNAME.format(seed=options['seed'], number=0)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с, вход: {username} / {SEED_PASSWORD}'))
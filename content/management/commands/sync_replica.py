@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from content.services.db_routing import PRIMARY_ALIAS, REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Обновление реплики для чтения снимком основной бд SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=settings.REPLICA_SYNC_INTERVAL,
+                            help='Пауза между снимками, секунды')
+        parser.add_argument('--once', action='store_true', help='Сделать один снимок и завершиться')
+
+    def handle(self, *args, **options):
+        primary, replica = connections[PRIMARY_ALIAS], connections[REPLICA_ALIAS]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Снимки поддерживаются только для SQLite, для других бд используйте их репликацию')
+
+        source = str(primary.settings_dict['NAME'])
+        target = str(replica.settings_dict['NAME'])
+        while True:
+            started = time.monotonic()
+            # ETag страниц, прочитанных из реплики, меняется вместе с файлом снимка
+            self.snapshot(source, target)
+            self.stdout.write(f'Снимок {target} за {time.monotonic() - started:.3f} с')
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def snapshot(self, source, target):
+        """Согласованная копия через backup API во временный файл и атомарная подмена реплики
+
+        Открытые соединения дочитывают старый файл, новые соединения открывают новый снимок.
+        """
+        temporary = f'{target}.tmp'
+        with sqlite3.connect(source) as source_db, sqlite3.connect(temporary) as target_db:
+            source_db.backup(target_db)
+        source_db.close()
+        target_db.close()
+        os.replace(temporary, target)
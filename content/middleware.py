@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+
+from .services import db_routing, invalidation
+
+
+class InvalidationBatchMiddleware:
+    """Смена версий закешированных данных один раз за запрос для всех изменений, закоммиченных в нем"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with invalidation.batch():
+            return self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """Чтения страниц с read_from_replica = True из реплики, кроме окна после записи пользователя
+
+    После запроса с записью в основную бд браузер получает cookie до конца окна REPLICA_STICKY_SECONDS,
+    и пока оно не истекло, все его запросы читают из основной бд и видят собственные изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with db_routing.routing_scope():
+            response = self.get_response(request)
+            if db_routing.wrote():
+                sticky = settings.REPLICA_STICKY_SECONDS
+                response.set_cookie(
+                    settings.REPLICA_STICKY_COOKIE, str(int(time.time() + sticky)),
+                    max_age=sticky, httponly=True, samesite='Lax'
+                )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if request.method in ('GET', 'HEAD') and getattr(view_class, 'read_from_replica', False) \
+                and not self.is_sticky(request):
+            db_routing.use_replica()
+
+    def is_sticky(self, request) -> bool:
+        try:
+            return int(request.COOKIES.get(settings.REPLICA_STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.10 on 2026-10-18 08:47
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def delete_duplicate_reactions(apps, schema_editor):
+    """Удаление повторных реакций профиля на один объект, остается последняя"""
+    PostReaction = apps.get_model('content', 'PostReaction')
+
+    latest_ids = PostReaction.objects.values(
+        'profile', 'content_type', 'object_id'
+    ).order_by().annotate(latest_id=Max('id')).values('latest_id')
+    PostReaction.objects.exclude(id__in=latest_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_post_comment_reaction_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_reactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='postreaction',
+            constraint=models.UniqueConstraint(fields=('profile', 'content_type', 'object_id'), name='unique_profile_reaction'),
+        ),
+    ]
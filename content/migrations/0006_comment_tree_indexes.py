@@ -0,0 +1,21 @@
+# Generated by Django 4.0.10 on 2026-10-18 08:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_postreaction_unique_profile_reaction'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'level', 'tree_id'], name='comment_post_threads_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['tree_id', 'lft'], name='comment_tree_range_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.0.10 on 2026-10-18 08:58
+
+from django.db import migrations, models
+
+PATH_STEP = 10
+BATCH_SIZE = 1000
+
+
+def fill_comment_paths(apps, schema_editor):
+    """Заполнение материализованных путей комментариев по ссылкам на родителя"""
+    Comment = apps.get_model('content', 'Comment')
+
+    parents = dict(Comment.objects.values_list('id', 'parent_id').iterator())
+    paths = {}
+
+    def get_path(comment_id):
+        chain = []
+        while comment_id is not None and comment_id not in paths:
+            chain.append(comment_id)
+            comment_id = parents.get(comment_id)
+        path = paths.get(comment_id, '')
+        for chain_id in reversed(chain):
+            path += f'{chain_id:0{PATH_STEP}d}'
+            paths[chain_id] = path
+        return path
+
+    comments = []
+    for comment_id in parents:
+        comments.append(Comment(id=comment_id, path=get_path(comment_id)))
+        if len(comments) >= BATCH_SIZE:
+            Comment.objects.bulk_update(comments, ['path'])
+            comments = []
+    Comment.objects.bulk_update(comments, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_comment_tree_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Путь в дереве'),
+        ),
+        migrations.RunPython(fill_comment_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+SEARCH_TABLE = 'content_post_search'
+BATCH_SIZE = 500
+
+
+def create_search_table(apps, schema_editor):
+    """Создание таблицы FTS5 для поиска по постам и заполнение ее неархивными постами"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    Post = apps.get_model('content', 'Post')
+
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+        f"title, caption, tags, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    # Пакеты по диапазонам id: iterator() не выполняет prefetch_related, и теги читались бы по запросу на пост
+    posts = Post.objects.filter(archived=False).order_by('pk').prefetch_related('tags')
+    last_pk = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+            if not batch:
+                break
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, caption, tags) VALUES (%s, %s, %s, %s)',
+                [[post.pk, post.title, post.caption, ' '.join(tag.title for tag in post.tags.all())] for post in batch]
+            )
+            last_pk = batch[-1].pk
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_comment_path'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
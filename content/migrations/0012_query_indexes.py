@@ -0,0 +1,29 @@
+# Generated by Django 4.0.10 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_storedfile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['-publication_date', '-id'], name='post_published_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['author', '-publication_date', '-id'], name='post_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('archived', True)), fields=['author', '-publication_date', '-id'], name='post_author_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postreaction',
+            index=models.Index(fields=['content_type', 'object_id', 'reaction'], name='reaction_object_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+# Значения PostReaction.LIKE и PostReaction.DISLIKE на момент миграции
+REACTION_COUNTERS = {
+    1: 'likes_count',
+    2: 'dislikes_count',
+}
+
+
+def backfill_reaction_counters(apps, schema_editor):
+    """Заполнение счетчиков реакций, которые были добавлены нулями для уже существующих постов и комментариев"""
+    content_type_model = apps.get_model('contenttypes', 'ContentType')
+    reaction_model = apps.get_model('content', 'PostReaction')
+    fields = list(REACTION_COUNTERS.values())
+
+    for model_name in ('Post', 'Comment'):
+        model = apps.get_model('content', model_name)
+        content_type = content_type_model.objects.get_for_model(model)
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', *fields)[:BATCH_SIZE])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            counts = reaction_model.objects.filter(
+                content_type=content_type,
+                object_id__in=[obj.pk for obj in batch]
+            ).order_by().values('object_id', 'reaction').annotate(count=Count('pk'))
+            actual = {(row['object_id'], row['reaction']): row['count'] for row in counts}
+
+            for obj in batch:
+                for reaction, field in REACTION_COUNTERS.items():
+                    setattr(obj, field, actual.get((obj.pk, reaction), 0))
+            model.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('content', '0012_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_reaction_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_backfill_reaction_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='slug',
+            field=models.SlugField(allow_unicode=True, unique=True, verbose_name='URL'),
+        ),
+    ]
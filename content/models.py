@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 from mptt.models import MPTTModel
 from mptt.fields import TreeForeignKey
@@ -18,7 +20,7 @@ def user_directory_path(instance, filename):
 class Tag(models.Model):
     """Модель тегов для поста"""
     title = models.CharField("Название", max_length=50)
-    slug = models.SlugField("URL", null=False, unique=True)
+    slug = models.SlugField("URL", null=False, unique=True, allow_unicode=True)
     author = models.ForeignKey(
         Profile,
         verbose_name="Автор",
@@ -32,7 +34,7 @@ class Tag(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            self.slug = slugify(self.title, allow_unicode=True)
         return super().save(*args, **kwargs)
 
     class Meta:
@@ -45,11 +47,15 @@ class Post(models.Model):
     title = models.CharField("Заголовок", max_length=100)
     caption = models.TextField("Содержание", max_length=4000)
     picture = models.ImageField("Изображение", upload_to=user_directory_path, null=True, blank=True)
+    picture_width = models.PositiveIntegerField("Ширина изображения", null=True, blank=True, editable=False)
+    picture_height = models.PositiveIntegerField("Высота изображения", null=True, blank=True, editable=False)
     publication_date = models.DateTimeField('Дата публикации', auto_now_add=True)
     changed = models.BooleanField("Изменен", default=False)
     archived = models.BooleanField("В архиве", default=False)
     modification_date = models.DateTimeField('Дата изменения', auto_now=True, null=True, blank=True)
     views = models.IntegerField("Просмотры", default=0)
+    likes_count = models.PositiveIntegerField("Лайки", default=0)
+    dislikes_count = models.PositiveIntegerField("Дизлайки", default=0)
     tags = models.ManyToManyField(Tag, verbose_name="Теги", related_name='tags', blank=True)
     author = models.ForeignKey(Profile, verbose_name="Автор", on_delete=models.CASCADE)
 
@@ -61,6 +67,21 @@ class Post(models.Model):
     class Meta:
         verbose_name = "Статья"
         verbose_name_plural = "Статьи"
+        # Django сравнивает булево поле как "NOT archived", такое условие не использует колонку составного
+        # индекса, поэтому признак архива вынесен в условия частичных индексов
+        indexes = [
+            models.Index(
+                fields=['-publication_date', '-id'], name='post_published_date_idx', condition=models.Q(archived=False)
+            ),
+            models.Index(
+                fields=['author', '-publication_date', '-id'], name='post_author_date_idx',
+                condition=models.Q(archived=False)
+            ),
+            models.Index(
+                fields=['author', '-publication_date', '-id'], name='post_author_archived_idx',
+                condition=models.Q(archived=True)
+            ),
+        ]
 
     def get_absolute_url(self):
         return reverse('content:post_detail', kwargs={'post_id': self.id})
@@ -93,6 +114,12 @@ class PostReaction(models.Model):
     class Meta:
         verbose_name = "Реакция"
         verbose_name_plural = "Реакции"
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'content_type', 'object_id'], name='unique_profile_reaction')
+        ]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'reaction'], name='reaction_object_idx'),
+        ]
 
 
 class Comment(MPTTModel):
@@ -104,6 +131,8 @@ class Comment(MPTTModel):
     post = models.ForeignKey(Post, related_name="comments", on_delete=models.CASCADE)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
     deleted = models.BooleanField("Удалён", default=False)
+    likes_count = models.PositiveIntegerField("Лайки", default=0)
+    dislikes_count = models.PositiveIntegerField("Дизлайки", default=0)
     parent = TreeForeignKey(
         "self",
         on_delete=models.SET_NULL,
@@ -112,10 +141,115 @@ class Comment(MPTTModel):
         related_name="children"
     )
     reaction = GenericRelation("PostReaction", related_query_name="comment", related_name="comments")
+    # Материализованный путь: id предков и самого комментария сегментами фиксированной ширины
+    path = models.TextField("Путь в дереве", blank=True, default='', editable=False)
+
+    PATH_STEP = 10
 
     def __str__(self):
         return f"{self.profile} - {self.post}"
 
+    @classmethod
+    def path_segment(cls, pk) -> str:
+        return f'{pk:0{cls.PATH_STEP}d}'
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding and settings.COMMENT_TREE_STORAGE == 'path':
+            # Ветка хранится в path, поэтому lft/rght других комментариев не сдвигаются
+            self.level = self.parent.level + 1 if self.parent_id else 0
+            self.lft, self.rght, self.tree_id = 1, 2, 0
+            with Comment.objects.disable_mptt_updates():
+                super().save(*args, **kwargs)
+            # Путь включает id комментария, поэтому записывается после вставки
+            parent_path = self.parent.path if self.parent_id else ''
+            self.path = parent_path + self.path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+        else:
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(fields=['post', 'level', 'tree_id'], name='comment_post_threads_idx'),
+            models.Index(fields=['tree_id', 'lft'], name='comment_tree_range_idx'),
+            models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Модель записи ленты главной страницы профиля"""
+    owner = models.ForeignKey(
+        Profile,
+        verbose_name="Владелец ленты",
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(Post, verbose_name="Статья", on_delete=models.CASCADE, related_name='timeline_entries')
+    publication_date = models.DateTimeField('Дата публикации')
+
+    def __str__(self):
+        return f'{self.post} in timeline of {self.owner}'
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'post'], name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=['owner', '-publication_date', '-post'], name='timeline_owner_date_idx')
+        ]
+
+
+class Job(models.Model):
+    """Модель фоновой задачи, выполняемой командой run_jobs"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Завершилась ошибкой'),
+    )
+
+    task = models.CharField("Задача", max_length=100)
+    args = models.JSONField("Аргументы", default=list, blank=True)
+    status = models.CharField("Состояние", max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField("Попытки", default=0)
+    max_attempts = models.PositiveSmallIntegerField("Максимум попыток", default=5)
+    run_at = models.DateTimeField("Запуск не раньше", default=timezone.now)
+    locked_at = models.DateTimeField("Взята в работу", null=True, blank=True)
+    locked_by = models.CharField("Обработчик", max_length=100, blank=True, default='')
+    last_error = models.TextField("Последняя ошибка", blank=True, default='')
+    created = models.DateTimeField("Создана", auto_now_add=True)
+    finished = models.DateTimeField("Завершена", null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.task}{tuple(self.args)} - {self.status}'
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+
+class StoredFile(models.Model):
+    """Модель учета ссылок на медиафайл, сохраненный по хешу содержимого"""
+    name = models.CharField("Путь", max_length=255, unique=True)
+    size = models.PositiveBigIntegerField("Размер")
+    references = models.IntegerField("Ссылки", default=0)
+    created = models.DateTimeField("Сохранен", auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.references})'
+
+    class Meta:
+        verbose_name = "Медиафайл"
+        verbose_name_plural = "Медиафайлы"
@@ -0,0 +1,26 @@
+from content.services import db_routing
+
+# Сессии, пользователи и типы содержимого всегда читаются из основной бд: от них зависит вход
+# и они не должны отставать даже на время синхронизации реплики
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'contenttypes', 'admin'}
+
+
+class ReplicaRouter:
+    """Чтения страниц только для чтения - из реплики, все записи и чтения после записи - из основной бд"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APPS and db_routing.reads_from_replica():
+            return db_routing.REPLICA_ALIAS
+        return db_routing.PRIMARY_ALIAS
+
+    def db_for_write(self, model, **hints):
+        db_routing.mark_write()
+        return db_routing.PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика - копия основной бд, связи между объектами из них допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплики приходит вместе со снимком основной бд
+        return db == db_routing.PRIMARY_ALIAS
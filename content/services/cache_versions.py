@@ -0,0 +1,32 @@
+import time
+
+from django.core.cache import cache
+
+
+def get_versions(keys) -> dict:
+    """Текущие версии для ключей кеша одним обращением, отсутствующие версии создаются"""
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # Начальная версия от времени, чтобы после вытеснения ключа не совпасть со старой
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+
+    return versions
+
+
+def get_version(key) -> int:
+    """Текущая версия для ключа кеша"""
+    return get_versions([key])[key]
+
+
+def bump_versions(keys):
+    """Смена версий одним обращением, закешированные под старыми версиями данные больше не читаются
+
+    Новая версия - уникальное значение, а не инкремент: параллельные смены не могут вернуть ключу
+    версию, под которой уже закешированы устаревшие данные.
+    """
+    if keys:
+        version = time.time_ns()
+        cache.set_many({key: version for key in keys}, None)
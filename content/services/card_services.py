@@ -0,0 +1,93 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.translation import get_language
+
+from content.models import Comment, Post
+from content.services.db_routing import PRIMARY_ALIAS
+from content.services.invalidation import POST, PROFILE, get_dependency_versions
+from content.services.stampede import get_many_or_compute
+
+POST_CARD_KEY = 'content:post_card:{post_id}:{version}:{author_version}:{language}:{current_tags}'
+
+
+def card_dependencies(post_id, author_id) -> tuple:
+    """От чего зависит карточка поста: сам пост со счетчиками и имя и аватар автора"""
+    return (POST, post_id), (PROFILE, author_id)
+
+
+def get_post_card_versions(posts) -> dict:
+    """Версии карточек для пар (id поста, id автора): {id поста: (версия поста, версия автора)}"""
+    dependencies = {post_id: card_dependencies(post_id, author_id) for post_id, author_id in posts}
+    versions = get_dependency_versions(dependency for pair in dependencies.values() for dependency in pair)
+
+    return {
+        post_id: (versions[post_dependency], versions[author_dependency])
+        for post_id, (post_dependency, author_dependency) in dependencies.items()
+    }
+
+
+def _render_cards(posts, current_tags) -> dict:
+    """Рендер карточек постов, которых нет в кеше, с загрузкой тегов и количества комментариев"""
+    # Посты из реплики перечитываются из основной бд, иначе в кеш под новой версией попадут старые данные
+    from_replica = [post.pk for post in posts if post._state.db != PRIMARY_ALIAS]
+    if from_replica:
+        fresh = Post.objects.using(PRIMARY_ALIAS).in_bulk(from_replica)
+        posts = [fresh.get(post.pk, post) for post in posts]
+
+    prefetch_related_objects(posts, 'author', 'tags')
+    comments_counts = dict(
+        Comment.objects.filter(post__in=posts).order_by().values('post').annotate(
+            count=Count('pk')).values_list('post', 'count')
+    )
+
+    cards = {}
+    for post in posts:
+        post.comments_count = comments_counts.get(post.pk, 0)
+        cards[post.pk] = render_to_string(
+            'content/includes/post_card.html', {'post': post, 'current_tags': current_tags})
+
+    return cards
+
+
+def render_post_cards(posts, current_tags=()) -> list:
+    """HTML карточки в атрибуте card у каждого поста, карточки берутся из кеша двумя обращениями на страницу
+
+    Карточка кешируется по версии поста и версии его автора, поэтому смена имени или аватара
+    автора сбрасывает карточки всех его постов сменой одной версии.
+    current_tags - слаги тегов открытой страницы, в карточке они выводятся текстом без ссылки.
+    """
+    posts = list(posts)
+    if not posts:
+        return posts
+
+    current_tags = sorted(set(current_tags))
+    # Слаги бывают не в ASCII, поэтому в ключе только их хеш
+    current_tags_key = hashlib.md5(','.join(current_tags).encode()).hexdigest() if current_tags else ''
+
+    versions = get_post_card_versions([(post.pk, post.author_id) for post in posts])
+
+    language = get_language()
+    card_keys = {
+        post.pk: POST_CARD_KEY.format(
+            post_id=post.pk,
+            version=versions[post.pk][0],
+            author_version=versions[post.pk][1],
+            language=language,
+            current_tags=current_tags_key
+        )
+        for post in posts
+    }
+    posts_by_id = {post.pk: post for post in posts}
+    cards = get_many_or_compute(
+        card_keys,
+        lambda post_ids: _render_cards([posts_by_id[post_id] for post_id in post_ids], current_tags),
+        settings.POST_CARD_CACHE_TIMEOUT
+    )
+
+    for post in posts:
+        post.card = cards[post.pk]
+
+    return posts
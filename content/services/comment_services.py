@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.translation import get_language
+
+from content.models import Comment
+from content.services.comment_storage import get_comment_storage
+from content.services.invalidation import COMMENTS, cached_fragment
+
+COMMENT_TREE_KEY = 'content:comment_tree:{post_id}:{language}:{part}'
+
+
+def build_comment_tree(comments) -> list:
+    """Сборка дерева из списка комментариев, упорядоченного по дереву; у каждого узла есть child_nodes"""
+    nodes = {comment.pk: comment for comment in comments}
+    roots = []
+    for comment in comments:
+        comment.child_nodes = []
+    for comment in comments:
+        parent = nodes.get(comment.parent_id)
+        if parent is None:
+            roots.append(comment)
+        else:
+            parent.child_nodes.append(comment)
+
+    return roots
+
+
+def get_comment_threads(post_id, after=None) -> tuple:
+    """Страница корневых комментариев поста с ответами до COMMENT_THREAD_DEPTH уровней и ключ следующей страницы"""
+    storage = get_comment_storage()
+    page_size = settings.COMMENT_THREADS_PAGE_SIZE
+    keys = storage.root_keys(post_id, after, page_size + 1)
+    if not keys:
+        return [], None
+
+    next_after = keys[page_size - 1] if len(keys) > page_size else None
+    keys = keys[:page_size]
+
+    return storage.threads(post_id, keys[0], keys[-1], settings.COMMENT_THREAD_DEPTH), next_after
+
+
+def get_comment_replies(comment) -> list:
+    """Ответы на комментарий на COMMENT_THREAD_DEPTH уровней вглубь"""
+    return get_comment_storage().replies(comment, settings.COMMENT_THREAD_DEPTH)
+
+
+def _cached_render(post_id, part, render):
+    """Результат render, закешированный до изменения комментариев поста или реакций на них"""
+    return cached_fragment(
+        COMMENT_TREE_KEY.format(post_id=post_id, language=get_language(), part=part),
+        [(COMMENTS, post_id)],
+        render,
+        settings.COMMENT_TREE_CACHE_TIMEOUT
+    )
+
+
+def _render_nodes(comments) -> str:
+    return render_to_string('content/includes/comment_tree.html', {'nodes': build_comment_tree(comments)})
+
+
+def render_comment_threads(post_id, after=None) -> dict:
+    """HTML страницы веток комментариев поста, ключ следующей страницы и количество комментариев
+
+    HTML одинаков для всех зрителей, кнопки редактирования своих комментариев включаются на странице.
+    """
+    def render():
+        comments, next_after = get_comment_threads(post_id, after)
+        return {
+            'html': _render_nodes(comments),
+            'next': next_after,
+            'count': Comment.objects.filter(post_id=post_id).count(),
+        }
+
+    return _cached_render(post_id, f'threads:{settings.COMMENT_TREE_STORAGE}:{after or 0}', render)
+
+
+def render_comment_replies(comment) -> dict:
+    """HTML ответов на комментарий"""
+    return _cached_render(
+        comment.post_id, f'replies:{settings.COMMENT_TREE_STORAGE}:{comment.pk}', lambda: {'html': _render_nodes(get_comment_replies(comment))}
+    )
@@ -0,0 +1,181 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count
+from django.db.models.functions import Substr
+
+from content.models import Comment
+
+BATCH_SIZE = 1000
+
+
+class MPTTCommentStorage:
+    """Ветки комментариев в полях lft/rght/tree_id django-mptt, у каждого корневого комментария свой tree_id"""
+
+    def root_keys(self, post_id, after, limit) -> list:
+        """Ключи корневых комментариев поста после after в порядке публикации"""
+        roots = Comment.objects.filter(post_id=post_id, level=0)
+        if after is not None:
+            roots = roots.filter(tree_id__gt=after)
+        return list(roots.order_by('tree_id').values_list('tree_id', flat=True)[:limit])
+
+    def threads(self, post_id, first_key, last_key, depth) -> list:
+        """Ветки с first_key по last_key на depth уровней одним запросом по диапазону tree_id"""
+        comments = list(
+            Comment.objects.filter(
+                post_id=post_id, tree_id__range=(first_key, last_key), level__lt=depth
+            ).select_related('profile').order_by('tree_id', 'lft')
+        )
+        self._mark_hidden_replies(comments, depth - 1)
+        return comments
+
+    def replies(self, comment, depth) -> list:
+        """Ответы на комментарий на depth уровней вглубь одним запросом по диапазону lft/rght"""
+        last_level = comment.level + depth
+        replies = list(
+            Comment.objects.filter(
+                tree_id=comment.tree_id, lft__gt=comment.lft, rght__lt=comment.rght, level__lte=last_level
+            ).select_related('profile').order_by('lft')
+        )
+        self._mark_hidden_replies(replies, last_level)
+        return replies
+
+    def _mark_hidden_replies(self, comments, last_level):
+        for comment in comments:
+            comment.hidden_replies = comment.get_descendant_count() if comment.level == last_level else 0
+
+
+class PathCommentStorage:
+    """Ветки комментариев в материализованном пути Comment.path, ключ ветки - id корневого комментария
+
+    Путь состоит из сегментов фиксированной ширины, поэтому ветка - это диапазон строк,
+    а добавление ответа не меняет других комментариев.
+    """
+
+    def root_keys(self, post_id, after, limit) -> list:
+        roots = Comment.objects.filter(post_id=post_id, level=0)
+        if after is not None:
+            roots = roots.filter(pk__gt=after)
+        return list(roots.order_by('pk').values_list('pk', flat=True)[:limit])
+
+    def threads(self, post_id, first_key, last_key, depth) -> list:
+        """Ветки с first_key по last_key на depth уровней запросом по диапазону path"""
+        in_range = Comment.objects.filter(
+            post_id=post_id,
+            path__gte=Comment.path_segment(first_key),
+            path__lt=Comment.path_segment(last_key + 1)
+        )
+        comments = list(in_range.filter(level__lt=depth).select_related('profile').order_by('path'))
+        self._mark_hidden_replies(comments, in_range, depth - 1)
+        return comments
+
+    def replies(self, comment, depth) -> list:
+        """Ответы на комментарий на depth уровней вглубь запросом по диапазону path"""
+        last_level = comment.level + depth
+        in_range = Comment.objects.filter(
+            post_id=comment.post_id,
+            path__gt=comment.path,
+            path__lt=comment.path[:-Comment.PATH_STEP] + Comment.path_segment(comment.pk + 1)
+        )
+        replies = list(in_range.filter(level__lte=last_level).select_related('profile').order_by('path'))
+        self._mark_hidden_replies(replies, in_range, last_level)
+        return replies
+
+    def _mark_hidden_replies(self, comments, in_range, last_level):
+        """Количество скрытых ответов одним запросом с группировкой по пути предка последнего уровня"""
+        hidden = {}
+        if any(comment.level == last_level for comment in comments):
+            prefix_length = (last_level + 1) * Comment.PATH_STEP
+            hidden = dict(
+                in_range.filter(level__gt=last_level).order_by().values(
+                    prefix=Substr('path', 1, prefix_length)
+                ).annotate(replies=Count('pk')).values_list('prefix', 'replies')
+            )
+
+        for comment in comments:
+            comment.hidden_replies = hidden.get(comment.path, 0) if comment.level == last_level else 0
+
+
+COMMENT_STORAGES = {
+    'mptt': MPTTCommentStorage(),
+    'path': PathCommentStorage(),
+}
+
+
+def get_comment_storage():
+    """Хранилище веток комментариев, выбранное в настройке COMMENT_TREE_STORAGE"""
+    try:
+        return COMMENT_STORAGES[settings.COMMENT_TREE_STORAGE]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f'COMMENT_TREE_STORAGE должен быть одним из: {", ".join(COMMENT_STORAGES)}'
+        )
+
+
+def rebuild_comment_paths(batch_size=BATCH_SIZE) -> int:
+    """Пересчет путей и уровней всех комментариев по ссылкам на родителя, возвращает количество комментариев"""
+    parents = dict(Comment.objects.values_list('id', 'parent_id').iterator())
+    paths = {}
+
+    def get_path(comment_id):
+        chain = []
+        while comment_id is not None and comment_id not in paths:
+            chain.append(comment_id)
+            comment_id = parents.get(comment_id)
+        path = paths.get(comment_id, '')
+        for chain_id in reversed(chain):
+            path += Comment.path_segment(chain_id)
+            paths[chain_id] = path
+        return path
+
+    comments = []
+    for comment_id in parents:
+        path = get_path(comment_id)
+        comments.append(Comment(id=comment_id, path=path, level=len(path) // Comment.PATH_STEP - 1))
+        if len(comments) >= batch_size:
+            Comment.objects.bulk_update(comments, ['path', 'level'])
+            comments = []
+    Comment.objects.bulk_update(comments, ['path', 'level'])
+
+    return len(parents)
+
+
+def rebuild_comment_mptt() -> int:
+    """Пересчет полей django-mptt по ссылкам на родителя, возвращает количество комментариев"""
+    Comment.objects.rebuild()
+    return Comment.objects.count()
+
+
+def tree_fields(ids, parents, first_tree_id) -> dict:
+    """Поля обоих хранилищ для новых комментариев, которые вставляются пакетом без save()
+
+    ids - id комментариев, parents - {id: id родителя или None}, родитель всегда из тех же ids.
+    У каждого корня свой tree_id начиная с first_tree_id. Возвращает {id: поля tree_id, level, lft, rght, path}.
+    """
+    children = {comment_id: [] for comment_id in ids}
+    for comment_id in ids:
+        if parents[comment_id] is not None:
+            children[parents[comment_id]].append(comment_id)
+
+    fields = {}
+    roots = [comment_id for comment_id in ids if parents[comment_id] is None]
+    for tree_id, root_id in enumerate(roots, start=first_tree_id):
+        counter = 1
+        stack = [(root_id, 0, False)]
+        while stack:
+            comment_id, level, visited = stack.pop()
+            if visited:
+                fields[comment_id]['rght'] = counter
+                counter += 1
+                continue
+
+            parent_id = parents[comment_id]
+            parent_path = fields[parent_id]['path'] if parent_id is not None else ''
+            fields[comment_id] = {
+                'tree_id': tree_id, 'level': level, 'lft': counter,
+                'path': parent_path + Comment.path_segment(comment_id)
+            }
+            counter += 1
+            stack.append((comment_id, level, True))
+            stack.extend((child_id, level + 1, False) for child_id in reversed(children[comment_id]))
+
+    return fields
@@ -0,0 +1,44 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+
+from content.models import PostReaction
+
+REACTION_COUNTERS = {
+    PostReaction.LIKE: 'likes_count',
+    PostReaction.DISLIKE: 'dislikes_count',
+}
+
+
+def recount_reactions(model, batch_size=1000) -> int:
+    """Пересчет счетчиков реакций объектов модели пакетами, возвращает количество исправленных объектов"""
+    content_type = ContentType.objects.get_for_model(model)
+    fields = list(REACTION_COUNTERS.values())
+    fixed = 0
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', *fields)[:batch_size]
+            )
+            if not batch:
+                return fixed
+            last_pk = batch[-1].pk
+
+            counts = PostReaction.objects.filter(
+                content_type=content_type,
+                object_id__in=[obj.pk for obj in batch]
+            ).order_by().values('object_id', 'reaction').annotate(count=Count('pk'))
+            actual = {(row['object_id'], row['reaction']): row['count'] for row in counts}
+
+            changed = []
+            for obj in batch:
+                values = {field: actual.get((obj.pk, reaction), 0) for reaction, field in REACTION_COUNTERS.items()}
+                if any(getattr(obj, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(obj, field, value)
+                    changed.append(obj)
+
+            model.objects.bulk_update(changed, fields)
+            fixed += len(changed)
@@ -0,0 +1,63 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA_ALIAS = 'replica'
+PRIMARY_ALIAS = 'default'
+
+_state = threading.local()
+
+
+@contextmanager
+def routing_scope():
+    """Состояние маршрутизации чтений на время одного запроса"""
+    _state.replica, _state.wrote = False, False
+    try:
+        yield
+    finally:
+        _state.replica, _state.wrote = False, False
+
+
+def use_replica():
+    """Чтения до конца запроса идут в реплику, если она включена"""
+    _state.replica = settings.REPLICA_READS_ENABLED
+
+
+def mark_write():
+    """Отметка о записи: дальнейшие чтения в запросе идут в основную бд"""
+    _state.wrote = True
+
+
+def wrote() -> bool:
+    return getattr(_state, 'wrote', False)
+
+
+def reads_from_replica() -> bool:
+    """Читать ли текущему потоку из реплики: в запросах к страницам только для чтения, до первой записи"""
+    return getattr(_state, 'replica', False) and not wrote() and not getattr(_state, 'primary', 0)
+
+
+@contextmanager
+def primary_reads():
+    """Чтения из основной бд в пределах блока, например для данных, которые кладутся в общий кеш"""
+    _state.primary = getattr(_state, 'primary', 0) + 1
+    try:
+        yield
+    finally:
+        _state.primary -= 1
+
+
+def replica_generation():
+    """Номер снимка реплики, входит в ETag страниц из реплики
+
+    sync_replica подменяет файл реплики новым, поэтому inode и время изменения файла меняются с каждым
+    снимком и видны всем процессам. Для реплики не в файле - None.
+    """
+    try:
+        stat = os.stat(connections[REPLICA_ALIAS].settings_dict['NAME'])
+    except (OSError, TypeError, ValueError):
+        return None
+    return stat.st_ino, stat.st_mtime_ns
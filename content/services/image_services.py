@@ -0,0 +1,185 @@
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.signals import pre_save, post_save
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from content.services.invalidation import invalidate
+from content.services.job_services import task, enqueue
+
+logger = logging.getLogger(__name__)
+
+# Расширение файла варианта, формат Pillow и MIME-тип; последний формат - запасной для браузеров без WebP
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', 'image/webp'),
+    ('jpg', 'JPEG', 'image/jpeg'),
+)
+
+# Тег ориентации EXIF и его значения, при которых изображение поворачивается на 90 градусов
+EXIF_ORIENTATION = 0x0112
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Поля, изображения которых обрабатываются: (модель, поле, вид зависимости кеша)
+TRACKED_IMAGES = []
+
+
+def _field_label(fieldfile) -> str:
+    return f'{fieldfile.instance._meta.label}.{fieldfile.field.name}'
+
+
+def variant_widths(fieldfile, width) -> list:
+    """Ширины вариантов изображения из IMAGE_VARIANT_WIDTHS, не больше ширины оригинала"""
+    widths = settings.IMAGE_VARIANT_WIDTHS.get(_field_label(fieldfile), ())
+    return sorted({min(variant_width, width) for variant_width in widths})
+
+
+def variant_name(name, width, extension) -> str:
+    """Путь варианта рядом с оригиналом: cas/ab/cd/abcd...ef.jpg -> cas/ab/cd/abcd...ef.128w.q80.webp
+
+    Качество входит в имя, чтобы вариант под одним именем никогда не менялся и кешировался навсегда.
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}.{width}w.q{settings.IMAGE_VARIANT_QUALITY}.{extension}'
+
+
+def get_dimensions(fieldfile) -> tuple:
+    """Ширина и высота изображения с учетом поворота из EXIF, читается только заголовок файла"""
+    file = fieldfile.file
+    position = file.tell()
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+            if image.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+                width, height = height, width
+    finally:
+        file.seek(position)
+
+    return width, height
+
+
+def generate_variants(fieldfile) -> list:
+    """Уменьшенные копии изображения во всех форматах, возвращает пути созданных файлов"""
+    storage = fieldfile.storage
+    with storage.open(fieldfile.name) as file, Image.open(file) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        names = []
+        for width in variant_widths(fieldfile, image.width):
+            height = max(round(image.height * width / image.width), 1)
+            resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+            for extension, image_format, _ in VARIANT_FORMATS:
+                variant = resized
+                if image_format == 'JPEG' and variant.mode != 'RGB':
+                    # В JPEG нет прозрачности, прозрачные области становятся белыми
+                    background = Image.new('RGB', variant.size, 'white')
+                    background.paste(variant, mask=variant.getchannel('A'))
+                    variant = background
+
+                content = BytesIO()
+                variant.save(content, image_format, quality=settings.IMAGE_VARIANT_QUALITY, optimize=True)
+                name = variant_name(fieldfile.name, width, extension)
+                # Путь варианта вычисляется в шаблоне, поэтому он сохраняется под точным именем
+                if hasattr(storage, 'save_derived'):
+                    names.append(storage.save_derived(name, ContentFile(content.getvalue())))
+                else:
+                    storage.delete(name)
+                    names.append(storage.save(name, ContentFile(content.getvalue())))
+
+    return names
+
+
+@task('images.process')
+def process_image(model_label, pk, field_name, name, dependency_kind):
+    """Фоновая задача: размеры и варианты загруженного изображения, затем сброс кеша страниц с ним
+
+    Пока задача не выполнена, размеры пусты и шаблоны показывают оригинал.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only('pk', field_name).first()
+    fieldfile = getattr(instance, field_name, None)
+    if fieldfile is None or fieldfile.name != name:
+        # Объект удален или изображение уже заменено, у нового изображения своя задача
+        return
+
+    try:
+        with fieldfile.open('rb'):
+            width, height = get_dimensions(fieldfile)
+        generate_variants(fieldfile)
+    except UnidentifiedImageError:
+        # Файл не является изображением, повтор не поможет
+        logger.warning('Не удалось прочитать изображение %s', name)
+        return
+
+    updated = model.objects.filter(pk=pk, **{field_name: name}).update(
+        **{f'{field_name}_width': width, f'{field_name}_height': height})
+    if updated:
+        invalidate((dependency_kind, pk))
+
+
+def image_sources(fieldfile):
+    """Данные для <picture>: размеры оригинала, srcset по форматам и запасной src; None - вариантов нет
+
+    Размеры берутся из полей модели {поле}_width и {поле}_height, файл не открывается.
+    """
+    instance, field_name = fieldfile.instance, fieldfile.field.name
+    width = getattr(instance, f'{field_name}_width')
+    height = getattr(instance, f'{field_name}_height')
+    widths = variant_widths(fieldfile, width) if width and height else []
+    if not widths:
+        return None
+
+    sources = [
+        (mime_type, ', '.join(
+            f'{fieldfile.storage.url(variant_name(fieldfile.name, variant_width, extension))} {variant_width}w'
+            for variant_width in widths
+        ))
+        for extension, _, mime_type in VARIANT_FORMATS
+    ]
+    extension = VARIANT_FORMATS[-1][0]
+
+    return {
+        'width': width,
+        'height': height,
+        'sources': sources[:-1],
+        'srcset': sources[-1][1],
+        'src': fieldfile.storage.url(variant_name(fieldfile.name, widths[-1], extension)),
+    }
+
+
+def track_image(model, field_name, dependency_kind):
+    """Обработка изображений поля в фоновой задаче после коммита
+
+    В запросе изображение не открывается: размеры сбрасываются, а задача после обработки
+    сохраняет новые размеры и сбрасывает зависимость кеша (dependency_kind, pk).
+    """
+    TRACKED_IMAGES.append((model, field_name, dependency_kind))
+
+    def reset(sender, instance, **kwargs):
+        fieldfile = getattr(instance, field_name)
+        if fieldfile and fieldfile._committed:
+            return
+
+        setattr(instance, f'{field_name}_width', None)
+        setattr(instance, f'{field_name}_height', None)
+        if fieldfile:
+            instance._uploaded_images = getattr(instance, '_uploaded_images', set()) | {field_name}
+
+    def schedule(sender, instance, **kwargs):
+        uploaded = getattr(instance, '_uploaded_images', set())
+        if field_name in uploaded:
+            uploaded.discard(field_name)
+            enqueue(
+                'images.process', model._meta.label, instance.pk, field_name,
+                getattr(instance, field_name).name, dependency_kind
+            )
+
+    label = f'{model._meta.label}.{field_name}'
+    pre_save.connect(reset, sender=model, weak=False, dispatch_uid=f'images:reset:{label}')
+    post_save.connect(schedule, sender=model, weak=False, dispatch_uid=f'images:schedule:{label}')
@@ -0,0 +1,114 @@
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from content.models import Comment, Post
+from content.services.cache_versions import get_versions, bump_versions
+from content.services.stampede import get_or_compute
+
+DEPENDENCY_KEY = 'content:dependency:{kind}:{pk}'
+
+# Виды зависимостей: пост и его счетчики, профиль (имя, аватар), комментарии поста, подписки профиля
+POST = 'post'
+PROFILE = 'profile'
+COMMENTS = 'comments'
+FOLLOWS = 'follows'
+
+_state = threading.local()
+
+
+def dependency_key(dependency) -> str:
+    """Ключ версии зависимости (вид, id), например ('post', 1)"""
+    kind, pk = dependency
+    return DEPENDENCY_KEY.format(kind=kind, pk=pk)
+
+
+def get_dependency_versions(dependencies) -> dict:
+    """Текущие версии зависимостей одним обращением к кешу: {зависимость: версия}"""
+    dependencies = list(dict.fromkeys(dependencies))
+    versions = get_versions([dependency_key(dependency) for dependency in dependencies])
+    return {dependency: versions[dependency_key(dependency)] for dependency in dependencies}
+
+
+def versioned_key(prefix, dependencies) -> str:
+    """Ключ кеша из prefix и версий всех зависимостей: данные под ним не читаются после смены любой из них"""
+    dependencies = list(dependencies)
+    versions = get_dependency_versions(dependencies)
+    return ':'.join([prefix, *(str(versions[dependency]) for dependency in dependencies)])
+
+
+def cached_fragment(prefix, dependencies, render, timeout):
+    """Результат render, закешированный до изменения одной из зависимостей, пересчитывается одним процессом"""
+    return get_or_compute(versioned_key(prefix, dependencies), render, timeout)
+
+
+def invalidate(*dependencies):
+    """Смена версий зависимостей после коммита текущей транзакции
+
+    Внутри batch версии меняются один раз для всех изменений в конце пакета.
+    """
+    if dependencies:
+        transaction.on_commit(partial(_committed, set(dependencies)))
+
+
+def _committed(dependencies):
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        bump_versions([dependency_key(dependency) for dependency in dependencies])
+    else:
+        pending.update(dependencies)
+
+
+@contextmanager
+def batch():
+    """Накопление закоммиченных изменений и смена версий одним обращением к кешу при выходе"""
+    if getattr(_state, 'pending', None) is not None:
+        # Вложенный пакет входит во внешний
+        yield
+        return
+
+    _state.pending = set()
+    try:
+        yield
+    finally:
+        pending, _state.pending = _state.pending, None
+        bump_versions([dependency_key(dependency) for dependency in pending])
+
+
+def reaction_dependencies(model, object_id) -> list:
+    """Зависимости, которые меняет реакция на пост или комментарий"""
+    if model is Post:
+        return [(POST, object_id)]
+    if model is Comment:
+        post_ids = Comment.objects.filter(pk=object_id).values_list('post_id', flat=True)
+        return [(COMMENTS, post_id) for post_id in post_ids]
+    return []
+
+
+def track(model, dependencies, delete_signal=post_delete):
+    """Смена версий dependencies(instance) при сохранении и удалении объектов model
+
+    delete_signal=pre_delete нужен, когда зависимости читаются из связей, удаляемых вместе с объектом.
+    """
+    def changed(sender, instance, **kwargs):
+        invalidate(*dependencies(instance))
+
+    post_save.connect(changed, sender=model, weak=False, dispatch_uid=f'invalidation:save:{model._meta.label}')
+    delete_signal.connect(changed, sender=model, weak=False, dispatch_uid=f'invalidation:delete:{model._meta.label}')
+
+
+def track_m2m(through, dependencies):
+    """Смена версий dependencies(instance, reverse, pk_set) при изменении связи многие-ко-многим
+
+    При очистке связи pk_set - None, зависимости читаются до удаления строк.
+    """
+    def changed(sender, instance, action, reverse, pk_set, **kwargs):
+        if action in ('post_add', 'post_remove'):
+            invalidate(*dependencies(instance, reverse, pk_set))
+        elif action == 'pre_clear':
+            invalidate(*dependencies(instance, reverse, None))
+
+    m2m_changed.connect(changed, sender=through, weak=False, dispatch_uid=f'invalidation:m2m:{through._meta.label}')
@@ -0,0 +1,141 @@
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from content.models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+RESULT_SAVE_ATTEMPTS = 5
+
+
+def task(name):
+    """Регистрация функции как фоновой задачи под именем name"""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, *args, delay=None):
+    """Постановка задачи в очередь после коммита текущей транзакции
+
+    Задача не выполняется для изменений, которые откатились, и не берется в работу раньше, чем они видны.
+    """
+    if name not in TASKS:
+        raise KeyError(f'Неизвестная фоновая задача: {name}')
+
+    transaction.on_commit(partial(_create_job, name, list(args), delay))
+
+
+def _create_job(name, args, delay):
+    Job.objects.create(
+        task=name,
+        args=args,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_at=timezone.now() + (delay or timedelta())
+    )
+
+
+def retry_delay(attempts) -> timedelta:
+    """Экспоненциальная задержка перед повтором со случайным разбросом, чтобы повторы не шли пачкой"""
+    seconds = min(settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_DELAY)
+    return timedelta(seconds=seconds * random.uniform(0.5, 1.0))
+
+
+def claim_jobs(worker, limit) -> list:
+    """Захват до limit готовых к запуску задач обработчиком worker
+
+    Задача захватывается условным UPDATE по ее состоянию, поэтому несколько обработчиков не возьмут
+    одну задачу дважды. Попытка засчитывается при захвате, поэтому задача, которая роняет обработчик,
+    тоже исчерпывает попытки. Задачи, зависшие у упавшего обработчика дольше JOB_LOCK_TIMEOUT, берутся
+    заново, а если попыток не осталось - отмечаются как завершившиеся ошибкой.
+    """
+    now = timezone.now()
+    stale = Q(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT))
+    failed = Job.objects.filter(stale, attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished=now, locked_at=None,
+        last_error=f'Обработчик не завершил задачу за {settings.JOB_LOCK_TIMEOUT} с'
+    )
+    if failed:
+        logger.error('Фоновых задач не завершено обработчиками после последней попытки: %s', failed)
+
+    ready = Q(status=Job.PENDING, run_at__lte=now) | stale
+    candidates = Job.objects.filter(ready).order_by('run_at', 'pk').values_list('pk', 'status', 'locked_at')
+
+    claimed = []
+    for pk, status, locked_at in candidates[:limit * 2]:
+        updated = Job.objects.filter(pk=pk, status=status, locked_at=locked_at).update(
+            status=Job.RUNNING, locked_at=now, locked_by=worker, attempts=F('attempts') + 1)
+        if updated:
+            claimed.append(pk)
+        if len(claimed) == limit:
+            break
+
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'pk'))
+
+
+def run_job(job) -> bool:
+    """Выполнение захваченной задачи, при ошибке - повтор с задержкой или отметка о неудаче"""
+    try:
+        TASKS[job.task](*job.args)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished = timezone.now()
+            logger.exception('Фоновая задача %s завершилась ошибкой', job)
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+            logger.warning('Фоновая задача %s будет повторена в %s', job, job.run_at)
+        succeeded = False
+    else:
+        job.status = Job.DONE
+        job.finished = timezone.now()
+        succeeded = True
+
+    job.locked_at = None
+    for attempt in range(RESULT_SAVE_ATTEMPTS):
+        try:
+            Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+                status=job.status, run_at=job.run_at, locked_at=None,
+                last_error=job.last_error, finished=job.finished
+            )
+            break
+        except OperationalError:
+            # Бд занята другим обработчиком; если записать так и не удалось, задача будет взята
+            # заново по JOB_LOCK_TIMEOUT, поэтому задачи должны выдерживать повторный запуск
+            if attempt == RESULT_SAVE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
+
+    return succeeded
+
+
+def run_pending_jobs(worker='inline') -> int:
+    """Выполнение всех готовых задач в текущем потоке, возвращает количество выполненных задач"""
+    processed = 0
+    while True:
+        jobs = claim_jobs(worker, settings.JOB_BATCH_SIZE)
+        if not jobs:
+            return processed
+        for job in jobs:
+            run_job(job)
+            processed += 1
+
+
+def delete_finished_jobs(older_than) -> int:
+    """Удаление выполненных задач, завершившихся раньше older_than"""
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished__lt=older_than).delete()
+    return deleted
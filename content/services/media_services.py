@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from content.services.image_services import TRACKED_IMAGES
+from content.services.invalidation import invalidate
+from content.services.job_services import enqueue
+from content.storage import is_content_addressed
+
+BATCH_SIZE = 500
+
+
+def _release(storage, name):
+    if name and hasattr(storage, 'release'):
+        storage.release(name)
+
+
+def track_file(model, field_name):
+    """Освобождение ссылки на файл хранилища при замене, очистке поля или удалении объекта"""
+    field = model._meta.get_field(field_name)
+
+    def remember_replaced(sender, instance, **kwargs):
+        fieldfile = getattr(instance, field_name)
+        if instance.pk is None or (fieldfile and fieldfile._committed):
+            return
+        # Старое имя читается из бд только при загрузке нового файла или очистке поля
+        instance._replaced_files = getattr(instance, '_replaced_files', {})
+        instance._replaced_files[field_name] = model.objects.filter(pk=instance.pk).values_list(
+            field_name, flat=True).first()
+
+    def release_replaced(sender, instance, **kwargs):
+        old_name = getattr(instance, '_replaced_files', {}).pop(field_name, None)
+        if old_name and old_name != getattr(instance, field_name).name:
+            _release(field.storage, old_name)
+
+    def release_deleted(sender, instance, **kwargs):
+        _release(field.storage, getattr(instance, field_name).name)
+
+    label = f'{model._meta.label}.{field_name}'
+    pre_save.connect(remember_replaced, sender=model, weak=False, dispatch_uid=f'media:replaced:{label}')
+    post_save.connect(release_replaced, sender=model, weak=False, dispatch_uid=f'media:release:{label}')
+    post_delete.connect(release_deleted, sender=model, weak=False, dispatch_uid=f'media:delete:{label}')
+
+
+def rehash_media(delete_originals=False, batch_size=BATCH_SIZE, log=None) -> dict:
+    """Перенос загруженных ранее файлов в хранилище по хешу содержимого
+
+    Файлы копируются потоково кусками, объекты читаются пакетами по batch_size. Варианты изображений
+    пересоздаются фоновыми задачами, до этого страницы показывают оригинал по новому пути.
+    Возвращает счетчики {'moved', 'missing', 'deleted'}.
+    """
+    log = log or (lambda message: None)
+    result = {'moved': 0, 'missing': 0, 'deleted': 0}
+
+    for model, field_name, dependency_kind in TRACKED_IMAGES:
+        storage = model._meta.get_field(field_name).storage
+        if not hasattr(storage, 'release'):
+            continue
+
+        legacy = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True}).exclude(
+            **{f'{field_name}__startswith': 'cas/'})
+        moved_names = set()
+        for pk, name in legacy.values_list('pk', field_name).iterator(chunk_size=batch_size):
+            if is_content_addressed(name):
+                continue
+            if not storage.exists(name):
+                result['missing'] += 1
+                log(f'{model._meta.label} {pk}: нет файла {name}')
+                continue
+
+            with transaction.atomic():
+                with storage.open(name) as file:
+                    new_name = storage.save(name, file)
+                updated = model.objects.filter(pk=pk, **{field_name: name}).update(
+                    **{field_name: new_name, f'{field_name}_width': None, f'{field_name}_height': None})
+                if not updated:
+                    # Файл заменили во время переноса, ссылка на копию не нужна
+                    storage.release(new_name)
+                    continue
+                invalidate((dependency_kind, pk))
+                enqueue('images.process', model._meta.label, pk, field_name, new_name, dependency_kind)
+
+            moved_names.add(name)
+            result['moved'] += 1
+
+        if delete_originals:
+            for name in moved_names:
+                if not model.objects.filter(**{field_name: name}).exists():
+                    storage.delete(name)
+                    result['deleted'] += 1
+
+    return result
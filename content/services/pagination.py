@@ -0,0 +1,150 @@
+import binascii
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Callable, NamedTuple, Optional
+
+from django.db.models import Q
+from django.http import Http404, QueryDict
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class Cursor(NamedTuple):
+    """Позиция в списке, от которой строится страница: значение поля сортировки и id"""
+    value: Any
+    pk: int
+    direction: str
+
+
+class KeysetPage:
+    """Страница списка с курсорами для перехода на соседние страницы"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        # Параметры запроса, которые сохраняются в ссылках на соседние страницы
+        self.query = QueryDict()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def next_query(self):
+        return self._query_with_cursor(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self._query_with_cursor(self.previous_cursor)
+
+    def _query_with_cursor(self, cursor):
+        query = self.query.copy()
+        query['cursor'] = cursor
+        return query.urlencode()
+
+
+def encode_cursor(value, pk: int, direction: str) -> str:
+    """Упаковка позиции в непрозрачную строку для URL"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = f'{direction}|{value}|{pk}'
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: Optional[str], parse: Callable = datetime.fromisoformat) -> Optional[Cursor]:
+    """Распаковка курсора из URL, parse восстанавливает значение поля сортировки; при неверном курсоре 404"""
+    if not token:
+        return None
+
+    try:
+        raw = urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        # Значение может содержать разделитель, поэтому направление и id отделяются с краев
+        direction, raw = raw.split('|', 1)
+        value, pk = raw.rsplit('|', 1)
+        cursor = Cursor(parse(value), int(pk), direction)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise Http404
+
+    if cursor.direction not in (NEXT, PREVIOUS):
+        raise Http404
+
+    return cursor
+
+
+def keyset_filter(queryset, cursor: Optional[Cursor], value_field='publication_date', pk_field='id',
+                  descending=True):
+    """Отбор записей за курсором, отсортированных в направлении обхода
+
+    По умолчанию список идет от больших значений к меньшим (новые посты первыми), descending=False - наоборот.
+    """
+    forward = cursor is None or cursor.direction == NEXT
+    if forward == descending:
+        lookup, ordering = 'lt', (f'-{value_field}', f'-{pk_field}')
+    else:
+        lookup, ordering = 'gt', (value_field, pk_field)
+
+    if cursor is not None:
+        queryset = queryset.filter(
+            Q(**{f'{value_field}__{lookup}': cursor.value}) |
+            Q(**{value_field: cursor.value, f'{pk_field}__{lookup}': cursor.pk})
+        )
+
+    return queryset.order_by(*ordering)
+
+
+def make_page(rows, cursor: Optional[Cursor], page_size: int, key=lambda obj: (obj.publication_date, obj.pk)):
+    """Создание страницы из не более чем page_size + 1 записей, отобранных keyset_filter"""
+    rows = list(rows)
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    backwards = cursor is not None and cursor.direction == PREVIOUS
+    if backwards:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, cursor is not None
+
+    next_cursor = encode_cursor(*key(rows[-1]), NEXT) if rows and has_next else None
+    previous_cursor = encode_cursor(*key(rows[0]), PREVIOUS) if rows and has_previous else None
+
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate_queryset(queryset, token: Optional[str], page_size: int, value_field='publication_date',
+                      descending=True, parse: Callable = datetime.fromisoformat) -> KeysetPage:
+    """Keyset-пагинация queryset по (value_field, id) без OFFSET, по умолчанию постов от новых к старым"""
+    cursor = decode_cursor(token, parse)
+    rows = keyset_filter(queryset, cursor, value_field, descending=descending)[:page_size + 1]
+    return make_page(rows, cursor, page_size, key=lambda obj: (getattr(obj, value_field), obj.pk))
+
+
+def paginate_ids(queryset, ids, cursor: Optional[Cursor], page_size: int) -> KeysetPage:
+    """Keyset-пагинация по отсортированному списку id постов
+
+    Посты создаются с auto_now_add датой публикации, поэтому порядок id совпадает с порядком публикации.
+    """
+    if cursor is None:
+        window = ids[-(page_size + 1):][::-1]
+    elif cursor.direction == NEXT:
+        position = bisect_left(ids, cursor.pk)
+        window = ids[max(position - page_size - 1, 0):position][::-1]
+    else:
+        position = bisect_right(ids, cursor.pk)
+        window = ids[position:position + page_size + 1]
+
+    posts = queryset.in_bulk(window)
+    return make_page([posts[post_id] for post_id in window if post_id in posts], cursor, page_size)
@@ -0,0 +1,123 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.http import Http404
+
+from content.models import Post
+from content.services.pagination import KeysetPage
+
+SEARCH_TABLE = 'content_post_search'
+BATCH_SIZE = 500
+
+# Веса колонок title, caption, tags для bm25: совпадение в заголовке важнее совпадения в тексте
+RANK = f'bm25({SEARCH_TABLE}, 10.0, 1.0, 5.0)'
+
+
+def _has_fts() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def _match_expression(query) -> str:
+    """Запрос пользователя в виде выражения FTS5: все слова по префиксу, без операторов FTS5"""
+    return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', query.lower()))
+
+
+def _search_row(post) -> tuple:
+    return post.pk, post.title, post.caption, ' '.join(tag.title for tag in post.tags.all())
+
+
+def index_post(post_id):
+    """Обновление поста в поисковом индексе, архивные и удаленные посты убираются из индекса"""
+    if not _has_fts():
+        return
+
+    post = Post.objects.filter(pk=post_id, archived=False).prefetch_related('tags').first()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id])
+        if post is not None:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, caption, tags) VALUES (%s, %s, %s, %s)',
+                _search_row(post)
+            )
+
+
+def remove_post(post_id):
+    """Удаление поста из поискового индекса"""
+    if not _has_fts():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild_search_index(batch_size=BATCH_SIZE) -> int:
+    """Полное перестроение поискового индекса пакетами, возвращает количество проиндексированных постов"""
+    if not _has_fts():
+        return 0
+
+    indexed = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+        posts = Post.objects.filter(archived=False).order_by('pk').prefetch_related('tags')
+        last_pk = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, caption, tags) VALUES (%s, %s, %s, %s)',
+                [_search_row(post) for post in batch]
+            )
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+
+    return indexed
+
+
+def search_post_ids(query, offset, limit) -> list:
+    """id неархивных постов, подходящих под запрос, в порядке релевантности"""
+    expression = _match_expression(query)
+    if not expression:
+        return []
+
+    if not _has_fts():
+        # Без FTS5 поиск по подстроке во всех словах запроса, по дате публикации
+        posts = Post.objects.filter(archived=False)
+        for term in re.findall(r'\w+', query):
+            posts = posts.filter(Q(title__icontains=term) | Q(caption__icontains=term) | Q(tags__title__icontains=term))
+        return list(posts.distinct().order_by('-publication_date').values_list('pk', flat=True)[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY {RANK}, rowid LIMIT %s OFFSET %s',
+            [expression, limit, offset]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_posts(query, token, page_size) -> KeysetPage:
+    """Страница результатов поиска, курсор - номер страницы
+
+    Оценка bm25 зависит от всего индекса и меняется между запросами, поэтому страницы считаются по смещению.
+    """
+    try:
+        page_number = int(token or 1)
+    except ValueError:
+        raise Http404
+    if page_number < 1:
+        raise Http404
+
+    ids = search_post_ids(query, (page_number - 1) * page_size, page_size + 1)
+    has_next = len(ids) > page_size
+    ids = ids[:page_size]
+
+    posts = Post.objects.filter(archived=False).select_related('author').prefetch_related('tags')
+    posts_by_id = posts.in_bulk(ids)
+
+    return KeysetPage(
+        [posts_by_id[post_id] for post_id in ids if post_id in posts_by_id],
+        next_cursor=str(page_number + 1) if has_next else None,
+        previous_cursor=str(page_number - 1) if page_number > 1 else None
+    )
@@ -0,0 +1,231 @@
+import random
+import string
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+
+from content.models import Comment, Post, PostReaction, Tag, TimelineEntry
+from content.services.comment_storage import tree_fields
+from content.services.search_services import rebuild_search_index
+from content.services.tag_index import tag_index
+from content.services.timeline_services import rebuild_timelines
+from followers.models import Follower
+from profiles.models import Profile
+from profiles.services.profile_index import profile_index
+
+SEED_USERNAME = 'seed{seed}-{number}'
+SEED_PASSWORD = 'password'
+BATCH_SIZE = 5000
+
+ARCHIVED_SHARE = 0.05
+REPLY_SHARE = 0.6
+LIKE_SHARE = 0.8
+MAX_POST_TAGS = 3
+# Показатель степенного распределения популярности профилей и тегов: немногие получают большую часть подписок
+POPULARITY_EXPONENT = 1.1
+
+
+def _next_id(model, field='id') -> int:
+    return (model.objects.aggregate(value=Max(field))['value'] or 0) + 1
+
+
+def _popularity(count):
+    """Накопленные веса рангов по закону Ципфа для random.choices"""
+    return list(accumulate(1 / (rank + 1) ** POPULARITY_EXPONENT for rank in range(count)))
+
+
+class DatasetSeeder:
+    """Генерация синтетических данных пакетными вставками
+
+    id задаются заранее, поэтому связанные строки вставляются без чтения обратно, а поля веток
+    комментариев и счетчики реакций вычисляются в памяти до вставки. Данные зависят только от seed
+    и параметров, кроме дат публикации. Ленты, поисковый индекс и счетчики подписчиков
+    перестраиваются в конце, как это делают команды rebuild_*.
+    """
+
+    def __init__(self, users, profiles_per_user=3, follows=20, posts=5, comments=5, reactions=10,
+                 comment_reactions=1, tags=200, seed=0, batch_size=BATCH_SIZE, log=None):
+        self.users = users
+        self.profiles_per_user = profiles_per_user
+        self.follows = follows
+        self.posts = posts
+        self.comments = comments
+        self.reactions = reactions
+        self.comment_reactions = comment_reactions
+        self.tags = tags
+        self.seed = seed
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+
+        self.rng = random.Random(seed)
+        self.counts = {}
+        self._pending = {}
+
+    def usernames(self) -> list:
+        return [SEED_USERNAME.format(seed=self.seed, number=number) for number in range(self.users)]
+
+    def run(self) -> dict:
+        """Создание всех данных, возвращает количество созданных строк по моделям"""
+        if User.objects.filter(username__in=self.usernames()[:1]).exists():
+            raise ValueError(f'Данные с seed {self.seed} уже созданы')
+
+        profile_ids = self._create_users_and_profiles()
+        self._create_follows(profile_ids)
+        tag_ids = self._create_tags()
+        self._create_posts(profile_ids, tag_ids)
+        self._reset_sequences()
+
+        self.log('Перестроение лент и поискового индекса')
+        self.counts['timeline entries'] = rebuild_timelines(self.batch_size)
+        rebuild_search_index(self.batch_size)
+        tag_index.reset()
+        profile_index.reset()
+
+        return self.counts
+
+    def _add(self, model, objects):
+        """Буфер строк модели, вставляется вместе с остальными буферами при заполнении"""
+        self._pending.setdefault(model, []).extend(objects)
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + len(objects)
+
+    def _flush(self, force=False):
+        if not force and sum(len(objects) for objects in self._pending.values()) < self.batch_size:
+            return
+
+        # Строки вставляются после строк, на которые ссылаются
+        with transaction.atomic():
+            for model in [User, Profile, Follower, Post, Post.tags.through, Comment, PostReaction]:
+                if self._pending.get(model):
+                    model.objects.bulk_create(self._pending[model], batch_size=self.batch_size)
+        self._pending = {}
+
+    def _slug(self, name) -> str:
+        return slugify(f'{name}-{"".join(self.rng.choices(string.ascii_letters + string.digits, k=8))}')
+
+    def _create_users_and_profiles(self) -> list:
+        self.log(f'Пользователи и профили: {self.users}')
+        # Хеш пароля считается один раз, это самая дорогая часть создания пользователя
+        password = make_password(SEED_PASSWORD)
+        user_id, profile_id = _next_id(User), _next_id(Profile)
+
+        profile_ids = []
+        for username in self.usernames():
+            self._add(User, [User(id=user_id, username=username, password=password)])
+            # Как create_profile_for_new_user: первый профиль с именем пользователя используется
+            profiles = []
+            for number in range(self.rng.randint(1, self.profiles_per_user)):
+                name = username if number == 0 else f'{username} {number}'
+                profiles.append(Profile(
+                    id=profile_id, name=name, slug=self._slug(name), user_id=user_id, used=number == 0))
+                profile_ids.append(profile_id)
+                profile_id += 1
+            self._add(Profile, profiles)
+            user_id += 1
+            self._flush()
+
+        self._flush(force=True)
+        return profile_ids
+
+    def _create_follows(self, profile_ids):
+        self.log('Подписки')
+        # Популярность не связана с id: ранги раздаются профилям в случайном порядке
+        by_popularity = profile_ids[:]
+        self.rng.shuffle(by_popularity)
+        weights = _popularity(len(by_popularity))
+
+        for sender_id in profile_ids:
+            count = min(self.rng.randint(0, 2 * self.follows), len(profile_ids) - 1)
+            recipient_ids = set(self.rng.choices(by_popularity, cum_weights=weights, k=count)) - {sender_id}
+            self._add(Follower, [
+                Follower(sender_id=sender_id, recipient_id=recipient_id) for recipient_id in sorted(recipient_ids)
+            ])
+            self._flush()
+        self._flush(force=True)
+
+        first_id, last_id = profile_ids[0], profile_ids[-1]
+        followers = Follower.objects.filter(recipient=OuterRef('pk')).order_by().values('recipient').annotate(
+            count=Count('pk')).values('count')
+        for start in range(first_id, last_id + 1, self.batch_size):
+            Profile.objects.filter(pk__range=(start, min(start + self.batch_size - 1, last_id))).update(
+                followers_count=Coalesce(Subquery(followers), 0))
+
+    def _create_tags(self) -> list:
+        slugs = [f'topic{number}' for number in range(self.tags)]
+        existing = Tag.objects.in_bulk(slugs, field_name='slug')
+        Tag.objects.bulk_create(
+            [Tag(title=slug, slug=slug) for slug in slugs if slug not in existing], batch_size=self.batch_size)
+        tags = Tag.objects.in_bulk(slugs, field_name='slug')
+        return [tags[slug].pk for slug in slugs]
+
+    def _reactions(self, content_type, object_id, count, profile_ids) -> tuple:
+        """Реакции разных профилей на объект, возвращает количество лайков и дизлайков"""
+        reactions = [
+            PostReaction(
+                profile_id=profile_ids[index], content_type=content_type, object_id=object_id,
+                reaction=PostReaction.LIKE if self.rng.random() < LIKE_SHARE else PostReaction.DISLIKE
+            )
+            for index in self.rng.sample(range(len(profile_ids)), min(count, len(profile_ids)))
+        ]
+        self._add(PostReaction, reactions)
+        likes = sum(reaction.reaction == PostReaction.LIKE for reaction in reactions)
+        return likes, len(reactions) - likes
+
+    def _create_posts(self, profile_ids, tag_ids):
+        self.log('Посты, комментарии и реакции')
+        post_type = ContentType.objects.get_for_model(Post)
+        comment_type = ContentType.objects.get_for_model(Comment)
+        tag_weights = _popularity(len(tag_ids))
+        post_id, comment_id, tree_id = _next_id(Post), _next_id(Comment), _next_id(Comment, 'tree_id')
+
+        for author_id in profile_ids:
+            for _ in range(self.rng.randint(0, 2 * self.posts)):
+                likes, dislikes = self._reactions(
+                    post_type, post_id, self.rng.randint(0, 2 * self.reactions), profile_ids)
+                post = Post(
+                    id=post_id, title=f'Post {post_id}', caption=f'Seeded post {post_id} by profile {author_id}',
+                    author_id=author_id, archived=self.rng.random() < ARCHIVED_SHARE,
+                    likes_count=likes, dislikes_count=dislikes
+                )
+                self._add(Post, [post])
+
+                tags = set(self.rng.choices(tag_ids, cum_weights=tag_weights, k=self.rng.randint(0, MAX_POST_TAGS)))
+                self._add(Post.tags.through, [Post.tags.through(post_id=post_id, tag_id=tag_id) for tag_id in tags])
+
+                ids = list(range(comment_id, comment_id + self.rng.randint(0, 2 * self.comments)))
+                parents = {}
+                for position, new_id in enumerate(ids):
+                    reply = position and self.rng.random() < REPLY_SHARE
+                    parents[new_id] = ids[self.rng.randrange(position)] if reply else None
+                fields = tree_fields(ids, parents, tree_id)
+
+                comments = []
+                for new_id in ids:
+                    likes, dislikes = self._reactions(
+                        comment_type, new_id, self.rng.randint(0, 2 * self.comment_reactions), profile_ids)
+                    comments.append(Comment(
+                        id=new_id, post_id=post_id, profile_id=self.rng.choice(profile_ids), text=f'Comment {new_id}',
+                        parent_id=parents[new_id], likes_count=likes, dislikes_count=dislikes, **fields[new_id]
+                    ))
+                self._add(Comment, comments)
+
+                post_id += 1
+                comment_id += len(ids)
+                tree_id += sum(parent is None for parent in parents.values())
+                self._flush()
+
+        self._flush(force=True)
+
+    def _reset_sequences(self):
+        """Счетчики id после вставки с явными id, для SQLite не требуется"""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Profile, Follower, Tag, Post, Comment, PostReaction, TimelineEntry])
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
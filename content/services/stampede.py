@@ -0,0 +1,121 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from content.services.db_routing import primary_reads
+
+LOCK_KEY = '{key}:lock'
+WAIT_INTERVAL = 0.05
+
+
+def _should_refresh(expires, compute_seconds, now) -> bool:
+    """Вероятностное досрочное истечение (XFetch): чем дольше пересчет и ближе срок, тем вероятнее обновление
+
+    Обновление начинает один из запросов незадолго до срока, а не все запросы сразу после него.
+    """
+    early = -compute_seconds * settings.CACHE_EARLY_EXPIRY_BETA * math.log(1 - random.random())
+    return now + early >= expires
+
+
+def _acquire(key) -> bool:
+    return cache.add(LOCK_KEY.format(key=key), 1, settings.CACHE_LOCK_TIMEOUT)
+
+
+def _release(key):
+    cache.delete(LOCK_KEY.format(key=key))
+
+
+def _entry(value, timeout, compute_seconds) -> tuple:
+    return value, time.time() + timeout, compute_seconds
+
+
+def _store(key, compute, timeout):
+    started = time.monotonic()
+    with primary_reads():
+        value = compute()
+    # Запись живет дольше срока, чтобы во время пересчета отдавать устаревшее значение
+    cache.set(key, _entry(value, timeout, time.monotonic() - started), timeout + settings.CACHE_STALE_TIMEOUT)
+    return value
+
+
+def get_or_compute(key, compute, timeout):
+    """Значение из кеша с пересчетом compute одним процессом
+
+    Истекшее или досрочно истекающее значение пересчитывает только владелец блокировки, остальные
+    получают прежнее значение. При промахе остальные ждут результата владельца до CACHE_LOCK_TIMEOUT
+    и только потом считают сами. compute читает из основной бд, чтобы общий кеш не заполнялся
+    отстающими данными реплики.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, compute_seconds = entry
+        if not _should_refresh(expires, compute_seconds, time.time()) or not _acquire(key):
+            return value
+        try:
+            return _store(key, compute, timeout)
+        finally:
+            _release(key)
+
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while True:
+        if _acquire(key):
+            try:
+                # Значение могло появиться между промахом и захватом блокировки
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry[0]
+                return _store(key, compute, timeout)
+            finally:
+                _release(key)
+
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if time.monotonic() >= deadline:
+            # Владелец блокировки не успел, значение считается без ожидания
+            return _store(key, compute, timeout)
+
+
+def get_many_or_compute(keys, compute, timeout) -> dict:
+    """Значения для {id: ключ кеша} одним обращением, compute(ids) -> {id: значение} считает недостающие
+
+    Отсутствующие значения считаются сразу без ожидания: так получаются дешевые фрагменты списков,
+    например карточки постов. Истекающие пересчитывает только владелец блокировки ключа.
+    """
+    entries = cache.get_many(list(keys.values()))
+    now = time.time()
+
+    values, missing, refreshing = {}, [], []
+    for item_id, key in keys.items():
+        entry = entries.get(key)
+        if entry is None:
+            missing.append(item_id)
+            continue
+        value, expires, compute_seconds = entry
+        values[item_id] = value
+        if _should_refresh(expires, compute_seconds, now) and _acquire(key):
+            refreshing.append(item_id)
+
+    to_compute = missing + refreshing
+    if not to_compute:
+        return values
+
+    try:
+        started = time.monotonic()
+        with primary_reads():
+            computed = compute(to_compute)
+        compute_seconds = (time.monotonic() - started) / len(to_compute)
+        cache.set_many(
+            {keys[item_id]: _entry(value, timeout, compute_seconds) for item_id, value in computed.items()},
+            timeout + settings.CACHE_STALE_TIMEOUT
+        )
+    finally:
+        for item_id in refreshing:
+            _release(keys[item_id])
+
+    values.update(computed)
+    return values
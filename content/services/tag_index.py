@@ -0,0 +1,134 @@
+import heapq
+import random
+import threading
+from array import array
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+
+from content.models import Post
+
+TAG_INDEX_VERSION_KEY = 'content:tag_index:version'
+
+
+class TagPostingIndex:
+    """Индекс тегов в памяти: slug тега -> отсортированный массив id неархивных постов
+
+    Индекс строится при первом обращении и дальше обновляется по сигналам.
+    Номер версии в общем кеше позволяет другим процессам заметить изменения и перестроить свой индекс,
+    поэтому при запуске в несколько процессов кеш должен быть общим (проверка content.W001).
+    Изменение в другом процессе перестраивает индекс целиком при следующем обращении.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._lock = threading.RLock()
+        self._version = None
+
+    def _load(self):
+        postings = {}
+        rows = Post.tags.through.objects.filter(
+            post__archived=False
+        ).order_by('tag__slug', 'post_id').values_list('tag__slug', 'post_id')
+        for slug, post_id in rows.iterator():
+            postings.setdefault(slug, array('q')).append(post_id)
+
+        self._postings = postings
+
+    def _ensure_fresh(self):
+        version = cache.get(TAG_INDEX_VERSION_KEY)
+        if version is None:
+            # Случайное начальное значение, чтобы после очистки кеша версия не совпала со старой
+            cache.add(TAG_INDEX_VERSION_KEY, random.getrandbits(32), None)
+            version = cache.get(TAG_INDEX_VERSION_KEY)
+        if self._version != version:
+            self._load()
+            self._version = version
+
+    def _changed(self):
+        """Увеличение общей версии, свой индекс остается актуальным, если никто не менял его параллельно"""
+        try:
+            version = cache.incr(TAG_INDEX_VERSION_KEY)
+        except ValueError:
+            self._version = None
+            return
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+        else:
+            self._version = None
+
+    def posts(self, slug) -> array:
+        """Отсортированные id постов с тегом"""
+        with self._lock:
+            self._ensure_fresh()
+            return array('q', self._postings.get(slug, ()))
+
+    def intersection(self, slugs) -> list:
+        """id постов, у которых есть все теги (AND)"""
+        with self._lock:
+            self._ensure_fresh()
+            lists = sorted((self._postings.get(slug, array('q')) for slug in set(slugs)), key=len)
+            if not lists:
+                return []
+
+            result = list(lists[0])
+            for posting in lists[1:]:
+                # Поиск каждого id меньшего списка двоичным поиском в большем, начиная с прошлой позиции
+                matched, position = [], 0
+                for post_id in result:
+                    position = bisect_left(posting, post_id, position)
+                    if position == len(posting):
+                        break
+                    if posting[position] == post_id:
+                        matched.append(post_id)
+                result = matched
+                if not result:
+                    break
+
+            return result
+
+    def union(self, slugs) -> list:
+        """id постов, у которых есть хотя бы один из тегов (OR)"""
+        with self._lock:
+            self._ensure_fresh()
+            result = []
+            for post_id in heapq.merge(*(self._postings.get(slug, ()) for slug in set(slugs))):
+                if not result or result[-1] != post_id:
+                    result.append(post_id)
+            return result
+
+    def add(self, post_id, slugs):
+        """Добавление поста в списки тегов"""
+        with self._lock:
+            self._ensure_fresh()
+            for slug in slugs:
+                posting = self._postings.setdefault(slug, array('q'))
+                position = bisect_left(posting, post_id)
+                if position == len(posting) or posting[position] != post_id:
+                    insort(posting, post_id)
+            self._changed()
+
+    def remove(self, post_id, slugs=None):
+        """Удаление поста из списков тегов, без slugs - из всех списков"""
+        with self._lock:
+            self._ensure_fresh()
+            for slug in (self._postings.keys() if slugs is None else slugs):
+                posting = self._postings.get(slug)
+                if posting is None:
+                    continue
+                position = bisect_left(posting, post_id)
+                if position < len(posting) and posting[position] == post_id:
+                    del posting[position]
+            self._changed()
+
+    def reset(self):
+        """Перестроение индекса при следующем обращении во всех процессах"""
+        with self._lock:
+            self._version = None
+            try:
+                cache.incr(TAG_INDEX_VERSION_KEY)
+            except ValueError:
+                pass
+
+
+tag_index = TagPostingIndex()
@@ -0,0 +1,159 @@
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Q
+
+from content.models import Post, TimelineEntry
+from content.services.pagination import Cursor, KeysetPage, PREVIOUS, keyset_filter, make_page
+from followers.models import Follower
+from profiles.models import Profile
+
+BATCH_SIZE = 1000
+
+
+def _is_pull_author(profile_id) -> bool:
+    """Проверка того, что посты профиля не раскладываются по лентам, а достаются при чтении
+
+    Профиль, у которого подписчиков стало больше TIMELINE_FANOUT_LIMIT, отмечается timeline_pull
+    и остается отмеченным после отписок: его посты, не попавшие в ленты, по-прежнему достаются
+    при чтении. Отметку снимает rebuild_timelines, раскладывая посты по лентам.
+    """
+    followers_count, pull = Profile.objects.filter(pk=profile_id).values_list(
+        'followers_count', 'timeline_pull').first() or (0, False)
+    if not pull and followers_count > settings.TIMELINE_FANOUT_LIMIT:
+        Profile.objects.filter(pk=profile_id).update(timeline_pull=True)
+        pull = True
+    return pull
+
+
+def _timeline_owner_ids(post) -> set:
+    """Профили, в лентах которых должен находиться пост"""
+    owner_ids = {post.author_id}
+
+    if not post.archived and not _is_pull_author(post.author_id):
+        owner_ids.update(Follower.objects.filter(recipient_id=post.author_id).values_list('sender_id', flat=True))
+
+    return owner_ids
+
+
+def sync_post_timeline(post, created=False):
+    """Добавление поста в ленты автора и подписчиков и удаление из лишних лент"""
+    owner_ids = _timeline_owner_ids(post)
+
+    if created:
+        existing_ids = set()
+    else:
+        existing_ids = set(TimelineEntry.objects.filter(post=post).values_list('owner_id', flat=True))
+        stale_ids = existing_ids - owner_ids
+        if stale_ids:
+            TimelineEntry.objects.filter(post=post, owner_id__in=stale_ids).delete()
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(owner_id=owner_id, post=post, publication_date=post.publication_date)
+            for owner_id in owner_ids - existing_ids
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def add_follow_to_timeline(sender_id, recipient_id):
+    """Добавление постов адресата в ленту нового подписчика"""
+    if sender_id == recipient_id or _is_pull_author(recipient_id):
+        return
+
+    posts = Post.objects.filter(author_id=recipient_id, archived=False).values_list('id', 'publication_date')
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(owner_id=sender_id, post_id=post_id, publication_date=publication_date)
+            for post_id, publication_date in posts.iterator()
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def remove_follow_from_timeline(sender_id, recipient_id):
+    """Удаление постов адресата из ленты бывшего подписчика"""
+    if sender_id == recipient_id:
+        return
+    # Подписка могла быть продублирована, тогда посты остаются в ленте
+    if Follower.objects.filter(sender_id=sender_id, recipient_id=recipient_id).exists():
+        return
+
+    TimelineEntry.objects.filter(owner_id=sender_id, post__author_id=recipient_id).delete()
+
+
+def rebuild_timelines(batch_size=BATCH_SIZE) -> int:
+    """Полное перестроение лент всех профилей, возвращает количество созданных записей"""
+    TimelineEntry.objects.all().delete()
+    created = 0
+
+    popular = Q(followers_count__gt=settings.TIMELINE_FANOUT_LIMIT)
+    Profile.objects.filter(popular).update(timeline_pull=True)
+    Profile.objects.exclude(popular).update(timeline_pull=False)
+
+    for author_id, pull in Profile.objects.values_list('id', 'timeline_pull').iterator():
+        follower_ids = []
+        if not pull:
+            follower_ids = list(
+                Follower.objects.filter(recipient_id=author_id).exclude(sender_id=author_id).values_list(
+                    'sender_id', flat=True).distinct()
+            )
+
+        entries = []
+        posts = Post.objects.filter(author_id=author_id).values_list('id', 'publication_date', 'archived')
+        for post_id, publication_date, archived in posts.iterator():
+            owner_ids = [author_id] if archived else [author_id, *follower_ids]
+            entries.extend(
+                TimelineEntry(owner_id=owner_id, post_id=post_id, publication_date=publication_date)
+                for owner_id in owner_ids
+            )
+            if len(entries) >= batch_size:
+                TimelineEntry.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+                created += len(entries)
+                entries = []
+
+        TimelineEntry.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+        created += len(entries)
+
+    return created
+
+
+def get_feed_keys(profile, cursor: Optional[Cursor] = None, page_size=None) -> KeysetPage:
+    """Страница ленты из пар (дата публикации, id поста) без загрузки самих постов"""
+    page_size = page_size or settings.POSTS_PAGE_SIZE
+
+    entries = keyset_filter(
+        TimelineEntry.objects.filter(owner=profile), cursor, pk_field='post_id'
+    ).values_list('publication_date', 'post_id')
+    keys = set(entries[:page_size + 1])
+
+    # Посты авторов с большим числом подписчиков не раскладываются по лентам и достаются при чтении
+    pull_author_ids = list(
+        Follower.objects.filter(
+            sender=profile,
+            recipient__timeline_pull=True
+        ).values_list('recipient_id', flat=True)
+    )
+    if pull_author_ids:
+        pulled = keyset_filter(
+            Post.objects.filter(author_id__in=pull_author_ids, archived=False), cursor
+        ).values_list('publication_date', 'id')
+        keys.update(pulled[:page_size + 1])
+
+    backwards = cursor is not None and cursor.direction == PREVIOUS
+    return make_page(sorted(keys, reverse=not backwards)[:page_size + 1], cursor, page_size, key=lambda row: row)
+
+
+def get_feed(profile, cursor: Optional[Cursor] = None, page_size=None) -> KeysetPage:
+    """Страница ленты: записи ленты профиля и посты популярных авторов, на которых он подписан"""
+    page = get_feed_keys(profile, cursor, page_size)
+    post_ids = [post_id for _, post_id in page.object_list]
+
+    posts = Post.objects.filter(pk__in=post_ids).select_related('author')
+    posts_by_id = {post.pk: post for post in posts}
+    page.object_list = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+
+    return page
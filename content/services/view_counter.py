@@ -0,0 +1,94 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F, Case, When, Value
+
+from content.models import Post
+from content.services.invalidation import POST, invalidate
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+
+class ViewCounterBuffer:
+    """Буфер просмотров постов, периодически записываемый в бд пакетным UPDATE"""
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = None
+
+    def add(self, post_id) -> int:
+        """Учет просмотра поста, возвращает количество просмотров, еще не попавших в бд до этого вызова"""
+        with self._lock:
+            self._pending[post_id] += 1
+            pending = self._pending[post_id]
+
+        interval = settings.VIEW_COUNTER_FLUSH_INTERVAL
+        if interval <= 0:
+            # Буферизация отключена, просмотр сразу записывается в бд
+            self.flush()
+        else:
+            self._start_flusher(interval)
+
+        return pending
+
+    def pending(self, post_id) -> int:
+        """Количество просмотров поста, ожидающих записи в бд"""
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def flush(self) -> int:
+        """Запись накопленных просмотров в бд, возвращает количество обновленных постов"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+
+        items = list(pending.items())
+        for start in range(0, len(items), FLUSH_BATCH_SIZE):
+            batch = items[start:start + FLUSH_BATCH_SIZE]
+            try:
+                Post.objects.filter(pk__in=[post_id for post_id, _ in batch]).update(
+                    views=F('views') + Case(*[When(pk=post_id, then=Value(n)) for post_id, n in batch], default=0)
+                )
+            except DatabaseError:
+                logger.exception('Не удалось записать просмотры постов, запись будет повторена')
+                with self._lock:
+                    self._pending.update(dict(items[start:]))
+                return start
+
+            # В карточках постов показывается количество просмотров
+            invalidate(*[(POST, post_id) for post_id, _ in batch])
+
+        return len(items)
+
+    def clear(self):
+        """Сброс накопленных просмотров без записи в бд"""
+        with self._lock:
+            self._pending.clear()
+
+    def stop(self):
+        """Остановка фоновой записи и запись оставшихся просмотров"""
+        self._stopped.set()
+        self.flush()
+
+    def _start_flusher(self, interval):
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._run, args=(interval,), name='view-counter-flusher', daemon=True)
+            self._flusher.start()
+
+    def _run(self, interval):
+        while not self._stopped.wait(interval):
+            self.flush()
+
+
+view_counter = ViewCounterBuffer()
+atexit.register(view_counter.stop)
@@ -1,49 +1,109 @@
+from django.db import connection, transaction
+from django.http import Http404
+from django.utils.text import slugify
+
 from content.models import Tag, PostReaction
+from content.services.counter_services import REACTION_COUNTERS
+from content.services.invalidation import invalidate, reaction_dependencies
 
 
 def add_new_tag(tag_form: str, author: str) -> list:
     """Создание новых тегов из строки введенной пользователем"""
-    tag_objs = []
     tag_list = list(tag_form.replace(" ", "").split('#'))
-    tag_list = [tag for tag in tag_list if len(tag) > 0]
+    # Повторяющиеся теги убираются с сохранением порядка
+    tag_list = list(dict.fromkeys(tag for tag in tag_list if len(tag) > 0))
+    if not tag_list:
+        return []
+
+    # Существующие теги достаются одним запросом, недостающие создаются одним запросом
+    tags = {tag.title: tag for tag in Tag.objects.filter(title__in=tag_list)}
+    missing = [title for title in tag_list if title not in tags]
+    if missing:
+        # Теги без букв и цифр, например из одних знаков препинания, не создаются: у них пустой slug
+        slugs = {title: slug for title in missing if (slug := slugify(title, allow_unicode=True))}
+        Tag.objects.bulk_create(
+            [Tag(title=title, slug=slug, author=author) for title, slug in slugs.items()],
+            ignore_conflicts=True
+        )
+        # Если тег с таким же slug уже есть под другим названием, используется он
+        tags_by_slug = {tag.slug: tag for tag in Tag.objects.filter(slug__in=slugs.values())}
+        tags.update({title: tags_by_slug[slug] for title, slug in slugs.items() if slug in tags_by_slug})
+
+    return [tags[title] for title in tag_list if title in tags]
+
+
+def _delete_reaction(profile_id, content_type_id, object_id):
+    """Удаление реакции профиля на объект одним запросом, возвращает удаленное значение или None"""
+    table = connection.ops.quote_name(PostReaction._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE profile_id = %s AND content_type_id = %s AND object_id = %s '
+            f'RETURNING reaction',
+            [profile_id, content_type_id, object_id]
+        )
+        row = cursor.fetchone()
+    return row and row[0]
+
 
-    for tag in tag_list:
-        t, created = Tag.objects.get_or_create(title=tag)
-        if created:
-            t.author = author
-            t.save(update_fields=['author'])
-        tag_objs.append(t)
+def _upsert_reaction(profile_id, content_type_id, object_id, reaction):
+    """Запись реакции одним запросом; реакцию, вставленную параллельным запросом, заменяет эта"""
+    table = connection.ops.quote_name(PostReaction._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (profile_id, content_type_id, object_id, reaction) VALUES (%s, %s, %s, %s) '
+            f'ON CONFLICT (profile_id, content_type_id, object_id) DO UPDATE SET reaction = excluded.reaction',
+            [profile_id, content_type_id, object_id, reaction]
+        )
 
-    return tag_objs
 
+def _change_reaction_counters(model, object_id, deltas) -> tuple:
+    """Изменение счетчиков реакций объекта на deltas {реакция: +-1} одним запросом, возвращает новые счетчики
 
-def _get_reaction(profile, content_type, object_id,):
-    """Достаем реакцию из бд если она есть"""
-    try:
-        post_reaction = PostReaction.objects.get(profile=profile, content_type=content_type, object_id=object_id)
-    except PostReaction.DoesNotExist:
-        post_reaction = None
+    Счетчик не уходит ниже нуля, если он отстал от таблицы реакций.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    assignments, params = [], []
+    for reaction, field in REACTION_COUNTERS.items():
+        column = connection.ops.quote_name(field)
+        delta = deltas.get(reaction, 0)
+        assignments.append(f'{column} = CASE WHEN {column} + %s < 0 THEN 0 ELSE {column} + %s END')
+        params.extend([delta, delta])
+    columns = ', '.join(connection.ops.quote_name(field) for field in REACTION_COUNTERS.values())
 
-    return post_reaction
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET {", ".join(assignments)} WHERE id = %s RETURNING {columns}',
+            params + [object_id]
+        )
+        return cursor.fetchone() or (0, 0)
 
 
-def add_remove_reaction(profile, content_type, object_id, reaction):
-    """Обрабатываем реакцию пользователя"""
-    post_reaction = _get_reaction(profile, content_type, object_id)
+def add_remove_reaction(profile, content_type, object_id, reaction) -> dict:
+    """Переключение реакции пользователя, возвращает новую реакцию и счетчики объекта
 
-    # Если нет реакции, то создаем ее
-    if not post_reaction:
-        if reaction == 1:
-            PostReaction.objects.create(
-                profile=profile, content_type=content_type, object_id=object_id, reaction=reaction)
+    Прежняя реакция удаляется запросом, который возвращает ее значение: если она совпадает
+    с переданной, пользователь ее убирает, иначе записывается новая. Счетчики меняются и читаются
+    одним запросом, поэтому новая реакция - это три запроса без предварительного чтения.
+    """
+    if reaction not in REACTION_COUNTERS:
+        raise Http404
+
+    model = content_type.model_class()
+
+    with transaction.atomic():
+        old_reaction = _delete_reaction(profile.pk, content_type.pk, object_id)
+        deltas = {old_reaction: -1}
+        if old_reaction == reaction:
+            new_reaction = None
         else:
-            PostReaction.objects.create(
-                profile=profile, content_type=content_type, object_id=object_id, reaction=reaction)
-    # Если есть реакция и пользователь хочет ее изменить
-    elif post_reaction and post_reaction.reaction != reaction:
-        PostReaction.objects.filter(
-            profile=profile, content_type=content_type, object_id=object_id).update(reaction=reaction)
-    # Если Есть реакция и пользователь хочет ее убрать
-    else:
-        PostReaction.objects.get(
-            profile=profile, content_type=content_type, object_id=object_id, reaction=reaction).delete()
+            new_reaction = reaction
+            _upsert_reaction(profile.pk, content_type.pk, object_id, reaction)
+            # Неизвестное прежнее значение не учтено в счетчиках и не уменьшает их
+            deltas[reaction] = 1
+
+        likes, dislikes = _change_reaction_counters(model, object_id, deltas)
+
+        # Запросы выше идут мимо сигналов моделей, поэтому закешированные счетчики сбрасываются здесь
+        invalidate(*reaction_dependencies(model, object_id))
+
+    return {'reaction': new_reaction, 'likes': likes, 'dislikes': dislikes}
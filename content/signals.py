@@ -0,0 +1,172 @@
+from functools import partial
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from followers.models import Follower
+from profiles.models import Profile
+from .models import Post, Tag, Comment, PostReaction
+from .services import invalidation
+from .services.image_services import track_image
+from .services.invalidation import POST, PROFILE, COMMENTS, FOLLOWS
+from .services.media_services import track_file
+from .services.search_services import index_post, remove_post
+from .services.tag_index import tag_index
+from .services.timeline_services import sync_post_timeline, add_follow_to_timeline, remove_follow_from_timeline
+
+
+@receiver(post_save, sender=Post)
+def update_post_timeline(sender, instance, created, update_fields, **kwargs):
+    """Обновление лент при публикации, архивации или смене автора поста"""
+    if created or not update_fields or {'archived', 'author'} & set(update_fields):
+        sync_post_timeline(instance, created)
+
+
+@receiver(post_save, sender=Follower)
+def add_posts_to_follower_timeline(sender, instance, created, **kwargs):
+    """Добавление постов в ленту при подписке"""
+    if created:
+        add_follow_to_timeline(instance.sender_id, instance.recipient_id)
+
+
+@receiver(post_delete, sender=Follower)
+def remove_posts_from_follower_timeline(sender, instance, **kwargs):
+    """Удаление постов из ленты при отписке"""
+    remove_follow_from_timeline(instance.sender_id, instance.recipient_id)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_index_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Обновление индекса тегов при добавлении и удалении тегов поста"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        # instance - пост, pk_set - id тегов
+        if action == 'pre_clear':
+            slugs = list(instance.tags.values_list('slug', flat=True))
+        else:
+            slugs = list(Tag.objects.filter(pk__in=pk_set).values_list('slug', flat=True))
+        changes = [(instance.pk, slugs, instance.archived)]
+    else:
+        # instance - тег, pk_set - id постов
+        posts = instance.tags.all() if action == 'pre_clear' else Post.objects.filter(pk__in=pk_set)
+        changes = [(post_id, [instance.slug], archived) for post_id, archived in posts.values_list('id', 'archived')]
+
+    for post_id, slugs, archived in changes:
+        if action == 'post_add':
+            if not archived:
+                transaction.on_commit(partial(tag_index.add, post_id, slugs))
+        else:
+            transaction.on_commit(partial(tag_index.remove, post_id, slugs))
+
+
+@receiver(post_save, sender=Post)
+def update_tag_index_on_archive(sender, instance, created, update_fields, **kwargs):
+    """Архивные посты убираются из индекса тегов, возвращенные из архива - добавляются"""
+    if created or (update_fields and 'archived' not in update_fields):
+        return
+
+    slugs = list(instance.tags.values_list('slug', flat=True))
+    if instance.archived:
+        transaction.on_commit(partial(tag_index.remove, instance.pk, slugs))
+    else:
+        transaction.on_commit(partial(tag_index.add, instance.pk, slugs))
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_tag_index(sender, instance, **kwargs):
+    """Удаление поста из индекса тегов"""
+    transaction.on_commit(partial(tag_index.remove, instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reset_tag_index(sender, instance, created=False, **kwargs):
+    """Перестроение индекса при изменении slug или удалении тега"""
+    if not created:
+        transaction.on_commit(tag_index.reset)
+
+
+@receiver(post_save, sender=Post)
+def update_post_search(sender, instance, **kwargs):
+    """Обновление поста в поисковом индексе, в том числе при архивации"""
+    transaction.on_commit(partial(index_post, instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_search(sender, instance, **kwargs):
+    """Удаление поста из поискового индекса"""
+    transaction.on_commit(partial(remove_post, instance.pk))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_post_search_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Обновление названий тегов поста в поисковом индексе"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    # Индекс обновляется после коммита, когда очистка тегов уже выполнена
+    for post_id in _tagged_post_ids(instance, reverse, pk_set):
+        transaction.on_commit(partial(index_post, post_id))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def update_post_search_on_tag_change(sender, instance, created=False, **kwargs):
+    """Обновление постов с тегом в поисковом индексе при переименовании или удалении тега"""
+    if created:
+        return
+
+    for post_id in instance.tags.values_list('id', flat=True):
+        transaction.on_commit(partial(index_post, post_id))
+
+
+def _tagged_post_ids(instance, reverse, pk_set) -> list:
+    """id постов, у которых меняются теги; pk_set - None при очистке связи"""
+    if not reverse:
+        return [instance.pk]
+    if pk_set is None:
+        return list(instance.tags.values_list('id', flat=True))
+    return list(pk_set)
+
+
+# Зависимости закешированных фрагментов и ETag страниц от моделей: версии меняются после коммита,
+# в пределах запроса - один раз для всех изменений (invalidation.batch в InvalidationBatchMiddleware)
+
+invalidation.track(Post, lambda post: [(POST, post.pk)])
+
+# Названия тегов показываются в карточках; при удалении связи с постами читаются до их удаления
+invalidation.track(
+    Tag, lambda tag: [(POST, post_id) for post_id in tag.tags.values_list('id', flat=True)], delete_signal=pre_delete
+)
+invalidation.track_m2m(
+    Post.tags.through,
+    lambda instance, reverse, pk_set: [(POST, post_id) for post_id in _tagged_post_ids(instance, reverse, pk_set)]
+)
+
+# В карточке поста показывается количество комментариев
+invalidation.track(Comment, lambda comment: [(COMMENTS, comment.post_id), (POST, comment.post_id)])
+
+# Реакции из представлений пишутся SQL-запросами без сигналов и сбрасываются в add_remove_reaction,
+# здесь - изменения через ORM и админку
+invalidation.track(
+    PostReaction,
+    lambda reaction: invalidation.reaction_dependencies(
+        ContentType.objects.get_for_id(reaction.content_type_id).model_class(), reaction.object_id
+    )
+)
+
+invalidation.track(Follower, lambda follower: [(FOLLOWS, follower.sender_id)])
+
+# Имя и аватар автора в карточках его постов
+invalidation.track(Profile, lambda profile: [(PROFILE, profile.pk)])
+
+
+# Размеры и уменьшенные варианты загруженных изображений создаются фоновой задачей после коммита
+track_image(Post, 'picture', POST)
+
+# Файлы хранятся по хешу содержимого и удаляются, когда на них не остается ссылок
+track_file(Post, 'picture')
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import posixpath
+import re
+from functools import partial
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+from content.models import StoredFile
+
+# Файлы хранятся по хешу содержимого: cas/ab/cd/abcd...ef.jpg. Каталог из upload_to полей не используется,
+# поэтому одинаковые загрузки разных профилей - один файл, а переименование профиля не меняет пути
+CONTENT_ADDRESSED_ROOT = 'cas'
+CONTENT_ADDRESSED_NAME = re.compile(rf'^{CONTENT_ADDRESSED_ROOT}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(\.|$)')
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def is_content_addressed(name) -> bool:
+    """Имя файла по хешу содержимого, включая производные файлы вида <хеш>.<суффикс>"""
+    return bool(CONTENT_ADDRESSED_NAME.match(name or ''))
+
+
+def hash_file(content) -> str:
+    """sha256 содержимого File, файл читается кусками и не загружается в память целиком"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище медиафайлов с именами по хешу содержимого и подсчетом ссылок
+
+    Одинаковое содержимое сохраняется один раз, каждое сохранение добавляет ссылку в StoredFile,
+    release убирает ее, а файл без ссылок удаляется вместе с производными файлами (вариантами изображений).
+    Содержимое файла по имени никогда не меняется, поэтому его можно кешировать навсегда.
+    """
+
+    def content_name(self, name, content) -> str:
+        digest = hash_file(content)
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(CONTENT_ADDRESSED_ROOT, digest[:2], digest[2:4], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.content_name(name, content)
+        # Файл мог быть сохранен раньше, тогда добавляется только ссылка
+        self._save_once(name, content)
+
+        # Строка создается без ссылок, если ее нет: параллельная первая загрузка того же файла
+        # не получит ошибку уникальности, а ссылку каждая загрузка добавляет одним UPDATE
+        StoredFile.objects.bulk_create(
+            [StoredFile(name=name, size=content.size, references=0)], ignore_conflicts=True)
+        StoredFile.objects.filter(name=name).update(references=F('references') + 1)
+
+        return name
+
+    def save_derived(self, name, content) -> str:
+        """Сохранение производного файла под точным именем, существующий файл не перезаписывается"""
+        self._save_once(name, content)
+        return name
+
+    def _save_once(self, name, content):
+        if self.exists(name):
+            return
+        try:
+            self._save(name, content)
+        except FileExistsError:
+            # Тот же файл параллельно записал другой процесс
+            pass
+
+    def get_available_name(self, name, max_length=None):
+        # Имя по хешу однозначно определяет содержимое: занятое имя значит, что файл уже записан
+        if self.exists(name):
+            raise FileExistsError(name)
+        return name
+
+    def release(self, name) -> bool:
+        """Удаление ссылки на файл, возвращает True, если ссылок не осталось
+
+        Сам файл удаляется после коммита, если за это время на него не появилась новая ссылка.
+        """
+        if not is_content_addressed(name):
+            return False
+
+        StoredFile.objects.filter(name=name).update(references=F('references') - 1)
+        deleted, _ = StoredFile.objects.filter(name=name, references__lte=0).delete()
+        if deleted:
+            transaction.on_commit(partial(self._delete_unreferenced, name))
+        return bool(deleted)
+
+    def _delete_unreferenced(self, name):
+        if not StoredFile.objects.filter(name=name).exists():
+            self.delete_with_derived(name)
+
+    def delete_with_derived(self, name):
+        """Удаление файла и всех производных файлов <хеш>.*"""
+        directory, filename = posixpath.split(name)
+        digest = filename.split('.', 1)[0]
+        try:
+            _, files = self.listdir(directory)
+        except FileNotFoundError:
+            return
+        for file in files:
+            if file.split('.', 1)[0] == digest:
+                self.delete(posixpath.join(directory, file))
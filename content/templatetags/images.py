@@ -0,0 +1,28 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from content.services.image_services import image_sources
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', css_class='', style='', alt=''):
+    """<picture> с вариантами изображения в srcset, размерами и ленивой загрузкой
+
+    Если вариантов еще нет, выводится оригинал; размер на странице задается через style.
+    """
+    sources = image_sources(image)
+    if sources is None:
+        return format_html(
+            '<img src="{}" class="{}" style="{}" alt="{}" loading="lazy" decoding="async">',
+            image.url, css_class, style, alt
+        )
+
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" class="{}" style="{}" alt="{}" '
+        'loading="lazy" decoding="async"></picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">',
+                         ((mime_type, srcset, sizes) for mime_type, srcset in sources['sources'])),
+        sources['src'], sources['srcset'], sizes, sources['width'], sources['height'], css_class, style, alt
+    )
@@ -0,0 +1,45 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+from content.models import Post
+from profiles.models import Profile
+
+
+def create_profiles(count=1) -> list:
+    """Пользователи test_user1, test_user2... и их профили, которые создаются вместе с пользователем"""
+    users = [User.objects.create_user(username=f'test_user{number}', password='password')
+             for number in range(1, count + 1)]
+    return [Profile.objects.get(user=user) for user in users]
+
+
+def create_posts(author, count=1, title='post') -> list:
+    """Посты автора с заголовками title0, title1... в порядке создания"""
+    return [
+        Post.objects.create(title=f'{title}{number}', caption=f'About {title}', author=author)
+        for number in range(count)
+    ]
+
+
+def image_upload(width, height, name='photo.png'):
+    """Загруженное изображение PNG с прозрачностью"""
+    content = BytesIO()
+    Image.new('RGBA', (width, height), (200, 10, 10, 128)).save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), content_type='image/png')
+
+
+class TemporaryMediaMixin:
+    """Медиафайлы теста во временном каталоге, который удаляется после теста"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
@@ -0,0 +1,207 @@
+"""Проверка количества SQL-запросов страниц на наборах данных разного размера
+
+Тестовый класс приложения подключает QueryBudgetMixin, указывает модуль urls и бюджет для каждого
+его URL. Каждая страница запрашивается с пустым кешем на наборах данных из DATASET_SIZES: число
+запросов не должно превышать бюджет и расти вместе с данными. При ошибке выводятся запросы,
+сгруппированные по месту вызова в коде или шаблоне.
+"""
+import importlib
+import os
+import sys
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Callable, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.urls import reverse
+
+from content.models import Post, PostReaction, Comment
+from content.services.counter_services import recount_reactions
+from content.services.tag_index import tag_index
+from content.services.view_counter import view_counter
+from content.services.view_services import add_new_tag
+from followers.models import Follower
+from profiles.models import Profile
+from profiles.services.profile_index import profile_index
+
+# Число профилей, постов у профиля и комментариев к посту в наборе данных
+DATASET_SIZES = (2, 5)
+
+PROJECT_ROOT = str(settings.BASE_DIR) + os.sep
+IGNORED_STATEMENTS = ('SAVEPOINT', 'RELEASE', 'ROLLBACK')
+
+
+class Budget(NamedTuple):
+    """Бюджет запросов URL: kwargs(data) - аргументы URL по набору данных, data - тело POST-запроса"""
+    queries: int
+    kwargs: Optional[Callable] = None
+    method: str = 'get'
+    data: Optional[dict] = None
+    query_string: str = ''
+
+
+def seed_dataset(size) -> SimpleNamespace:
+    """Набор данных, в котором каждый список страниц растет вместе с size
+
+    Пользователь data.user подписан на все профили, и все профили подписаны на него; у него size
+    дополнительных профилей. У каждого профиля size постов с тегами и один архивный пост,
+    у каждого поста size веток комментариев с ответом и реакции всех профилей.
+    """
+    users = [User.objects.create_user(username=f'budget_user{number}') for number in range(size + 1)]
+    extra_profiles = [Profile.objects.create(name=f'budget extra{number}', user=users[0]) for number in range(size)]
+    profiles = [Profile.objects.get(user=user, name=user.username) for user in users]
+    profile = profiles[0]
+    # Сохраненный последним профиль становится используемым
+    profile.save()
+
+    for other in profiles[1:]:
+        Follower.objects.create(recipient=other, sender=profile)
+        Follower.objects.create(recipient=profile, sender=other)
+
+    post_type = ContentType.objects.get_for_model(Post)
+    comment_type = ContentType.objects.get_for_model(Comment)
+    posts, comments = [], []
+    for author in profiles:
+        for number in range(size):
+            post = Post.objects.create(
+                title=f'budget post {author.pk}-{number}', caption='About budget post', author=author)
+            post.tags.set(add_new_tag(f'#budget #budget{number}', author))
+            posts.append(post)
+        Post.objects.create(title=f'budget archived {author.pk}', caption='About archived', author=author,
+                            archived=True)
+
+    for post in posts:
+        for number in range(size):
+            comment = Comment.objects.create(post=post, profile=profiles[number % len(profiles)], text='comment')
+            Comment.objects.create(post=post, profile=profile, text='reply', parent=comment)
+            comments.append(comment)
+
+    PostReaction.objects.bulk_create(
+        [PostReaction(profile=reacting, content_type=post_type, object_id=post.pk)
+         for post in posts for reacting in profiles] +
+        [PostReaction(profile=profile, content_type=comment_type, object_id=comment.pk) for comment in comments]
+    )
+    recount_reactions(Post)
+    recount_reactions(Comment)
+
+    own_posts = [post for post in posts if post.author_id == profile.pk]
+    return SimpleNamespace(
+        user=users[0], profile=profile, other=profiles[1], extra_profile=extra_profiles[0],
+        post=posts[-1], own_post=own_posts[0], comment=comments[-1],
+        own_comment=Comment.objects.filter(profile=profile, parent__isnull=True).first(),
+    )
+
+
+def reset_caches():
+    """Пустой общий кеш и индексы в памяти, чтобы каждая страница считала все с нуля"""
+    cache.clear()
+    tag_index.reset()
+    profile_index.reset()
+    view_counter.clear()
+    ContentType.objects.clear_cache()
+
+
+class QueryRecorder:
+    """Запись SQL-запросов соединения вместе с местом вызова"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if not sql.lstrip().upper().startswith(IGNORED_STATEMENTS):
+            self.queries.append((call_site(), connection.ops.last_executed_query(context['cursor'], sql, params)))
+        return result
+
+    def report(self) -> str:
+        """Запросы, сгруппированные по месту вызова, частые места первыми"""
+        by_site = defaultdict(list)
+        for site, sql in self.queries:
+            by_site[site].append(sql)
+
+        lines = []
+        for site, queries in sorted(by_site.items(), key=lambda item: -len(item[1])):
+            lines.append(f'  {len(queries)} x {site}')
+            lines.extend(f'      {sql}' for sql in dict.fromkeys(queries))
+
+        return '\n'.join(lines)
+
+
+def call_site() -> str:
+    """Ближайшее к запросу место в шаблоне или в коде проекта"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        node = frame.f_locals.get('self') if code.co_name == 'render_annotated' else None
+        if node is not None and getattr(node, 'token', None) is not None:
+            return f'{node.origin.template_name}:{node.token.lineno}'
+
+        filename = code.co_filename
+        if filename.startswith(PROJECT_ROOT) and filename != __file__ and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} ({code.co_name})'
+        frame = frame.f_back
+
+    return 'неизвестно'
+
+
+class QueryBudgetMixin:
+    """Бюджеты запросов для всех URL модуля urls: budgets = {имя URL: Budget}"""
+    urls = None
+    budgets = {}
+
+    def measure(self, name, budget, data) -> QueryRecorder:
+        namespace = importlib.import_module(self.urls).app_name
+        url = reverse(f'{namespace}:{name}', kwargs=budget.kwargs(data) if budget.kwargs else None)
+
+        self.client.force_login(data.user)
+        reset_caches()
+        with transaction.atomic():
+            with QueryRecorder() as recorder:
+                response = getattr(self.client, budget.method)(
+                    url + budget.query_string, budget.data or {}, HTTP_REFERER='/')
+            # Изменения страниц-действий не переходят в замеры следующих страниц
+            transaction.set_rollback(True)
+
+        self.assertLess(response.status_code, 400, f'{name}: ответ {response.status_code}')
+        return recorder
+
+    def test_every_url_has_budget(self):
+        """Проверка того, что для каждого URL приложения объявлен бюджет запросов"""
+        names = {pattern.name for pattern in importlib.import_module(self.urls).urlpatterns}
+
+        self.assertEqual(names, set(self.budgets))
+
+    def test_query_budgets(self):
+        """Проверка того, что число запросов каждой страницы в бюджете и не растет с данными"""
+        counts = defaultdict(dict)
+        for size in DATASET_SIZES:
+            with transaction.atomic():
+                with self.captureOnCommitCallbacks(execute=True):
+                    data = seed_dataset(size)
+
+                for name, budget in self.budgets.items():
+                    with self.subTest(url=name, size=size):
+                        recorder = self.measure(name, budget, data)
+                        counts[name][size] = len(recorder.queries)
+                        self.assertLessEqual(
+                            len(recorder.queries), budget.queries,
+                            f'{name}: {len(recorder.queries)} запросов при бюджете {budget.queries}, '
+                            f'размер данных {size}\n{recorder.report()}'
+                        )
+                        if len(set(counts[name].values())) > 1:
+                            self.fail(f'{name}: число запросов растет с данными {counts[name]}\n{recorder.report()}')
+
+                transaction.set_rollback(True)
+            reset_caches()
@@ -0,0 +1,61 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TransactionTestCase
+
+from content.management.commands.benchmark_load import compare, percentile
+from content.services.seed_services import DatasetSeeder
+from content.services.tag_index import tag_index
+
+
+class LoadBenchmarkTest(TransactionTestCase):
+    """Тесты для команды benchmark_load"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        DatasetSeeder(users=4, follows=2, posts=2, comments=2, reactions=2, tags=3, batch_size=50).run()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+        tag_index.reset()
+
+    def test_results_saved_and_compared_with_baseline(self):
+        """Проверка замера всех страниц без ошибок и сравнения с прошлым замером"""
+        output = f'{self.directory}/results.json'
+        call_command('benchmark_load', '--duration', '0.5', '--threads', '1', '--warmup', '0',
+                     '--output', output, stdout=StringIO())
+
+        with open(output) as file:
+            results = json.load(file)
+        self.assertEqual(results['total']['errors'], 0)
+        self.assertGreater(results['total']['requests'], 0)
+        for row in results['endpoints'].values():
+            self.assertLessEqual(row['p50_ms'], row['p95_ms'])
+            self.assertLessEqual(row['p95_ms'], row['p99_ms'])
+
+        # Прошлый замер вдвое быстрее текущего
+        for row in results['endpoints'].values():
+            row.update({metric: row[metric] / 2 for metric in ('p50_ms', 'p95_ms', 'p99_ms')})
+        baseline = f'{self.directory}/baseline.json'
+        with open(baseline, 'w') as file:
+            json.dump(results, file)
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_load', '--duration', '0.2', '--threads', '1', '--warmup', '0', '--output', output,
+                         '--baseline', baseline, '--fail-on-regression', stdout=StringIO())
+
+    def test_compare(self):
+        """Проверка того, что ухудшением считаются рост задержки и падение пропускной способности"""
+        baseline = {'home': {'throughput': 100, 'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 30}}
+        current = {'home': {'throughput': 70, 'p50_ms': 11, 'p95_ms': 30, 'p99_ms': 15},
+                   'tag': {'throughput': 5, 'p50_ms': 1, 'p95_ms': 1, 'p99_ms': 1}}
+
+        regressed = {row[1]: row[-1] for row in compare(current, baseline, tolerance=0.2)}
+
+        self.assertEqual(regressed, {'throughput': True, 'p50_ms': False, 'p95_ms': True, 'p99_ms': False})
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from content.models import Post, Comment
+from content.services.card_services import render_post_cards
+from content.tests.fixtures import create_posts, create_profiles
+
+
+class PostCardsTest(TestCase):
+    """Тесты для кеша карточек постов"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.profile, = create_profiles()
+        self.posts = create_posts(self.profile, 2, title='test post')
+
+    def test_cards_are_served_from_cache(self):
+        """Проверка того, что повторный вывод карточек не обращается к бд"""
+        posts = render_post_cards(Post.objects.filter(pk__in=[post.pk for post in self.posts]))
+
+        self.assertIn('test post0', posts[0].card)
+
+        with self.assertNumQueries(0):
+            render_post_cards(self.posts)
+
+    def test_card_is_reset_when_post_or_author_changes(self):
+        """Проверка обновления карточки при изменении поста, комментариях и смене имени автора"""
+        render_post_cards(self.posts)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].title = 'changed title'
+            self.posts[0].save()
+            Comment.objects.create(post=self.posts[0], profile=self.profile, text='hello')
+        post = render_post_cards([Post.objects.get(pk=self.posts[0].pk)])[0]
+
+        self.assertIn('changed title', post.card)
+        self.assertIn('1 комментариев', post.card)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.name = 'new name'
+            self.profile.save()
+
+        self.assertIn('new name', render_post_cards([Post.objects.get(pk=self.posts[1].pk)])[0].card)
@@ -0,0 +1,136 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from content.models import Comment, Post
+from content.services.comment_services import get_comment_threads, get_comment_replies
+from content.services.comment_storage import COMMENT_STORAGES, rebuild_comment_mptt, rebuild_comment_paths
+from content.tests.fixtures import create_posts, create_profiles
+
+
+@override_settings(COMMENT_THREADS_PAGE_SIZE=2, COMMENT_THREAD_DEPTH=2)
+class CommentThreadsTest(TestCase):
+    """Тесты для постраничной загрузки веток комментариев"""
+    # Поле корневого комментария, которое служит ключом следующей страницы веток
+    root_key = 'tree_id'
+
+    def setUp(self) -> None:
+        self.profile, = create_profiles()
+        self.post, = create_posts(self.profile)
+        self.roots = [
+            Comment.objects.create(post=self.post, profile=self.profile, text=f'root {i}') for i in range(3)
+        ]
+        parent = self.roots[0]
+        self.chain = []
+        for i in range(4):
+            parent = Comment.objects.create(post=self.post, profile=self.profile, text=f'reply {i}', parent=parent)
+            self.chain.append(parent)
+
+    def test_first_page_is_limited_by_threads_and_depth(self):
+        """Проверка того, что на странице не больше COMMENT_THREADS_PAGE_SIZE веток и COMMENT_THREAD_DEPTH уровней"""
+        comments, next_after = get_comment_threads(self.post.pk)
+
+        self.assertEqual([comment.text for comment in comments], ['root 0', 'reply 0', 'root 1'])
+        self.assertEqual(comments[1].hidden_replies, 3)
+        self.assertEqual(next_after, getattr(self.roots[1], self.root_key))
+
+        comments, next_after = get_comment_threads(self.post.pk, next_after)
+
+        self.assertEqual([comment.text for comment in comments], ['root 2'])
+        self.assertIsNone(next_after)
+
+    def test_replies_are_loaded_with_one_range_query(self):
+        """Проверка загрузки ответов на комментарий одним запросом"""
+        comment = Comment.objects.get(pk=self.chain[0].pk)
+
+        with self.assertNumQueries(1):
+            replies = get_comment_replies(comment)
+
+        self.assertEqual([reply.text for reply in replies], ['reply 1', 'reply 2'])
+        self.assertEqual(replies[-1].hidden_replies, 1)
+
+    def test_new_comment_writes_only_selected_storage(self):
+        """Проверка того, что новый комментарий не записывает путь, если ветки хранятся в MPTT"""
+        with CaptureQueriesContext(connection) as queries:
+            root = Comment.objects.create(post=self.post, profile=self.profile, text='new root')
+
+        self.assertEqual([query['sql'] for query in queries if query['sql'].startswith('UPDATE')], [])
+        self.assertEqual(Comment.objects.get(pk=root.pk).path, '')
+
+
+@override_settings(COMMENT_TREE_STORAGE='path')
+class PathCommentThreadsTest(CommentThreadsTest):
+    """Тесты для веток комментариев, хранящихся в материализованных путях"""
+    root_key = 'pk'
+
+    def test_replies_are_loaded_with_one_range_query(self):
+        """Проверка загрузки ответов запросом по диапазону пути и подсчета скрытых ответов одним запросом"""
+        comment = Comment.objects.get(pk=self.chain[0].pk)
+
+        with self.assertNumQueries(2):
+            replies = get_comment_replies(comment)
+
+        self.assertEqual([reply.text for reply in replies], ['reply 1', 'reply 2'])
+        self.assertEqual(replies[-1].hidden_replies, 1)
+
+    def test_reply_does_not_change_other_comments(self):
+        """Проверка того, что новый ответ не меняет другие комментарии"""
+        with CaptureQueriesContext(connection) as queries:
+            reply = Comment.objects.create(post=self.post, profile=self.profile, text='new reply', parent=self.chain[1])
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Comment.objects.get(pk=reply.pk).path, self.chain[1].path + Comment.path_segment(reply.pk))
+
+    def test_new_comment_writes_only_selected_storage(self):
+        """Проверка того, что новый комментарий не получает места в дереве MPTT, если ветки хранятся в путях"""
+        root = Comment.objects.create(post=self.post, profile=self.profile, text='new root')
+
+        self.assertEqual(
+            Comment.objects.filter(pk=root.pk).values_list('path', 'tree_id', 'lft', 'rght').get(),
+            (Comment.path_segment(root.pk), 0, 1, 2)
+        )
+
+    def test_rebuild_restores_both_storages(self):
+        """Проверка того, что после пересчета оба хранилища возвращают одинаковые ветки"""
+        rebuild_comment_mptt()
+        with override_settings(COMMENT_TREE_STORAGE='mptt'):
+            mptt_comments, _ = get_comment_threads(self.post.pk)
+
+        Comment.objects.update(path='')
+        rebuild_comment_paths()
+        path_comments, _ = get_comment_threads(self.post.pk)
+
+        self.assertEqual([comment.pk for comment in mptt_comments], [comment.pk for comment in path_comments])
+
+    def test_rebuild_comment_tree_command(self):
+        """Проверка команды rebuild_comment_tree для обоих хранилищ"""
+        stdout = StringIO()
+        call_command('rebuild_comment_tree', '--storage', 'mptt', stdout=stdout)
+        with override_settings(COMMENT_TREE_STORAGE='mptt'):
+            mptt_comments, _ = get_comment_threads(self.post.pk)
+
+        Comment.objects.update(path='')
+        call_command('rebuild_comment_tree', '--batch-size', '2', stdout=stdout)
+        path_comments, _ = get_comment_threads(self.post.pk)
+
+        self.assertEqual(stdout.getvalue().count('Пересчитано комментариев: 7'), 2)
+        self.assertEqual([comment.pk for comment in mptt_comments], [comment.pk for comment in path_comments])
+
+
+class CommentTreeBenchmarkTest(TestCase):
+    """Тесты для команды benchmark_comment_tree"""
+
+    def test_benchmark_rolls_back_changes(self):
+        """Проверка строки результатов для каждого хранилища и отката созданных данных"""
+        stdout = StringIO()
+
+        call_command('benchmark_comment_tree', '--sizes', '5', '--inserts', '2', stdout=stdout)
+
+        self.assertEqual([line.split()[:2] for line in stdout.getvalue().splitlines()[1:]],
+                         [[storage, '5'] for storage in COMMENT_STORAGES])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Post.objects.exists())
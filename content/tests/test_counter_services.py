@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase
+
+from content.models import Post, PostReaction, Comment
+from content.services.counter_services import recount_reactions
+from content.tests.fixtures import create_posts, create_profiles
+
+
+class RecountReactionsTest(TestCase):
+    """Тесты для пересчета счетчиков реакций"""
+
+    def setUp(self) -> None:
+        self.profile, = create_profiles()
+        self.post, = create_posts(self.profile)
+        self.comment = Comment.objects.create(text='comment', post=self.post, profile=self.profile)
+
+    def test_recount_fixes_drifted_counters(self):
+        """Проверка исправления расхождения счетчиков с таблицей реакций"""
+        for obj, reaction in ((self.post, PostReaction.LIKE), (self.comment, PostReaction.DISLIKE)):
+            PostReaction.objects.create(
+                profile=self.profile,
+                content_type=ContentType.objects.get_for_model(obj),
+                object_id=obj.pk,
+                reaction=reaction
+            )
+        Post.objects.update(dislikes_count=5)
+
+        self.assertEqual(recount_reactions(Post, batch_size=1), 1)
+        self.assertEqual(recount_reactions(Comment, batch_size=1), 1)
+        self.assertEqual(recount_reactions(Post), 0)
+
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.dislikes_count), (1, 0))
+        self.assertEqual((self.comment.likes_count, self.comment.dislikes_count), (0, 1))
+
+    def test_recount_reactions_command(self):
+        """Проверка команды recount_reactions"""
+        Post.objects.update(likes_count=3)
+        stdout = StringIO()
+
+        call_command('recount_reactions', '--batch-size', '1', stdout=stdout)
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertIn('исправлено 1', stdout.getvalue())
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase
+from PIL import Image
+
+from content.models import Post
+from content.services.image_services import variant_name
+from content.services.job_services import run_pending_jobs
+from content.tests.fixtures import TemporaryMediaMixin, create_profiles, image_upload
+
+
+class ImageVariantsTest(TemporaryMediaMixin, TestCase):
+    """Тесты для уменьшенных вариантов изображений"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.profile, = create_profiles()
+
+    def test_variants_created_after_upload(self):
+        """Проверка сохранения размеров и создания вариантов всех ширин в WebP и JPEG"""
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                title='test post1', caption='About test post', author=self.profile, picture=image_upload(2000, 1000))
+
+        post = Post.objects.get(pk=post.pk)
+        html = Template('{% load images %}{% responsive_image post.picture %}').render(Context({'post': post}))
+
+        self.assertIsNone(post.picture_width)
+        self.assertIn(f'src="{post.picture.url}"', html)
+        self.assertEqual(run_pending_jobs(), 1)
+
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual((post.picture_width, post.picture_height), (2000, 1000))
+        for width in (480, 960, 1600):
+            for extension in ('webp', 'jpg'):
+                name = variant_name(post.picture.name, width, extension)
+                self.assertTrue(post.picture.storage.exists(name), name)
+        with Image.open(post.picture.storage.path(variant_name(post.picture.name, 480, 'jpg'))) as variant:
+            self.assertEqual(variant.size, (480, 240))
+
+        html = Template('{% load images %}{% responsive_image post.picture sizes="80vw" %}').render(
+            Context({'post': post}))
+
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('960w', html)
+        self.assertIn('width="2000" height="1000"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_small_avatar_is_not_upscaled(self):
+        """Проверка того, что изображение меньше всех ширин не увеличивается"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.avatar = image_upload(100, 100)
+            self.profile.save()
+        run_pending_jobs()
+
+        self.profile.refresh_from_db()
+        storage = self.profile.avatar.storage
+
+        self.assertEqual((self.profile.avatar_width, self.profile.avatar_height), (100, 100))
+        self.assertTrue(storage.exists(variant_name(self.profile.avatar.name, 64, 'webp')))
+        self.assertTrue(storage.exists(variant_name(self.profile.avatar.name, 100, 'webp')))
+        self.assertFalse(storage.exists(variant_name(self.profile.avatar.name, 128, 'webp')))
+
+    def test_generate_image_variants_command(self):
+        """Проверка команды generate_image_variants для загруженных ранее изображений и пропавших файлов"""
+        post = Post.objects.create(
+            title='post', caption='About post', author=self.profile, picture=image_upload(600, 300))
+        missing = Post.objects.create(title='post', caption='About post', author=self.profile)
+        Post.objects.filter(pk=missing.pk).update(picture='missing.png')
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command('generate_image_variants', stdout=stdout, stderr=stderr)
+        post.refresh_from_db()
+
+        self.assertEqual((post.picture_width, post.picture_height), (600, 300))
+        self.assertTrue(post.picture.storage.exists(variant_name(post.picture.name, 480, 'webp')))
+        self.assertIn('обработано 1, с ошибками 1', stdout.getvalue())
+        self.assertIn('missing.png', stderr.getvalue())
+
+        # Без --all изображения с сохраненными размерами пропускаются
+        stdout = StringIO()
+        call_command('generate_image_variants', stdout=stdout, stderr=stderr)
+        self.assertIn('обработано 0, с ошибками 1', stdout.getvalue())
+
+        stdout = StringIO()
+        call_command('generate_image_variants', '--all', stdout=stdout, stderr=stderr)
+        self.assertIn('обработано 1, с ошибками 1', stdout.getvalue())
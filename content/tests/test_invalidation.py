@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from content.models import Post, PostReaction, Comment
+from content.services import invalidation
+from content.services.invalidation import POST, PROFILE, COMMENTS, get_dependency_versions
+from content.services.view_services import add_remove_reaction
+from content.tests.fixtures import create_posts, create_profiles
+
+
+class InvalidationTest(TestCase):
+    """Тесты для сброса закешированных данных по зависимостям"""
+
+    def setUp(self) -> None:
+        self.profile, = create_profiles()
+        self.post, = create_posts(self.profile)
+
+    def test_versions_change_only_after_commit(self):
+        """Проверка того, что версии меняются только после коммита транзакции"""
+        before = get_dependency_versions([(POST, self.post.pk), (COMMENTS, self.post.pk)])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Comment.objects.create(post=self.post, profile=self.profile, text='hello')
+
+            self.assertEqual(get_dependency_versions(before), before)
+
+        for callback in callbacks:
+            callback()
+        after = get_dependency_versions(before)
+
+        self.assertNotEqual(after[(POST, self.post.pk)], before[(POST, self.post.pk)])
+        self.assertNotEqual(after[(COMMENTS, self.post.pk)], before[(COMMENTS, self.post.pk)])
+
+    def test_batch_bumps_each_dependency_once(self):
+        """Проверка того, что изменения внутри пакета сбрасывают каждую зависимость один раз в конце"""
+        dependencies = [(POST, self.post.pk), (PROFILE, self.profile.pk)]
+        before = get_dependency_versions(dependencies)
+
+        with mock.patch.object(invalidation, 'bump_versions', wraps=invalidation.bump_versions) as bump:
+            with invalidation.batch():
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.post.title = 'changed title'
+                    self.post.save()
+                    self.post.caption = 'changed caption'
+                    self.post.save()
+                    self.profile.name = 'new name'
+                    self.profile.save()
+
+                self.assertEqual(get_dependency_versions(dependencies), before)
+                bump.assert_not_called()
+
+        bump.assert_called_once()
+        self.assertCountEqual(bump.call_args.args[0], [invalidation.dependency_key(d) for d in dependencies])
+        self.assertNotEqual(get_dependency_versions(dependencies), before)
+
+    def test_reaction_resets_post_card(self):
+        """Проверка сброса карточки при реакции, записанной в обход сигналов"""
+        ct_post = ContentType.objects.get_for_model(Post)
+        before = get_dependency_versions([(POST, self.post.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_remove_reaction(self.profile, ct_post, self.post.pk, PostReaction.LIKE)
+
+        self.assertNotEqual(get_dependency_versions([(POST, self.post.pk)]), before)
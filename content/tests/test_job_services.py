@@ -0,0 +1,125 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from content.models import Job
+from content.services import job_services
+from content.services.job_services import TASKS, claim_jobs, enqueue, run_pending_jobs, task
+
+
+class JobQueueTest(TestCase):
+    """Тесты для очереди фоновых задач"""
+
+    def setUp(self) -> None:
+        self.calls = []
+
+        @task('tests.flaky')
+        def flaky(value, failures):
+            self.calls.append(value)
+            if len(self.calls) <= failures:
+                raise OSError('temporary failure')
+
+    def tearDown(self) -> None:
+        TASKS.pop('tests.flaky', None)
+
+    def test_job_enqueued_after_commit(self):
+        """Проверка того, что задача появляется в очереди только после коммита"""
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.flaky', 'a', 0)
+
+            self.assertFalse(Job.objects.exists())
+
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(self.calls, ['a'])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_BASE_DELAY=60)
+    def test_failed_job_retried_with_backoff(self):
+        """Проверка повтора задачи с задержкой и отметки о неудаче после последней попытки"""
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.flaky', 'a', 5)
+
+        run_pending_jobs()
+        job = Job.objects.get()
+
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=25))
+        self.assertIn('temporary failure', job.last_error)
+        self.assertEqual(run_pending_jobs(), 0)
+
+        Job.objects.update(run_at=timezone.now())
+        run_pending_jobs()
+        job.refresh_from_db()
+
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(self.calls, ['a', 'a'])
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_LOCK_TIMEOUT=60)
+    def test_job_killing_worker_fails_after_last_attempt(self):
+        """Проверка того, что задача, после которой обработчик не вернулся, не повторяется бесконечно"""
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.flaky', 'a', 0)
+        expired = timezone.now() - timedelta(seconds=61)
+
+        for attempt in (1, 2):
+            job, = claim_jobs('crashed', 1)
+
+            self.assertEqual(job.attempts, attempt)
+            # Обработчик упал во время выполнения задачи
+            Job.objects.update(locked_at=expired)
+
+        self.assertEqual(claim_jobs('worker', 1), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(self.calls, [])
+
+
+class JobWorkerCommandTest(TransactionTestCase):
+    """Тесты для команды run_jobs"""
+
+    def setUp(self) -> None:
+        self.calls = []
+        self.lock = threading.Lock()
+
+        @task('tests.record')
+        def record(value):
+            with self.lock:
+                self.calls.append(value)
+
+    def tearDown(self) -> None:
+        TASKS.pop('tests.record', None)
+
+    def test_worker_runs_each_job_once(self):
+        """Проверка того, что пул потоков выполняет каждую задачу ровно один раз"""
+        for number in range(10):
+            enqueue('tests.record', number)
+
+        call_command('run_jobs', '--once', '--threads', '3', '--poll-interval', '0.01', stdout=StringIO())
+
+        self.assertEqual(sorted(self.calls), list(range(10)))
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 10)
+
+    def test_worker_survives_error_outside_task(self):
+        """Проверка того, что ошибка записи результата одной задачи не останавливает обработку остальных"""
+        for number in range(3):
+            enqueue('tests.record', number)
+        run_job = job_services.run_job
+
+        def fail_first(job):
+            if job.args == [0]:
+                raise OperationalError('database is locked')
+            return run_job(job)
+
+        stdout, stderr = StringIO(), StringIO()
+        with mock.patch('content.management.commands.run_jobs.run_job', side_effect=fail_first):
+            call_command('run_jobs', '--once', '--threads', '1', '--poll-interval', '0.01', stdout=stdout, stderr=stderr)
+
+        self.assertEqual(sorted(self.calls), [1, 2])
+        self.assertIn('database is locked', stderr.getvalue())
+        self.assertIn('с ошибками 1', stdout.getvalue())
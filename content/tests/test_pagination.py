@@ -0,0 +1,46 @@
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from content.models import Post
+from content.services.pagination import paginate_queryset
+from content.tests.fixtures import create_posts, create_profiles
+
+
+class KeysetPaginationTest(TestCase):
+    """Тесты для keyset-пагинации списков постов"""
+
+    def setUp(self) -> None:
+        profile, = create_profiles()
+        self.posts = create_posts(profile, 5)
+        self.posts.reverse()
+
+    def test_walk_forward_and_back(self):
+        """Проверка перехода по страницам вперед и назад"""
+        first = paginate_queryset(Post.objects.all(), None, 2)
+        second = paginate_queryset(Post.objects.all(), first.next_cursor, 2)
+        last = paginate_queryset(Post.objects.all(), second.next_cursor, 2)
+        back = paginate_queryset(Post.objects.all(), second.previous_cursor, 2)
+
+        self.assertEqual(first.object_list, self.posts[:2])
+        self.assertFalse(first.has_previous)
+        self.assertEqual(second.object_list, self.posts[2:4])
+        self.assertEqual(last.object_list, self.posts[4:])
+        self.assertFalse(last.has_next)
+        self.assertEqual(back.object_list, self.posts[:2])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_deep_pages_do_not_use_offset(self):
+        """Проверка того, что страницы выбираются без OFFSET"""
+        first = paginate_queryset(Post.objects.all(), None, 2)
+        with CaptureQueriesContext(connection) as queries:
+            paginate_queryset(Post.objects.all(), first.next_cursor, 2)
+
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+
+    def test_invalid_cursor_raises_404(self):
+        """Проверка ответа 404 для неверного курсора"""
+        with self.assertRaises(Http404):
+            paginate_queryset(Post.objects.all(), 'not-a-cursor', 2)
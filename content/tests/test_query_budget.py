@@ -0,0 +1,33 @@
+from django.test import TestCase
+
+from content.models import PostReaction
+from content.tests.query_budget import Budget, QueryBudgetMixin
+
+
+class ContentQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Бюджеты SQL-запросов страниц приложения content"""
+    urls = 'content.urls'
+    budgets = {
+        'master': Budget(3),
+        'home': Budget(11),
+        'profile_posts_list': Budget(10, kwargs=lambda data: {'profile_slug': data.other.slug}),
+        'archived_posts': Budget(7),
+        'posts_by_tag': Budget(8, kwargs=lambda data: {'tag': 'budget'}),
+        'posts_by_tags': Budget(7, query_string='?tags=budget,budget0&mode=and'),
+        'search': Budget(7, query_string='?q=budget'),
+        'search_json': Budget(6, query_string='?q=budget'),
+        'post_detail': Budget(11, kwargs=lambda data: {'post_id': data.post.pk}),
+        'add_post': Budget(4),
+        'edit_post': Budget(6, kwargs=lambda data: {'post_id': data.own_post.pk}),
+        'delete_post': Budget(7, kwargs=lambda data: {'pk': data.own_post.pk}),
+        'post_reaction': Budget(10, kwargs=lambda data: {'post_id': data.post.pk, 'reaction': PostReaction.DISLIKE}),
+        'add_comment': Budget(
+            7, kwargs=lambda data: {'post_id': data.post.pk}, method='post', data={'text': 'hello'}),
+        'comment_threads': Budget(7, kwargs=lambda data: {'post_id': data.post.pk}),
+        'comment_replies': Budget(5, kwargs=lambda data: {'comment_id': data.comment.pk}),
+        'edit_comment': Budget(
+            5, kwargs=lambda data: {'comment_id': data.own_comment.pk}, method='post', data={'text': 'edited'}),
+        'delete_comment': Budget(5, kwargs=lambda data: {'comment_id': data.own_comment.pk}, method='post'),
+        'comment_reaction': Budget(
+            11, kwargs=lambda data: {'comment_id': data.comment.pk, 'reaction': PostReaction.DISLIKE}),
+    }
@@ -0,0 +1,129 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from content.models import Post, PostReaction, Comment
+from content.services.tag_index import tag_index
+from content.services.view_counter import view_counter
+from content.services.view_services import add_new_tag
+from followers.models import Follower
+from profiles.models import Profile
+
+EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN поддерживается только SQLite')
+class QueryPlanTest(TestCase):
+    """Тесты планов основных запросов страниц: ни один запрос не должен читать таблицу целиком"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        tag_index.reset()
+        User.objects.create_user(username='test_user1', password='password')
+        User.objects.create_user(username='test_user2', password='password')
+        self.profile1 = Profile.objects.get(user__username='test_user1')
+        self.profile2 = Profile.objects.get(user__username='test_user2')
+        Follower.objects.create(recipient=self.profile2, sender=self.profile1)
+
+        self.post = Post.objects.create(title='test post1', caption='About test post1', author=self.profile2)
+        self.post.tags.set(add_new_tag('#first #second', self.profile2))
+        Post.objects.create(title='test post2', caption='About test post2', author=self.profile1, archived=True)
+        self.comment = Comment.objects.create(post=self.post, profile=self.profile1, text='hello')
+        Comment.objects.create(post=self.post, profile=self.profile2, text='reply', parent=self.comment)
+        PostReaction.objects.create(
+            profile=self.profile1, content_type=ContentType.objects.get_for_model(Post), object_id=self.post.pk)
+
+        self.client.login(username='test_user1', password='password')
+
+    def tearDown(self) -> None:
+        view_counter.clear()
+        tag_index.reset()
+
+    def full_scans(self, sql) -> list:
+        """Таблицы, которые запрос читает целиком без индекса, по EXPLAIN QUERY PLAN"""
+        tables = set(connection.introspection.table_names())
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        scans = []
+        for detail in plan:
+            # SCAN t USING INDEX - чтение по индексу, VIRTUAL TABLE - поиск FTS5,
+            # SCAN подзапроса или CTE - чтение временного результата
+            words = detail.split()
+            if words[0] == 'SCAN' and not {'USING', 'VIRTUAL'} & set(words) and words[1] in tables:
+                scans.append(words[1])
+
+        return scans
+
+    def assertNoFullScans(self, url, allowed=()):
+        """Запрос страницы url и проверка планов всех ее запросов, allowed - таблицы, читаемые целиком намеренно"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+
+        problems = []
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+                continue
+            scans = [table for table in self.full_scans(sql) if table not in allowed]
+            if scans:
+                problems.append(f'{", ".join(scans)}: {sql}')
+
+        self.assertEqual(problems, [], 'Запросы читают таблицы целиком:\n' + '\n'.join(problems))
+
+    def test_home(self):
+        """Проверка запросов ленты подписок"""
+        self.assertNoFullScans(reverse('content:home'))
+
+    def test_archived_posts(self):
+        """Проверка запросов архива постов"""
+        self.assertNoFullScans(reverse('content:archived_posts'))
+
+    def test_profile_posts(self):
+        """Проверка запросов страницы постов профиля"""
+        self.assertNoFullScans(reverse('content:profile_posts_list', kwargs={'profile_slug': self.profile2.slug}))
+
+    def test_posts_by_tag(self):
+        """Проверка запросов страницы постов по тегу"""
+        self.assertNoFullScans(reverse('content:posts_by_tag', kwargs={'tag': 'first'}))
+
+    def test_posts_by_tags(self):
+        """Проверка запросов страницы постов по нескольким тегам
+
+        Индекс тегов в памяти при построении намеренно читает все связи постов с тегами.
+        """
+        self.assertNoFullScans(
+            reverse('content:posts_by_tags') + '?tags=first,second&mode=and', allowed={'content_post_tags'})
+
+    def test_search(self):
+        """Проверка запросов поиска"""
+        self.assertNoFullScans(reverse('content:search') + '?q=test')
+
+    def test_post_detail(self):
+        """Проверка запросов страницы поста"""
+        self.assertNoFullScans(reverse('content:post_detail', kwargs={'post_id': self.post.pk}))
+
+    def test_comment_threads(self):
+        """Проверка запросов страницы веток комментариев"""
+        self.assertNoFullScans(reverse('content:comment_threads', kwargs={'post_id': self.post.pk}))
+
+    def test_comment_replies(self):
+        """Проверка запросов ответов на комментарий"""
+        self.assertNoFullScans(reverse('content:comment_replies', kwargs={'comment_id': self.comment.pk}))
+
+    def test_all_profiles(self):
+        """Проверка запросов списка профилей"""
+        self.assertNoFullScans(reverse('profiles:all_profiles'))
+
+    def test_profiles_typeahead(self):
+        """Проверка запросов подсказок профилей"""
+        self.assertNoFullScans(reverse('profiles:profiles_typeahead') + '?q=test')
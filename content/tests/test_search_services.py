@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from content.models import Post, Tag
+from content.services.search_services import rebuild_search_index, search_posts
+from content.tests.fixtures import create_profiles
+
+
+class SearchPostsTest(TestCase):
+    """Тесты для полнотекстового поиска постов"""
+
+    def setUp(self) -> None:
+        self.profile, = create_profiles()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_caption = Post.objects.create(
+                title='Утро', caption='Готовим кофе в турке', author=self.profile)
+            self.in_title = Post.objects.create(
+                title='Кофе по-восточному', caption='Рецепт', author=self.profile)
+            self.tagged = Post.objects.create(title='Завтрак', caption='Каша', author=self.profile)
+            self.tagged.tags.add(Tag.objects.create(title='Напитки', slug='drinks', author=self.profile))
+
+    def test_search_ranks_title_matches_first(self):
+        """Проверка того, что совпадение в заголовке выше совпадения в тексте"""
+        page = search_posts('кофе', None, 10)
+
+        self.assertEqual(list(page), [self.in_title, self.in_caption])
+
+    def test_search_by_tag_title_and_prefix(self):
+        """Проверка поиска по названию тега и началу слова"""
+        self.assertEqual(list(search_posts('напит', None, 10)), [self.tagged])
+
+    def test_archived_posts_are_not_found(self):
+        """Проверка того, что архивные посты убираются из индекса"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title.archived = True
+            self.in_title.save()
+
+        self.assertEqual(list(search_posts('кофе', None, 10)), [self.in_caption])
+
+    def test_search_is_paginated(self):
+        """Проверка разбиения результатов на страницы"""
+        first = search_posts('кофе', None, 1)
+        second = search_posts('кофе', first.next_cursor, 1)
+
+        self.assertEqual(list(first) + list(second), [self.in_title, self.in_caption])
+        self.assertFalse(second.has_next)
+        self.assertTrue(second.has_previous)
+
+    def test_rebuild_search_index(self):
+        """Проверка перестроения индекса"""
+        Post.objects.filter(pk=self.in_caption.pk).update(caption='Готовим чай')
+
+        self.assertEqual(rebuild_search_index(batch_size=2), 3)
+        self.assertEqual(list(search_posts('кофе', None, 10)), [self.in_title])
+
+    def test_rebuild_search_index_command(self):
+        """Проверка команды rebuild_search_index"""
+        Post.objects.filter(pk=self.in_caption.pk).update(caption='Готовим чай')
+        stdout = StringIO()
+
+        call_command('rebuild_search_index', '--batch-size', '2', stdout=stdout)
+
+        self.assertIn('Проиндексировано постов: 3', stdout.getvalue())
+        self.assertEqual(list(search_posts('кофе', None, 10)), [self.in_title])
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TestCase
+
+from content.models import Post, TimelineEntry, Comment
+from content.services.counter_services import recount_reactions
+from content.services.seed_services import SEED_PASSWORD, DatasetSeeder
+from followers.models import Follower
+from profiles.models import Profile
+
+
+class DatasetSeederTest(TestCase):
+    """Тесты для генератора синтетических данных"""
+
+    def seed(self, seed=0):
+        return DatasetSeeder(users=8, follows=3, posts=2, comments=4, reactions=3, tags=5, seed=seed,
+                             batch_size=50).run()
+
+    def snapshot(self):
+        return (
+            list(Profile.objects.order_by('pk').values_list('name', 'slug', 'used', 'followers_count')),
+            list(Follower.objects.order_by('sender', 'recipient').values_list('sender__name', 'recipient__name')),
+            list(Comment.objects.order_by('pk').values_list('parent__text', 'level', 'lft', 'rght', 'likes_count')),
+        )
+
+    def test_same_seed_same_data(self):
+        """Проверка того, что одинаковый seed дает одинаковые данные"""
+        with transaction.atomic():
+            self.seed()
+            first = self.snapshot()
+            transaction.set_rollback(True)
+
+        self.seed()
+
+        self.assertEqual(self.snapshot(), first)
+
+    def test_derived_fields_consistent(self):
+        """Проверка деревьев комментариев, счетчиков, лент и входа созданных пользователей"""
+        counts = self.seed()
+
+        self.assertEqual(User.objects.count(), 8)
+        self.assertEqual(Comment.objects.count(), counts['content.Comment'])
+        for comment in Comment.objects.all():
+            descendants = Comment.objects.filter(post=comment.post_id, path__startswith=comment.path).count() - 1
+            self.assertEqual(comment.get_descendant_count(), descendants)
+            self.assertEqual(comment.level, len(comment.path) // Comment.PATH_STEP - 1)
+
+        self.assertEqual(recount_reactions(Post), 0)
+        self.assertEqual(recount_reactions(Comment), 0)
+        for profile in Profile.objects.all():
+            self.assertEqual(profile.followers_count, Follower.objects.filter(recipient=profile).count())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertTrue(self.client.login(username=User.objects.first().username, password=SEED_PASSWORD))
+
+    def test_seed_twice(self):
+        """Проверка того, что повторный запуск с тем же seed не создает пользователей с теми же именами"""
+        self.seed()
+
+        with self.assertRaises(ValueError):
+            self.seed()
+
+    def test_seed_command(self):
+        """Проверка команды seed и ее ошибки при повторном запуске с тем же seed"""
+        stdout = StringIO()
+        call_command('seed', '--users', '3', '--follows', '1', '--posts', '1', '--comments', '1', '--reactions', '1',
+                     '--tags', '2', '--seed', '7', stdout=stdout)
+
+        self.assertEqual(User.objects.count(), 3)
+        self.assertIn(f'seed7-0 / {SEED_PASSWORD}', stdout.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('seed', '--users', '3', '--seed', '7', stdout=StringIO())
@@ -0,0 +1,85 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from content.services.stampede import get_or_compute, get_many_or_compute, LOCK_KEY
+
+
+class StampedeProtectionTest(SimpleTestCase):
+    """Тесты для защиты от одновременного пересчета закешированных значений"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.computed = 0
+        self.lock = threading.Lock()
+
+    def compute(self, value='fresh', seconds=0.0):
+        def compute():
+            with self.lock:
+                self.computed += 1
+            time.sleep(seconds)
+            return value
+        return compute
+
+    def test_concurrent_misses_compute_once(self):
+        """Проверка того, что одновременные промахи пересчитывают значение один раз"""
+        workers = 20
+        barrier = threading.Barrier(workers)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(get_or_compute('stampede:test', self.compute(seconds=0.3), 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.computed, 1)
+        self.assertEqual(results, ['fresh'] * workers)
+
+    def test_expired_value_served_while_refreshing(self):
+        """Проверка того, что пока один процесс пересчитывает значение, остальные получают прежнее"""
+        cache.set('stampede:test', ('stale', time.time() - 1, 0.1), 60)
+        cache.add(LOCK_KEY.format(key='stampede:test'), 1)
+
+        self.assertEqual(get_or_compute('stampede:test', self.compute(), 60), 'stale')
+        self.assertEqual(self.computed, 0)
+
+        cache.delete(LOCK_KEY.format(key='stampede:test'))
+
+        self.assertEqual(get_or_compute('stampede:test', self.compute(), 60), 'fresh')
+        self.assertEqual(get_or_compute('stampede:test', self.compute(), 60), 'fresh')
+        self.assertEqual(self.computed, 1)
+
+    @override_settings(CACHE_EARLY_EXPIRY_BETA=10)
+    @mock.patch('content.services.stampede.random.random', return_value=0.5)
+    def test_early_expiry(self, random):
+        """Проверка досрочного пересчета значения, которое долго считается и скоро истекает"""
+        cache.set('stampede:test', ('old', time.time() + 5, 1.0), 60)
+
+        self.assertEqual(get_or_compute('stampede:test', self.compute(), 60), 'fresh')
+
+        with override_settings(CACHE_EARLY_EXPIRY_BETA=0):
+            cache.set('stampede:test', ('old', time.time() + 5, 1.0), 60)
+
+            self.assertEqual(get_or_compute('stampede:test', self.compute(), 60), 'old')
+
+    def test_many_values_compute_only_missing(self):
+        """Проверка того, что пакетное чтение считает только недостающие значения"""
+        cache.set('stampede:1', ('cached', time.time() + 60, 0.0), 60)
+        requested = []
+
+        def compute(ids):
+            requested.extend(ids)
+            return {item_id: f'fresh{item_id}' for item_id in ids}
+
+        values = get_many_or_compute({1: 'stampede:1', 2: 'stampede:2'}, compute, 60)
+
+        self.assertEqual(values, {1: 'cached', 2: 'fresh2'})
+        self.assertEqual(requested, [2])
@@ -0,0 +1,99 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+
+from content.models import Post, StoredFile
+from content.services.image_services import variant_name
+from content.services.job_services import run_pending_jobs
+from content.storage import is_content_addressed
+from content.tests.fixtures import TemporaryMediaMixin, create_profiles, image_upload
+from content.views import MediaView
+
+
+class ContentAddressedStorageTest(TemporaryMediaMixin, TestCase):
+    """Тесты для хранения медиафайлов по хешу содержимого"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.profile, = create_profiles()
+
+    def create_post(self, picture):
+        return Post.objects.create(title='test post', caption='About test post', author=self.profile, picture=picture)
+
+    def test_identical_uploads_stored_once(self):
+        """Проверка того, что одинаковые загрузки - один файл, который удаляется с последней ссылкой"""
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create_post(image_upload(50, 50, 'first.png'))
+            second = self.create_post(image_upload(50, 50, 'second.PNG'))
+        run_pending_jobs()
+        name = first.picture.name
+        storage = first.picture.storage
+
+        self.assertTrue(is_content_addressed(name))
+        self.assertTrue(name.endswith('.png'))
+        self.assertEqual(second.picture.name, name)
+        self.assertEqual(StoredFile.objects.get(name=name).references, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+
+        self.assertTrue(storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.picture = image_upload(60, 60)
+            second.save()
+
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(storage.exists(variant_name(name, 50, 'webp')))
+
+    def test_parallel_first_uploads_both_referenced(self):
+        """Проверка того, что строку, созданную параллельной первой загрузкой, загрузка не создает повторно"""
+        bulk_create = StoredFile.objects.bulk_create
+
+        def create_after_parallel_upload(objs, **kwargs):
+            StoredFile.objects.create(name=objs[0].name, size=objs[0].size, references=1)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(StoredFile.objects, 'bulk_create', side_effect=create_after_parallel_upload):
+            with self.captureOnCommitCallbacks(execute=True):
+                post = self.create_post(image_upload(50, 50))
+
+        self.assertEqual(StoredFile.objects.get(name=post.picture.name).references, 2)
+
+    def test_content_addressed_media_cached_forever(self):
+        """Проверка заголовков immutable для файлов по хешу и их отсутствия для старых путей"""
+        with self.captureOnCommitCallbacks(execute=True):
+            post = self.create_post(image_upload(50, 50))
+        FileSystemStorage().save('user_old/old.png', ContentFile(b'old'))
+
+        factory = RequestFactory()
+        response = MediaView.as_view()(factory.get(post.picture.url), path=post.picture.name)
+        legacy = MediaView.as_view()(factory.get('/media/user_old/old.png'), path='user_old/old.png')
+
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('Expires', response)
+        self.assertEqual(legacy.status_code, 200)
+        self.assertNotIn('Cache-Control', legacy)
+
+    def test_rehash_moves_legacy_files(self):
+        """Проверка переноса старых файлов в хранилище по хешу и постановки задач на варианты"""
+        content = image_upload(50, 50).read()
+        legacy_name = FileSystemStorage().save('user_old/photo.png', ContentFile(content))
+        post = self.create_post(None)
+        Post.objects.filter(pk=post.pk).update(picture=legacy_name, picture_width=50, picture_height=50)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rehash_media', '--delete-originals', stdout=StringIO(), stderr=StringIO())
+        post.refresh_from_db()
+
+        self.assertTrue(is_content_addressed(post.picture.name))
+        self.assertIsNone(post.picture_width)
+        self.assertEqual(post.picture.read(), content)
+        self.assertFalse(FileSystemStorage().exists(legacy_name))
+        self.assertEqual(run_pending_jobs(), 1)
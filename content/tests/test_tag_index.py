@@ -0,0 +1,43 @@
+from django.test import TestCase
+
+from content.services.tag_index import tag_index
+from content.services.view_services import add_new_tag
+from content.tests.fixtures import create_posts, create_profiles
+
+
+class TagPostingIndexTest(TestCase):
+    """Тесты для индекса тегов в памяти"""
+
+    def setUp(self) -> None:
+        tag_index.reset()
+        self.profile, = create_profiles()
+        self.posts = create_posts(self.profile, 3)
+        self.python, self.django = add_new_tag('#python #django', self.profile)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].tags.set([self.python, self.django])
+            self.posts[1].tags.set([self.python])
+            self.posts[2].tags.set([self.django])
+
+    def test_intersection_and_union(self):
+        """Проверка выборки постов со всеми тегами и с любым из тегов"""
+        self.assertEqual(tag_index.intersection(['python', 'django']), [self.posts[0].pk])
+        self.assertEqual(tag_index.union(['python', 'django']), [post.pk for post in self.posts])
+        self.assertEqual(tag_index.intersection(['python', 'unknown']), [])
+
+    def test_index_updated_incrementally(self):
+        """Проверка обновления индекса при изменении тегов, архивации и удалении поста"""
+        with self.assertNumQueries(0):
+            tag_index.posts('python')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[1].tags.remove(self.python)
+        self.assertEqual(list(tag_index.posts('python')), [self.posts[0].pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].archived = True
+            self.posts[0].save(update_fields=['archived'])
+        self.assertEqual(list(tag_index.posts('python')), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[2].delete()
+        self.assertEqual(list(tag_index.posts('django')), [])
@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from content.models import Post, TimelineEntry
+from content.services.pagination import decode_cursor
+from content.services.timeline_services import get_feed, rebuild_timelines
+from content.tests.fixtures import create_profiles
+from followers.models import Follower
+from profiles.models import Profile
+
+
+class TimelineServicesTest(TestCase):
+    """Тесты для ленты главной страницы"""
+
+    def setUp(self) -> None:
+        self.author, self.reader = create_profiles(2)
+
+    def test_new_post_added_to_followers_timeline(self):
+        """Проверка раскладывания нового поста по лентам подписчиков"""
+        Follower.objects.create(recipient=self.author, sender=self.reader)
+        post = Post.objects.create(title='post1', caption='About post1', author=self.author)
+
+        self.assertEqual(get_feed(self.reader).object_list, [post])
+        self.assertEqual(get_feed(self.author).object_list, [post])
+
+    def test_follow_and_unfollow_update_timeline(self):
+        """Проверка добавления постов при подписке и удаления при отписке"""
+        post = Post.objects.create(title='post1', caption='About post1', author=self.author)
+        Post.objects.create(title='post2', caption='About post2', author=self.author, archived=True)
+
+        follower = Follower.objects.create(recipient=self.author, sender=self.reader)
+        self.assertEqual(get_feed(self.reader).object_list, [post])
+
+        follower.delete()
+        self.assertEqual(get_feed(self.reader).object_list, [])
+
+    def test_archived_post_removed_from_followers_timeline(self):
+        """Проверка удаления поста из лент подписчиков при архивации и возврата после нее"""
+        Follower.objects.create(recipient=self.author, sender=self.reader)
+        post = Post.objects.create(title='post1', caption='About post1', author=self.author)
+
+        post.archived = True
+        post.save(update_fields=['archived'])
+        self.assertEqual(get_feed(self.reader).object_list, [])
+
+        post.archived = False
+        post.save(update_fields=['archived'])
+        self.assertEqual(get_feed(self.reader).object_list, [post])
+
+    def test_feed_is_ordered_and_paginated(self):
+        """Проверка порядка постов и постраничного вывода ленты"""
+        Follower.objects.create(recipient=self.author, sender=self.reader)
+        posts = [Post.objects.create(title=f'post{i}', caption='About post', author=self.author) for i in range(3)]
+
+        page = get_feed(self.reader, page_size=2)
+
+        self.assertEqual(page.object_list, [posts[2], posts[1]])
+        self.assertTrue(page.has_next)
+
+        page = get_feed(self.reader, decode_cursor(page.next_cursor), page_size=2)
+        self.assertEqual(page.object_list, [posts[0]])
+        self.assertFalse(page.has_next)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_posts_pulled_on_read(self):
+        """Проверка того, что посты популярных авторов не раскладываются, а достаются при чтении"""
+        Follower.objects.create(recipient=self.author, sender=self.reader)
+        post = Post.objects.create(title='post1', caption='About post1', author=self.author)
+
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.reader).exists())
+        self.assertEqual(get_feed(self.reader).object_list, [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_pulled_posts_kept_after_author_loses_followers(self):
+        """Проверка того, что посты, написанные при большом числе подписчиков, остаются в ленте после отписок"""
+        User.objects.create_user(username='test_user3', password='password')
+        other = Profile.objects.get(user__username='test_user3')
+        Follower.objects.create(recipient=self.author, sender=self.reader)
+        Follower.objects.create(recipient=self.author, sender=other)
+        post = Post.objects.create(title='post1', caption='About post1', author=self.author)
+        Follower.objects.filter(sender=other).delete()
+
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.reader).exists())
+        self.assertEqual(get_feed(self.reader).object_list, [post])
+
+        rebuild_timelines()
+
+        self.assertFalse(Profile.objects.get(pk=self.author.pk).timeline_pull)
+        self.assertEqual(get_feed(self.reader).object_list, [post])
+
+    def test_rebuild_timelines(self):
+        """Проверка перестроения лент"""
+        Follower.objects.create(recipient=self.author, sender=self.reader)
+        post = Post.objects.create(title='post1', caption='About post1', author=self.author)
+        TimelineEntry.objects.all().delete()
+
+        self.assertEqual(rebuild_timelines(), 2)
+        self.assertEqual(get_feed(self.reader).object_list, [post])
+
+    def test_rebuild_timelines_command(self):
+        """Проверка команды rebuild_timelines"""
+        Follower.objects.create(recipient=self.author, sender=self.reader)
+        post = Post.objects.create(title='post1', caption='About post1', author=self.author)
+        TimelineEntry.objects.all().delete()
+        stdout = StringIO()
+
+        call_command('rebuild_timelines', '--batch-size', '1', stdout=stdout)
+
+        self.assertIn('Создано записей ленты: 2', stdout.getvalue())
+        self.assertEqual(get_feed(self.reader).object_list, [post])
@@ -0,0 +1,45 @@
+from django.test import TestCase, override_settings
+
+from content.models import Post
+from content.services.view_counter import ViewCounterBuffer
+from content.tests.fixtures import create_posts, create_profiles
+
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=3600)
+class ViewCounterBufferTest(TestCase):
+    """Тесты для буфера просмотров постов"""
+
+    def setUp(self) -> None:
+        profile, = create_profiles()
+        self.posts = create_posts(profile, 2)
+        self.buffer = ViewCounterBuffer()
+
+    def tearDown(self) -> None:
+        self.buffer.clear()
+        self.buffer.stop()
+
+    def test_views_are_buffered_until_flush(self):
+        """Проверка накопления просмотров и их записи одним запросом"""
+        self.assertEqual(self.buffer.add(self.posts[0].pk), 1)
+        self.assertEqual(self.buffer.add(self.posts[0].pk), 2)
+        self.buffer.add(self.posts[1].pk)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 2)
+
+        self.assertEqual(self.buffer.pending(self.posts[0].pk), 0)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('views', flat=True)),
+            [2, 1]
+        )
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+    def test_zero_interval_writes_views_at_once(self):
+        """Проверка записи просмотров без буферизации"""
+        self.buffer.add(self.posts[0].pk)
+        self.posts[0].refresh_from_db()
+
+        self.assertEqual(self.posts[0].views, 1)
+        self.assertEqual(self.buffer.pending(self.posts[0].pk), 0)
@@ -0,0 +1,150 @@
+import threading
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import OperationalError, connections
+from django.test import TestCase, TransactionTestCase
+
+from content.models import Post, PostReaction, Tag
+from content.services.view_services import add_new_tag, add_remove_reaction
+from content.tests.fixtures import create_posts, create_profiles
+
+
+class ReactionToggleTest(TestCase):
+    """Тесты для переключения реакции"""
+
+    def setUp(self) -> None:
+        self.profile, = create_profiles()
+        self.post, = create_posts(self.profile)
+        self.ct_post = ContentType.objects.get_for_model(Post)
+
+    def test_toggle_returns_state_and_counts(self):
+        """Проверка возвращаемого состояния реакции и счетчиков"""
+        self.assertEqual(
+            add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.LIKE),
+            {'reaction': PostReaction.LIKE, 'likes': 1, 'dislikes': 0}
+        )
+        self.assertEqual(
+            add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.DISLIKE),
+            {'reaction': PostReaction.DISLIKE, 'likes': 0, 'dislikes': 1}
+        )
+        self.assertEqual(
+            add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.DISLIKE),
+            {'reaction': None, 'likes': 0, 'dislikes': 0}
+        )
+
+    def test_remove_reaction_with_lagging_counter(self):
+        """Проверка того, что отставший от таблицы реакций счетчик не уходит ниже нуля"""
+        add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.LIKE)
+        Post.objects.update(likes_count=0)
+
+        self.assertEqual(
+            add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.DISLIKE),
+            {'reaction': PostReaction.DISLIKE, 'likes': 0, 'dislikes': 1}
+        )
+
+    def test_unknown_stored_reaction_replaced(self):
+        """Проверка того, что сохраненное неизвестное значение реакции заменяется, а не зацикливает переключение"""
+        PostReaction.objects.create(profile=self.profile, content_type=self.ct_post, object_id=self.post.pk, reaction=7)
+
+        self.assertEqual(
+            add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.LIKE),
+            {'reaction': PostReaction.LIKE, 'likes': 1, 'dislikes': 0}
+        )
+
+    def test_new_reaction_is_one_write(self):
+        """Проверка того, что новая реакция добавляется без предварительного чтения"""
+        # Точка сохранения и ее освобождение, удаление прежней реакции, вставка и изменение счетчиков
+        with self.assertNumQueries(5):
+            add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.LIKE)
+
+    def test_changed_reaction_is_three_writes(self):
+        """Проверка того, что смена реакции не требует больше запросов, чем новая реакция"""
+        add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.LIKE)
+
+        with self.assertNumQueries(5):
+            add_remove_reaction(self.profile, self.ct_post, self.post.pk, PostReaction.DISLIKE)
+
+
+class ReactionConcurrencyTest(TransactionTestCase):
+    """Тесты для переключения реакций из параллельных потоков"""
+    threads_per_profile = 4
+    clicks_per_thread = 10
+
+    def setUp(self) -> None:
+        self.profiles = create_profiles(3)
+        self.post, = create_posts(self.profiles[0])
+        self.ct_post = ContentType.objects.get_for_model(Post)
+
+    def click(self, profile, reaction, barrier, toggles):
+        barrier.wait()
+        try:
+            for _ in range(self.clicks_per_thread):
+                while True:
+                    try:
+                        add_remove_reaction(profile, self.ct_post, self.post.pk, reaction)
+                        break
+                    except OperationalError:
+                        # Бд заблокирована другим потоком, транзакция откатилась и повторяется
+                        continue
+                toggles[profile.pk] += 1
+        finally:
+            connections.close_all()
+
+    def test_concurrent_clicks_keep_one_reaction_and_exact_counters(self):
+        """Проверка отсутствия дублей и точности счетчиков при одновременных кликах"""
+        toggles = {profile.pk: 0 for profile in self.profiles}
+        barrier = threading.Barrier(len(self.profiles) * self.threads_per_profile)
+        threads = [
+            threading.Thread(target=self.click, args=(profile, PostReaction.LIKE, barrier, toggles))
+            for profile in self.profiles
+            for _ in range(self.threads_per_profile)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for profile in self.profiles:
+            self.assertEqual(PostReaction.objects.filter(profile=profile).count(), toggles[profile.pk] % 2)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, PostReaction.objects.filter(reaction=PostReaction.LIKE).count())
+        self.assertEqual(self.post.dislikes_count, 0)
+
+
+class AddNewTagTest(TestCase):
+    """Тесты для создания тегов из строки пользователя"""
+
+    def setUp(self) -> None:
+        self.profile, = create_profiles()
+        self.existing = Tag.objects.create(title='python', author=self.profile)
+
+    def test_existing_tags_reused_and_missing_created(self):
+        """Проверка использования существующих тегов и создания недостающих"""
+        tags = add_new_tag('#python #django #python', self.profile)
+
+        self.assertEqual([tag.title for tag in tags], ['python', 'django'])
+        self.assertEqual(tags[0], self.existing)
+        self.assertEqual(Tag.objects.get(title='django').author, self.profile)
+
+    def test_tag_with_same_slug_reused(self):
+        """Проверка использования тега с таким же slug вместо создания дубля"""
+        self.assertEqual(add_new_tag('#Python', self.profile), [self.existing])
+
+    def test_cyrillic_tags_get_own_slugs(self):
+        """Проверка того, что разные теги на кириллице не сливаются в один"""
+        hello, = add_new_tag('#привет', self.profile)
+        world, = add_new_tag('#мир', self.profile)
+
+        self.assertNotEqual(hello, world)
+        self.assertEqual((hello.slug, world.slug), ('привет', 'мир'))
+
+    def test_tag_without_slug_skipped(self):
+        """Проверка того, что тег без букв и цифр не создается и не совпадает с другими такими же"""
+        self.assertEqual(add_new_tag('#!!! #python', self.profile), [self.existing])
+        self.assertFalse(Tag.objects.filter(slug='').exists())
+
+    def test_queries_do_not_depend_on_tag_count(self):
+        """Проверка постоянного количества запросов"""
+        with self.assertNumQueries(3):
+            add_new_tag(' '.join(f'#tag{number}' for number in range(15)), self.profile)
@@ -1,13 +1,57 @@
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test import Client, TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from content.models import Post, PostReaction, Comment
-from content.services.view_services import add_remove_reaction
+from content.services.db_routing import REPLICA_ALIAS, replica_generation
+from content.services.tag_index import tag_index
+from content.services.view_counter import view_counter
+from content.services.view_services import add_new_tag, add_remove_reaction
+from content.views import PostsByTagsView
+from followers.models import Follower
 from profiles.models import Profile
 
 
+class HomeViewTest(TestCase):
+    """Тесты для главной страницы авторизованного пользователя"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        User.objects.create_user(username='test_user1', password='password')
+        User.objects.create_user(username='test_user2', password='password')
+        self.profile1 = Profile.objects.get(user__username='test_user1')
+        self.profile2 = Profile.objects.get(user__username='test_user2')
+        Follower.objects.create(recipient=self.profile2, sender=self.profile1)
+        self.own_post = Post.objects.create(title='own post', caption='About own post', author=self.profile1)
+        self.followed_post = Post.objects.create(
+            title='followed post', caption='About followed post', author=self.profile2)
+        Post.objects.create(title='archived post', caption='About archived post', author=self.profile2, archived=True)
+
+    def test_display_own_and_followed_posts(self):
+        """Проверка отображения своих постов и постов профилей из подписок"""
+        self.client.login(username='test_user1', password='password')
+        response = self.client.get(reverse('content:home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'content/home.html')
+        self.assertEqual(list(response.context['posts']), [self.followed_post, self.own_post])
+        self.assertContains(response, f'<a href="{self.own_post.get_absolute_url()}" class="no_underline">own post</a>',
+                            html=True)
+
+
 class ProfilePostsTest(TestCase):
     """Тесты для класса отображения постов пользователя по его имени"""
 
@@ -49,6 +93,79 @@ class ProfilePostsTest(TestCase):
         self.assertTrue(len(profile_posts_list), 5)
 
 
+class PostsByTagViewTest(TestCase):
+    """Тесты для страниц постов по тегам"""
+
+    def setUp(self) -> None:
+        tag_index.reset()
+        User.objects.create_user(username='test_user1', password='password')
+        profile = Profile.objects.first()
+        self.python, self.py, self.django = add_new_tag('#python #py #django', profile)
+        self.post1 = Post.objects.create(title='post1', caption='About post1', author=profile)
+        self.post2 = Post.objects.create(title='post2', caption='About post2', author=profile)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post1.tags.set([self.python, self.django])
+            self.post2.tags.set([self.py, self.django])
+
+    def test_tag_page_matches_exact_slug(self):
+        """Проверка того, что страница тега не показывает посты с похожими тегами"""
+        response = self.client.get(reverse('content:posts_by_tag', kwargs={'tag': 'py'}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), [self.post2])
+
+    def test_cyrillic_tag_page(self):
+        """Проверка страницы тега на кириллице и ссылки на нее из карточки поста"""
+        tag, = add_new_tag('#привет', self.python.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post1.tags.add(tag)
+        url = reverse('content:posts_by_tag', kwargs={'tag': tag.slug})
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), [self.post1])
+        self.assertContains(self.client.get(reverse('content:posts_by_tag', kwargs={'tag': 'python'})),
+                            f'href="{url}"')
+
+    def test_current_tag_not_linked(self):
+        """Проверка того, что теги открытой страницы выводятся в карточке текстом, а остальные ссылками"""
+        response = self.client.get(reverse('content:posts_by_tag', kwargs={'tag': 'python'}))
+
+        self.assertNotContains(response, f'href="{reverse("content:posts_by_tag", kwargs={"tag": "python"})}"')
+        self.assertContains(response, f'href="{reverse("content:posts_by_tag", kwargs={"tag": "django"})}"')
+
+        response = self.client.get(reverse('content:posts_by_tags'), {'tags': 'python,django'})
+
+        self.assertNotContains(response, f'href="{reverse("content:posts_by_tag", kwargs={"tag": "django"})}"')
+
+    def test_posts_by_several_tags(self):
+        """Проверка выборки постов по нескольким тегам в режимах and и or"""
+        url = reverse('content:posts_by_tags')
+
+        response = self.client.get(url, {'tags': 'python,django'})
+        self.assertEqual(list(response.context['posts']), [self.post1])
+
+        response = self.client.get(url, {'tags': 'python,py', 'mode': 'or'})
+        self.assertEqual(list(response.context['posts']), [self.post2, self.post1])
+
+    def test_posts_by_tags_pagination_keeps_query(self):
+        """Проверка сохранения тегов в ссылке на следующую страницу"""
+        request = RequestFactory().get(reverse('content:posts_by_tags'), {'tags': 'django'})
+        request.profile = None
+        response = PostsByTagsView.as_view(paginate_by=1)(request)
+
+        self.assertEqual(list(response.context_data['posts']), [self.post2])
+        self.assertIn('tags=django', response.context_data['page'].next_query)
+
+    def test_wrong_mode_returns_404(self):
+        """Проверка возвращения 404 ошибки для неизвестного режима"""
+        response = self.client.get(reverse('content:posts_by_tags'), {'tags': 'python', 'mode': 'xor'})
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
 class PostDetailTest(TestCase):
     """Тесты для класса отображения полной информации поста по его id"""
 
@@ -81,6 +198,27 @@ class PostDetailTest(TestCase):
 
         self.assertEqual(response.context['post'].views, 1)
 
+    def test_comment_tree_is_cached_until_comments_change(self):
+        """Проверка того, что дерево комментариев берется из кеша и обновляется после нового комментария"""
+        cache.clear()
+        Comment.objects.create(post=self.post1, profile=self.profile1, text='first comment')
+        url = reverse('content:post_detail', kwargs={'post_id': self.post1.id})
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse([query for query in queries if 'content_comment' in query['sql']])
+        self.assertContains(response, 'first comment')
+
+        self.client.login(username='test_user1', password='password')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('content:add_comment', kwargs={'post_id': self.post1.pk}),
+                             data={'text': 'second comment'})
+        response = self.client.get(url)
+
+        self.assertContains(response, 'second comment')
+        self.assertEqual(response.context['comments_count'], 2)
+
 
 class AddPostViewTest(TestCase):
     """Тесты для класса добавления нового профиля"""
@@ -128,6 +266,20 @@ class AddPostViewTest(TestCase):
         self.assertRedirects(response, reverse('profiles:home'))
         self.assertEqual(len(post_list), 1)
 
+    def test_add_post_queries_do_not_depend_on_tag_count(self):
+        """Проверка того, что количество запросов при добавлении поста не зависит от количества тегов"""
+        self.client.login(username='test_user1', password='password')
+        self.client.post(reverse('content:add_post'), data=dict(self.valid_data, tags='#tag0'))
+        queries = []
+        for tags_count in (2, 15):
+            data = dict(self.valid_data, tags=' '.join(f'#tag{number}' for number in range(tags_count)))
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(reverse('content:add_post'), data=data)
+            queries.append(len(context))
+
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(Post.objects.last().tags.count(), 15)
+
     def test_add_post_with_invalid_title(self):
         """Проверка добавления поста с пустым полем заголовка"""
         self.client.login(username='test_user1', password='password')
@@ -259,6 +411,29 @@ class PostReactionViewTest(TestCase):
         dislike = PostReaction.objects.filter().count()
         self.assertEqual(dislike, 1)
 
+    def test_reaction_counters(self):
+        """Проверка счетчиков лайков и дизлайков поста при добавлении, смене и удалении реакции"""
+        add_remove_reaction(**self.valid_data)
+        self.test_post.refresh_from_db()
+        self.assertEqual((self.test_post.likes_count, self.test_post.dislikes_count), (1, 0))
+
+        self.valid_data['reaction'] = 2
+        add_remove_reaction(**self.valid_data)
+        self.test_post.refresh_from_db()
+        self.assertEqual((self.test_post.likes_count, self.test_post.dislikes_count), (0, 1))
+
+        add_remove_reaction(**self.valid_data)
+        self.test_post.refresh_from_db()
+        self.assertEqual((self.test_post.likes_count, self.test_post.dislikes_count), (0, 0))
+
+    def test_wrong_reaction_returns_404(self):
+        """Проверка возвращения 404 ошибки для неизвестной реакции"""
+        self.client.login(username='test_user1', password='password')
+        response = self.client.get(
+            reverse('content:post_reaction', kwargs={'post_id': self.test_post.pk, 'reaction': 3}))
+
+        self.assertEqual(response.status_code, 404)
+
 
 class AddCommentViewTest(TestCase):
     """Тесты для класса добавления комментария"""
@@ -282,3 +457,305 @@ class AddCommentViewTest(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertEqual(comments, 1)
+
+
+class EditCommentViewTest(TestCase):
+    """Тесты для класса изменения комментария"""
+
+    def setUp(self) -> None:
+        User.objects.create_user(username='test_user1', password='password')
+        User.objects.create_user(username='test_user2', password='password')
+        self.profile1 = Profile.objects.get(user__username='test_user1')
+        post = Post.objects.create(title='test post1', caption='About test post1', author=self.profile1)
+        self.comment = Comment.objects.create(post=post, profile=self.profile1, text='hello')
+
+    def test_author_can_edit_comment(self):
+        """Проверка изменения комментария его автором"""
+        self.client.login(username='test_user1', password='password')
+        response = self.client.post(reverse('content:edit_comment', kwargs={'comment_id': self.comment.pk}),
+                                    data={'text': 'changed'}, HTTP_REFERER='/')
+        self.comment.refresh_from_db()
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.comment.text, 'changed')
+
+    def test_other_user_cannot_edit_or_delete_comment(self):
+        """Проверка возвращения 404 при изменении или удалении чужого комментария"""
+        self.client.login(username='test_user2', password='password')
+        edit = self.client.post(reverse('content:edit_comment', kwargs={'comment_id': self.comment.pk}),
+                                data={'text': 'changed'})
+        delete = self.client.post(reverse('content:delete_comment', kwargs={'comment_id': self.comment.pk}))
+        self.comment.refresh_from_db()
+
+        self.assertEqual(edit.status_code, 404)
+        self.assertEqual(delete.status_code, 404)
+        self.assertEqual(self.comment.text, 'hello')
+        self.assertFalse(self.comment.deleted)
+
+
+@override_settings(COMMENT_THREADS_PAGE_SIZE=1, COMMENT_THREAD_DEPTH=1, VIEW_COUNTER_FLUSH_INTERVAL=0)
+class CommentThreadsViewTest(TestCase):
+    """Тесты для догрузки веток комментариев и ответов"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        User.objects.create_user(username='test_user1', password='password')
+        profile = Profile.objects.first()
+        self.post = Post.objects.create(title='test post1', caption='About test post1', author=profile)
+        self.first = Comment.objects.create(post=self.post, profile=profile, text='first thread')
+        Comment.objects.create(post=self.post, profile=profile, text='hidden reply', parent=self.first)
+        Comment.objects.create(post=self.post, profile=profile, text='second thread')
+
+    def test_detail_page_shows_first_page_of_threads(self):
+        """Проверка того, что на странице поста есть только первая ветка без ответов"""
+        response = self.client.get(reverse('content:post_detail', kwargs={'post_id': self.post.pk}))
+
+        self.assertContains(response, 'first thread')
+        self.assertNotContains(response, 'hidden reply')
+        self.assertNotContains(response, 'second thread')
+        self.assertEqual(response.context['comments_count'], 3)
+
+    def test_load_next_threads_and_replies(self):
+        """Проверка догрузки следующей ветки и ответов в JSON"""
+        response = self.client.get(reverse('content:comment_threads', kwargs={'post_id': self.post.pk}),
+                                   {'after': self.first.tree_id})
+
+        self.assertIn('second thread', response.json()['html'])
+        self.assertIsNone(response.json()['next'])
+
+        response = self.client.get(reverse('content:comment_replies', kwargs={'comment_id': self.first.pk}))
+
+        self.assertIn('hidden reply', response.json()['html'])
+
+    def test_raise_404_for_wrong_cursor(self):
+        """Проверка возвращения 404 для неправильного курсора"""
+        response = self.client.get(reverse('content:comment_threads', kwargs={'post_id': self.post.pk}),
+                                   {'after': 'abc'})
+
+        self.assertEqual(response.status_code, 404)
+
+
+class SearchViewTest(TestCase):
+    """Тесты для страницы и JSON поиска постов"""
+
+    def setUp(self) -> None:
+        User.objects.create_user(username='test_user1', password='password')
+        profile = Profile.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(title='Кофе по-восточному', caption='Рецепт', author=profile)
+
+    def test_search_page(self):
+        """Проверка страницы результатов поиска"""
+        response = self.client.get(reverse('content:search'), {'q': 'кофе'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), [self.post])
+
+    def test_search_json(self):
+        """Проверка JSON с результатами поиска"""
+        response = self.client.get(reverse('content:search_json'), {'q': 'рецепт'})
+
+        self.assertEqual([result['id'] for result in response.json()['results']], [self.post.pk])
+        self.assertIsNone(response.json()['next'])
+
+    def test_raise_404_for_wrong_page(self):
+        """Проверка возвращения 404 для неправильного номера страницы"""
+        response = self.client.get(reverse('content:search'), {'q': 'кофе', 'cursor': 'abc'})
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=3600)
+class ConditionalGetTest(TestCase):
+    """Тесты для ответов 304 Not Modified по ETag"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        User.objects.create_user(username='test_user1', password='password')
+        User.objects.create_user(username='test_user2', password='password')
+        self.profile1 = Profile.objects.get(user__username='test_user1')
+        self.profile2 = Profile.objects.get(user__username='test_user2')
+        self.post = Post.objects.create(title='test post1', caption='About test post1', author=self.profile1)
+
+    def tearDown(self) -> None:
+        view_counter.clear()
+
+    def test_post_detail_not_modified_until_comment_added(self):
+        """Проверка ответа 304 для неизмененного поста и 200 после нового комментария"""
+        url = reverse('content:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        self.assertIn('private', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(view_counter.pending(self.post.pk), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, profile=self.profile2, text='hello')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_posts_not_modified_with_cheap_queries(self):
+        """Проверка ответа 304 для страницы постов профиля без загрузки постов"""
+        url = reverse('content:profile_posts_list', kwargs={'profile_slug': self.profile1.slug})
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+        Post.objects.create(title='test post2', caption='About test post2', author=self.profile1)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_profile_posts_modified_after_follow(self):
+        """Проверка того, что подписка меняет страницу профиля для подписавшегося"""
+        url = reverse('content:profile_posts_list', kwargs={'profile_slug': self.profile1.slug})
+        self.client.login(username='test_user2', password='password')
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.create(recipient=self.profile1, sender=self.profile2)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_viewer(self):
+        """Проверка того, что другой пользователь не получает чужую страницу из кеша"""
+        url = reverse('content:home')
+        self.client.login(username='test_user1', password='password')
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.login(username='test_user2', password='password')
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_changes_after_login(self):
+        """Проверка того, что после повторного входа форма страницы получает новый токен CSRF"""
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('content:post_detail', kwargs={'post_id': self.post.pk})
+        self.login(client)
+        etag = client.get(url)['ETag']
+        client.get(reverse('profiles:logout'))
+        self.login(client)
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        response = client.post(reverse('content:add_comment', kwargs={'post_id': self.post.pk}),
+                               {'text': 'hello', 'csrfmiddlewaretoken': response.context['csrf_token']},
+                               HTTP_REFERER='/')
+        self.assertEqual(response.status_code, 302)
+
+    def login(self, client):
+        client.get(reverse('profiles:login'))
+        client.post(reverse('profiles:login'), {
+            'username': 'test_user2', 'password': 'password',
+            'csrfmiddlewaretoken': client.cookies[settings.CSRF_COOKIE_NAME].value,
+        })
+
+
+@override_settings(REPLICA_READS_ENABLED=True)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Тесты для чтения страниц из реплики и чтения своих записей из основной бд"""
+
+    # Реплика в тестах - зеркало основной бд с отдельным соединением, оно видит только закоммиченные данные
+    databases = {'default', REPLICA_ALIAS}
+
+    def setUp(self) -> None:
+        cache.clear()
+        User.objects.create_user(username='test_user1', password='password')
+        self.profile = Profile.objects.first()
+        self.post = Post.objects.create(title='test post1', caption='About test post1', author=self.profile)
+        self.url = reverse('content:post_detail', kwargs={'post_id': self.post.pk})
+
+    def tearDown(self) -> None:
+        view_counter.clear()
+
+    def test_read_only_view_reads_from_replica(self):
+        """Проверка того, что страница поста читается из реплики"""
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica_queries.captured_queries)
+        self.assertNotIn('primary_until', response.cookies)
+
+    def test_own_comment_read_from_primary_after_write(self):
+        """Проверка того, что после записи пользователь читает страницы из основной бд"""
+        self.client.login(username='test_user1', password='password')
+        response = self.client.post(reverse('content:add_comment', kwargs={'post_id': self.post.pk}),
+                                    data={'text': 'hello'})
+
+        self.assertIn('primary_until', response.cookies)
+
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(replica_queries.captured_queries, [])
+        self.assertContains(response, 'hello')
+
+    @override_settings(REPLICA_READS_ENABLED=False)
+    def test_replica_disabled(self):
+        """Проверка того, что без REPLICA_READS_ENABLED все запросы идут в основную бд"""
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            self.client.get(self.url)
+
+        self.assertEqual(replica_queries.captured_queries, [])
+
+    def sqlite_files(self, directory):
+        """Пути основной бд с одной таблицей и реплики во временном каталоге вместо бд тестов"""
+        source, target = os.path.join(directory, 'primary.sqlite3'), os.path.join(directory, 'replica.sqlite3')
+        with sqlite3.connect(source) as source_db:
+            source_db.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        source_db.close()
+        return source, target
+
+    def test_sync_replica_changes_generation(self):
+        """Проверка того, что sync_replica делает снимок основной бд, а номер снимка меняется с каждым снимком"""
+        with tempfile.TemporaryDirectory() as directory:
+            source, target = self.sqlite_files(directory)
+            with mock.patch.dict(connections['default'].settings_dict, {'NAME': source}), \
+                    mock.patch.dict(connections[REPLICA_ALIAS].settings_dict, {'NAME': target}):
+                self.assertIsNone(replica_generation())
+                call_command('sync_replica', '--once', stdout=StringIO())
+                first = replica_generation()
+                call_command('sync_replica', '--once', stdout=StringIO())
+                second = replica_generation()
+
+            with sqlite3.connect(target) as target_db:
+                tables = target_db.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+            target_db.close()
+
+        self.assertIsNotNone(first)
+        self.assertNotEqual(first, second)
+        self.assertEqual(tables, [('item',)])
+
+    def test_sync_replica_repeats_snapshots(self):
+        """Проверка того, что без --once sync_replica делает снимки с паузой --interval"""
+        stdout = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            source, target = self.sqlite_files(directory)
+            with mock.patch.dict(connections['default'].settings_dict, {'NAME': source}), \
+                    mock.patch.dict(connections[REPLICA_ALIAS].settings_dict, {'NAME': target}), \
+                    mock.patch('content.management.commands.sync_replica.time.sleep',
+                               side_effect=[None, KeyboardInterrupt]) as sleep:
+                with self.assertRaises(KeyboardInterrupt):
+                    call_command('sync_replica', '--interval', '2', stdout=stdout)
+
+        self.assertEqual(stdout.getvalue().count('Снимок'), 2)
+        sleep.assert_called_with(2.0)
+
+    def test_sync_replica_only_for_sqlite(self):
+        """Проверка ошибки sync_replica для бд не на SQLite"""
+        with mock.patch.object(connections[REPLICA_ALIAS], 'vendor', 'postgresql'):
+            with self.assertRaises(CommandError):
+                call_command('sync_replica', '--once', stdout=StringIO())
@@ -8,13 +8,18 @@ urlpatterns = [
     path('home/', views.HomeView.as_view(), name='home'),
     path('posts/<slug:profile_slug>/', views.ProfilePostsView.as_view(), name='profile_posts_list'),
     path('archived-posts/', views.ArchivedPostsView.as_view(), name='archived_posts'),
-    path('posts-by-tag/<slug:tag>/', views.PostsByTagView.as_view(), name='posts_by_tag'),
+    path('posts-by-tag/<str:tag>/', views.PostsByTagView.as_view(), name='posts_by_tag'),
+    path('posts-by-tags/', views.PostsByTagsView.as_view(), name='posts_by_tags'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('search/json/', views.SearchJsonView.as_view(), name='search_json'),
     path('post-detail/<int:post_id>/', views.PostDetailView.as_view(), name='post_detail'),
     path('add-post/', views.AddPostView.as_view(), name='add_post'),
     path('edit-post/<int:post_id>/', views.EditPostView.as_view(), name='edit_post'),
     path('delete-post/<int:pk>/', views.DeletePostView.as_view(), name='delete_post'),
     path('post-reaction/<int:post_id>/<int:reaction>/', views.PostReactionView.as_view(), name='post_reaction'),
     path('post/<int:post_id>/add-comment/', views.AddCommentView.as_view(), name='add_comment'),
+    path('post/<int:post_id>/comments/', views.CommentThreadsView.as_view(), name='comment_threads'),
+    path('comment-replies/<int:comment_id>/', views.CommentRepliesView.as_view(), name='comment_replies'),
     path('edit-comment/<int:comment_id>/', views.EditCommentView.as_view(), name='edit_comment'),
     path('delete-comment/<int:comment_id>/', views.DeleteCommentView.as_view(), name='delete_comment'),
     path(
@@ -1,19 +1,113 @@
+import hashlib
+import time
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.contenttypes.models import ContentType
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
 from django.views import View
+from django.views.static import serve
 from django.views.generic import TemplateView, FormView, DeleteView
-from django.db.models import Q, Count
 
 from content.forms import AddEditPostForm, AddCommentForm
-from content.models import Post, PostReaction, Comment
+from content.models import Post, Comment
+from content.services import db_routing
+from content.services.card_services import card_dependencies, get_post_card_versions, render_post_cards
+from content.services.comment_services import render_comment_threads, render_comment_replies
+from content.services.invalidation import PROFILE, COMMENTS, FOLLOWS, get_dependency_versions
+from content.services.pagination import decode_cursor, keyset_filter, paginate_queryset, paginate_ids
+from content.services.search_services import search_posts
+from content.services.tag_index import tag_index
+from content.services.timeline_services import get_feed, get_feed_keys
+from content.services.view_counter import view_counter
 from content.services.view_services import add_new_tag, add_remove_reaction
+from content.storage import is_content_addressed
 from followers.models import Follower
 from profiles.models import Profile
 
 
+class PostsPaginationMixin:
+    """Keyset-пагинация списков постов по курсору из параметра cursor"""
+    paginate_by = settings.POSTS_PAGE_SIZE
+
+    def get_cursor_token(self):
+        return self.request.GET.get('cursor')
+
+    def keep_query(self, page):
+        """Сохранение остальных параметров запроса в ссылках на соседние страницы"""
+        page.query = self.request.GET.copy()
+        page.query.pop('cursor', None)
+        return page
+
+    def paginate_posts(self, posts):
+        return self.keep_query(paginate_queryset(posts, self.get_cursor_token(), self.paginate_by))
+
+
+class ConditionalGetMixin:
+    """Ответ 304 Not Modified по ETag до запросов и рендера страницы
+
+    ETag строится из get_etag_parts - версий из кеша и легких запросов по индексам, - зрителя и параметров запроса.
+    Страницы персональные и меняются после действий пользователя, поэтому браузер кеширует их
+    только у себя и проверяет при каждом открытии.
+    """
+    cache_control = {'private': True, 'no_cache': True}
+
+    def get_etag_parts(self, request, *args, **kwargs):
+        """Все, от чего зависит страница, None - без ETag"""
+        return None
+
+    def not_modified(self, request, *args, **kwargs):
+        """Действия, которые выполняются и при ответе 304"""
+
+    def get_etag(self, request, *args, **kwargs):
+        parts = self.get_etag_parts(request, *args, **kwargs)
+        if parts is None:
+            return None
+
+        profile = request.profile
+        # Токен CSRF в формах страницы меняется при входе, поэтому страница из кеша браузера с ним устаревает.
+        # get_token создает cookie CSRF, если его еще нет, чтобы ETag первого ответа совпал со следующим запросом
+        get_token(request)
+        viewer = (request.user.pk, profile and (profile.pk, profile.name), get_language(), request.GET.urlencode(),
+                  request.META['CSRF_COOKIE'])
+        # Страница из реплики может отставать от версий в кеше, поэтому ETag меняется с каждым ее снимком
+        replica = db_routing.replica_generation() if db_routing.reads_from_replica() else None
+        return quote_etag(hashlib.md5(repr((viewer, replica, parts)).encode()).hexdigest())
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        etag = self.get_etag(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag) if etag else None
+        if response is not None:
+            self.not_modified(request, *args, **kwargs)
+        else:
+            response = super().dispatch(request, *args, **kwargs)
+            if etag and response.status_code == 200:
+                response['ETag'] = etag
+
+        patch_cache_control(response, **self.cache_control)
+        return response
+
+    def get_page_versions(self, posts):
+        """id и версии карточек постов страницы, posts - упорядоченный queryset, читаются только id и автор"""
+        post_ids = list(posts.values_list('id', 'author_id'))
+        versions = get_post_card_versions(post_ids)
+        return [(post_id, versions[post_id]) for post_id, _ in post_ids]
+
+    def get_keyset_page_versions(self, posts):
+        """Версии карточек страницы keyset-пагинации вместе с первой записью следующей страницы"""
+        return self.get_page_versions(
+            keyset_filter(posts, decode_cursor(self.get_cursor_token()))[:self.paginate_by + 1])
+
+
 class MasterView(TemplateView):
     """Отображение первичной страницы"""
     template_name = 'content/master.html'
@@ -21,11 +115,7 @@ class MasterView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        user = self.request.user
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = self.request.profile
 
         context['title'] = "TyWe"
         context['used_profile'] = profile
@@ -33,129 +123,194 @@ class MasterView(TemplateView):
         return context
 
 
-class HomeView(LoginRequiredMixin, TemplateView):
+class HomeView(LoginRequiredMixin, ConditionalGetMixin, PostsPaginationMixin, TemplateView):
     """Главная страница для авторизованных пользователей"""
+    read_from_replica = True
     template_name = 'content/home.html'
 
+    def get_etag_parts(self, request, *args, **kwargs):
+        page = get_feed_keys(request.profile, decode_cursor(self.get_cursor_token()), self.paginate_by)
+        post_ids = [post_id for _, post_id in page.object_list]
+        posts = Post.objects.filter(pk__in=post_ids).order_by('-publication_date', '-id')
+        return self.get_page_versions(posts), page.has_next, page.has_previous
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        user = self.request.user
+        profile = self.request.profile
 
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        page = self.keep_query(get_feed(profile, decode_cursor(self.get_cursor_token()), self.paginate_by))
 
-        recipients_posts = Post.objects.filter(
-            author__recipients__sender=profile,
-            archived=False
-        ).annotate(
-            likes=Count('reaction', filter=Q(reaction__reaction=PostReaction.LIKE)),
-            dislikes=Count('reaction', filter=Q(reaction__reaction=PostReaction.DISLIKE))
-        ).prefetch_related(
-            'tags'
-        ).select_related(
-            'author'
-        ).prefetch_related('comments')
-        profile_posts = Post.objects.filter(author=profile)
-        posts = (recipients_posts | profile_posts).order_by('-publication_date')
-
-        context['posts'] = posts
+        context['posts'] = render_post_cards(page.object_list)
+        context['page'] = page
         context['used_profile'] = profile
 
         return context
 
 
-class ArchivedPostsView(LoginRequiredMixin, TemplateView):
+class ArchivedPostsView(LoginRequiredMixin, PostsPaginationMixin, TemplateView):
     """Отображение архивированных постов"""
+    read_from_replica = True
     template_name = 'content/archived_posts.html'
     login_url = reverse_lazy('profiles:login')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        user = self.request.user
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = self.request.profile
 
         posts = Post.objects.filter(
             author=profile,
             archived=True
-        ).annotate(
-            likes=Count('reaction', filter=Q(reaction__reaction=PostReaction.LIKE)),
-            dislikes=Count('reaction', filter=Q(reaction__reaction=PostReaction.DISLIKE))
-        ).order_by('-publication_date')
+        )
+        page = self.paginate_posts(posts)
 
-        context['posts'] = posts
+        context['posts'] = render_post_cards(page.object_list)
+        context['page'] = page
         context['used_profile'] = profile
 
         return context
 
 
-class PostsByTagView(TemplateView):
+class PostsByTagView(ConditionalGetMixin, PostsPaginationMixin, TemplateView):
     """Вывод постов по их хэштегу"""
+    read_from_replica = True
     template_name = 'content/posts_by_tag.html'
 
+    def get_etag_parts(self, request, tag, **kwargs):
+        return self.get_keyset_page_versions(Post.objects.filter(tags__slug=tag, archived=False))
+
     def get_context_data(self, tag, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        user = self.request.user
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = self.request.profile
 
         posts = Post.objects.filter(
-            tags__slug__contains=tag,
+            tags__slug=tag,
             archived=False
-        ).annotate(
-            likes=Count('reaction', filter=Q(reaction__reaction=PostReaction.LIKE)),
-            dislikes=Count('reaction', filter=Q(reaction__reaction=PostReaction.DISLIKE))
-        ).order_by('-publication_date')
+        )
+        page = self.paginate_posts(posts)
 
-        context['posts'] = posts
+        context['posts'] = render_post_cards(page.object_list, current_tags=[tag])
+        context['page'] = page
         context['used_profile'] = profile
-        context['tag_slug'] = tag
 
         return context
 
 
-class ProfilePostsView(TemplateView):
+class PostsByTagsView(PostsPaginationMixin, TemplateView):
+    """Вывод постов по нескольким хэштегам: ?tags=tag1,tag2&mode=and (все теги) или mode=or (любой тег)"""
+    read_from_replica = True
+    template_name = 'content/posts_by_tag.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        tag_slugs = [slug for slug in self.request.GET.get('tags', '').split(',') if slug]
+        mode = self.request.GET.get('mode', 'and')
+        if not tag_slugs or mode not in ('and', 'or'):
+            raise Http404
+
+        # Пересечение и объединение считаются в памяти по спискам id постов каждого тега
+        if mode == 'and':
+            post_ids = tag_index.intersection(tag_slugs)
+        else:
+            post_ids = tag_index.union(tag_slugs)
+
+        posts = Post.objects.filter(archived=False).select_related('author')
+        page = self.keep_query(
+            paginate_ids(posts, post_ids, decode_cursor(self.get_cursor_token()), self.paginate_by))
+
+        context['posts'] = render_post_cards(page.object_list, current_tags=tag_slugs)
+        context['page'] = page
+        context['used_profile'] = self.request.profile
+
+        return context
+
+
+class SearchView(PostsPaginationMixin, TemplateView):
+    """Поиск постов по заголовку, тексту и тегам: ?q=запрос"""
+    read_from_replica = True
+    template_name = 'content/posts_by_tag.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        query = self.request.GET.get('q', '')
+        page = self.keep_query(search_posts(query, self.get_cursor_token(), self.paginate_by))
+
+        context['posts'] = render_post_cards(page.object_list)
+        context['page'] = page
+        context['used_profile'] = self.request.profile
+        context['search_query'] = query
+
+        return context
+
+
+class SearchJsonView(PostsPaginationMixin, View):
+    """Поиск постов в JSON: ?q=запрос&cursor=страница"""
+    read_from_replica = True
+
+    def get(self, request):
+        page = search_posts(request.GET.get('q', ''), self.get_cursor_token(), self.paginate_by)
+
+        return JsonResponse({
+            'results': [
+                {
+                    'id': post.pk,
+                    'title': post.title,
+                    'caption': post.caption,
+                    'author': str(post.author),
+                    'tags': [tag.title for tag in post.tags.all()],
+                    'url': post.get_absolute_url(),
+                }
+                for post in page
+            ],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+
+class ProfilePostsView(ConditionalGetMixin, PostsPaginationMixin, TemplateView):
     """Страница с постами пользователя"""
+    read_from_replica = True
     template_name = 'content/profile_posts_list.html'
 
+    def get_etag_parts(self, request, profile_slug, **kwargs):
+        author_id = Profile.objects.filter(slug=profile_slug).values_list('id', flat=True).first()
+        if author_id is None:
+            return None
+
+        # Кнопка подписки зависит от подписок зрителя
+        dependencies = [(PROFILE, author_id)]
+        if request.profile is not None:
+            dependencies.append((FOLLOWS, request.profile.pk))
+
+        return (
+            get_dependency_versions(dependencies),
+            self.get_keyset_page_versions(Post.objects.filter(author_id=author_id, archived=False))
+        )
+
     def get_context_data(self, profile_slug, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        user = self.request.user
-
         try:
             author = Profile.objects.get(slug=profile_slug)
         except Profile.DoesNotExist:
             raise Http404
 
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = self.request.profile
 
         posts = Post.objects.filter(
             author=author,
             archived=False
-        ).annotate(
-            likes=Count('reaction', filter=Q(reaction__reaction=PostReaction.LIKE)),
-            dislikes=Count('reaction', filter=Q(reaction__reaction=PostReaction.DISLIKE))
-        ).prefetch_related(
-            'comments',
-            'tags'
         ).select_related('author')
+        page = self.paginate_posts(posts)
 
         follow_status = Follower.objects.filter(recipient=author, sender=profile).exists()
 
-        context['posts'] = posts
+        context['posts'] = render_post_cards(page.object_list)
+        context['page'] = page
         context['author'] = author
         context['used_profile'] = profile
         context['follow_status'] = follow_status
@@ -163,46 +318,53 @@ class ProfilePostsView(TemplateView):
         return context
 
 
-class PostDetailView(TemplateView):
+class PostDetailView(ConditionalGetMixin, TemplateView):
     """Страница с отображением подробной информации поста"""
+    read_from_replica = True
     template_name = 'content/post_detail.html'
 
+    def get_etag_parts(self, request, post_id, **kwargs):
+        post = Post.objects.filter(pk=post_id).values_list('author_id', 'author__user_id', 'archived').first()
+        if post is None:
+            return None
+
+        author_id, author_user_id, archived = post
+        if archived and author_user_id != request.user.pk:
+            return None
+
+        return get_dependency_versions([*card_dependencies(post_id, author_id), (COMMENTS, post_id)])
+
+    def not_modified(self, request, post_id, **kwargs):
+        # Просмотр засчитывается и тогда, когда страница взята из кеша браузера
+        view_counter.add(post_id)
+
     def get_context_data(self, post_id, **kwargs):
         context = super().get_context_data(**kwargs)
 
         user = self.request.user
 
         try:
-            post = Post.objects.prefetch_related(
-                'author__user'
-            ).annotate(
-                likes=Count('reaction', filter=Q(reaction__reaction=PostReaction.LIKE)),
-                dislikes=Count('reaction', filter=Q(reaction__reaction=PostReaction.DISLIKE))
-            ).get(id=post_id)
+            post = Post.objects.prefetch_related('author__user').get(id=post_id)
         except Post.DoesNotExist:
             raise Http404
 
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
-
-        comments = Comment.objects.filter(
-            post=post
-        ).annotate(
-            likes=Count('reaction', filter=Q(reaction__reaction=PostReaction.LIKE)),
-            dislikes=Count('reaction', filter=Q(reaction__reaction=PostReaction.DISLIKE))
-        ).select_related('profile', 'profile__user')
+        profile = self.request.profile
+
+        # Первая страница веток комментариев рендерится один раз на версию и берется из кеша,
+        # остальные ветки и глубокие ответы догружаются через CommentThreadsView и CommentRepliesView
+        threads = render_comment_threads(post.pk)
         form = AddCommentForm()
 
-        post.views += 1
-        post.save(update_fields=['views'])
+        # Просмотр копится в буфере, на странице показывается вместе с еще не записанными просмотрами
+        post.views += view_counter.add(post.pk)
 
         context = {
             'post': post,
-            'likes': post.likes,
-            'dislikes': post.dislikes,
-            'comments': comments,
+            'likes': post.likes_count,
+            'dislikes': post.dislikes_count,
+            'comment_tree': threads['html'],
+            'comments_count': threads['count'],
+            'next_comments': threads['next'],
             'form': form,
             'used_profile': profile
         }
@@ -230,10 +392,7 @@ class AddPostView(LoginRequiredMixin, FormView):
         context = super().get_context_data(**kwargs)
 
         user = self.request.user
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = self.request.profile
 
         context = {
             'used_profile': profile,
@@ -284,10 +443,7 @@ class EditPostView(LoginRequiredMixin, FormView):
         except Post.DoesNotExist:
             raise Http404
 
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = self.request.profile
 
         context = {
             'form': self.form_class(instance=post, user=self.request.user),
@@ -340,11 +496,7 @@ class DeletePostView(LoginRequiredMixin, DeleteView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        user = self.request.user
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = self.request.profile
 
         context['used_profile'] = profile
 
@@ -356,14 +508,10 @@ class PostReactionView(LoginRequiredMixin, View):
     login_url = reverse_lazy('profiles:login')
 
     def get(self, request, post_id, reaction):
-        user = request.user
         ct_post = ContentType.objects.get_for_model(Post)
 
         # Получаем основной профиль пользователя
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = request.profile
 
         # Достаем из бд пост с текущей страницы
         try:
@@ -386,13 +534,8 @@ class AddCommentView(LoginRequiredMixin, View):
         return HttpResponseRedirect(self.request.META.get('HTTP_REFERER'))
 
     def post(self, request, post_id):
-        user = request.user
         form = self.form(request.POST)
-
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = request.profile
 
         try:
             post = Post.objects.get(pk=post_id)
@@ -424,10 +567,14 @@ class EditCommentView(LoginRequiredMixin, View):
 
     def post(self, request, comment_id):
         try:
-            comment = Comment.objects.get(pk=comment_id)
+            comment = Comment.objects.select_related('profile').get(pk=comment_id)
         except Comment.DoesNotExist:
             raise Http404
 
+        # Кнопки редактирования скрываются только на странице, поэтому автор проверяется здесь
+        if comment.profile.user_id != request.user.pk:
+            raise Http404
+
         text = request.POST['text']
         comment.text = text
         comment.changed = True
@@ -446,10 +593,14 @@ class DeleteCommentView(LoginRequiredMixin, View):
 
     def post(self, request, comment_id):
         try:
-            comment = Comment.objects.get(pk=comment_id)
+            comment = Comment.objects.select_related('profile').get(pk=comment_id)
         except Comment.DoesNotExist:
             raise Http404
 
+        # Кнопки редактирования скрываются только на странице, поэтому автор проверяется здесь
+        if comment.profile.user_id != request.user.pk:
+            raise Http404
+
         comment.deleted = True
         comment.save(update_fields=['deleted'])
 
@@ -461,13 +612,9 @@ class CommentReactionView(LoginRequiredMixin, View):
     login_url = reverse_lazy('profile:login')
 
     def get(self, request, comment_id, reaction):
-        user = request.user
         ct_comment = ContentType.objects.get_for_model(Comment)
 
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = request.profile
 
         try:
             comment = Comment.objects.get(pk=comment_id)
@@ -477,3 +624,49 @@ class CommentReactionView(LoginRequiredMixin, View):
         add_remove_reaction(profile, ct_comment, comment.pk, reaction)
 
         return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
+
+
+class CommentThreadsView(View):
+    """Следующая страница веток комментариев поста в JSON"""
+    read_from_replica = True
+
+    def get(self, request, post_id):
+        try:
+            post = Post.objects.select_related('author').get(pk=post_id)
+            after = int(request.GET.get('after', 0))
+        except (Post.DoesNotExist, ValueError):
+            raise Http404
+
+        if post.archived and post.author.user_id != request.user.pk:
+            raise Http404
+
+        return JsonResponse(render_comment_threads(post.pk, after))
+
+
+class CommentRepliesView(View):
+    """Скрытые ответы на комментарий в JSON"""
+    read_from_replica = True
+
+    def get(self, request, comment_id):
+        try:
+            comment = Comment.objects.select_related('post__author').get(pk=comment_id)
+        except Comment.DoesNotExist:
+            raise Http404
+
+        if comment.post.archived and comment.post.author.user_id != request.user.pk:
+            raise Http404
+
+        return JsonResponse(render_comment_replies(comment))
+
+
+class MediaView(View):
+    """Раздача медиафайлов при разработке, файлы по хешу содержимого кешируются навсегда"""
+
+    def get(self, request, path):
+        response = serve(request, path, document_root=settings.MEDIA_ROOT)
+        if is_content_addressed(path) and response.status_code == 200:
+            max_age = settings.MEDIA_IMMUTABLE_MAX_AGE
+            patch_cache_control(response, public=True, max_age=max_age, immutable=True)
+            response['Expires'] = http_date(time.time() + max_age)
+
+        return response
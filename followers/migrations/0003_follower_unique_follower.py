@@ -0,0 +1,38 @@
+# Generated by Django 4.0.10 on 2026-10-18 09:34
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_followers(apps, schema_editor):
+    """Удаление повторных подписок, остается первая; счетчик подписчиков адресата пересчитывается"""
+    Follower = apps.get_model('followers', 'Follower')
+    Profile = apps.get_model('profiles', 'Profile')
+
+    duplicates = Follower.objects.values('sender', 'recipient').order_by().annotate(
+        count=Count('id'), first_id=Min('id')).filter(count__gt=1)
+    recipient_ids = set()
+    for duplicate in duplicates:
+        Follower.objects.filter(sender=duplicate['sender'], recipient=duplicate['recipient']).exclude(
+            id=duplicate['first_id']).delete()
+        recipient_ids.add(duplicate['recipient'])
+
+    for recipient_id in recipient_ids:
+        Profile.objects.filter(pk=recipient_id).update(
+            followers_count=Follower.objects.filter(recipient=recipient_id).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('followers', '0002_alter_follower_recipient_alter_follower_sender'),
+        ('profiles', '0004_profile_followers_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_followers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follower',
+            constraint=models.UniqueConstraint(fields=('sender', 'recipient'), name='unique_follower'),
+        ),
+    ]
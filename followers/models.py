@@ -24,3 +24,6 @@ class Follower(models.Model):
     class Meta:
         verbose_name = "Подписчик"
         verbose_name_plural = "подписчики"
+        constraints = [
+            models.UniqueConstraint(fields=['sender', 'recipient'], name='unique_follower')
+        ]
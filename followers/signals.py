@@ -0,0 +1,20 @@
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from profiles.models import Profile
+from .models import Follower
+
+
+@receiver(post_save, sender=Follower)
+def increase_followers_count(sender, instance, created, **kwargs):
+    """Увеличение счетчика подписчиков при новой подписке"""
+    if created:
+        Profile.objects.filter(pk=instance.recipient_id).update(followers_count=F('followers_count') + 1)
+
+
+@receiver(post_delete, sender=Follower)
+def decrease_followers_count(sender, instance, **kwargs):
+    """Уменьшение счетчика подписчиков при отписке"""
+    Profile.objects.filter(pk=instance.recipient_id, followers_count__gt=0).update(
+        followers_count=F('followers_count') - 1)
@@ -1,3 +1,34 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from content.tests.query_budget import Budget, QueryBudgetMixin
+from profiles.models import Profile
+from .models import Follower
+
+
+class FollowersCountTest(TestCase):
+    """Тесты для счетчика подписчиков профиля"""
+
+    def setUp(self) -> None:
+        User.objects.create_user(username='test_user1', password='password')
+        User.objects.create_user(username='test_user2', password='password')
+        self.recipient = Profile.objects.get(user__username='test_user1')
+        self.sender = Profile.objects.get(user__username='test_user2')
+
+    def test_followers_count_follows_subscriptions(self):
+        """Проверка изменения счетчика при подписке и отписке"""
+        follower = Follower.objects.create(recipient=self.recipient, sender=self.sender)
+        self.recipient.refresh_from_db()
+        self.assertEqual(self.recipient.followers_count, 1)
+
+        follower.delete()
+        self.recipient.refresh_from_db()
+        self.assertEqual(self.recipient.followers_count, 0)
+
+
+class FollowersQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Бюджеты SQL-запросов страниц приложения followers"""
+    urls = 'followers.urls'
+    budgets = {
+        'follow': Budget(9, kwargs=lambda data: {'profile_slug': data.other.slug, 'option': 0}),
+    }
@@ -13,13 +13,7 @@ class FollowView(LoginRequiredMixin, View):
     login_url = reverse_lazy('profile:login')
 
     def get(self, request, profile_slug, option):
-        user = request.user
-
-        try:
-            sender = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            sender = Profile.objects.filter(user=user, used=True).first()
-
+        sender = request.profile
         profile = get_object_or_404(Profile, slug=profile_slug)
 
         if int(option):
@@ -29,7 +23,5 @@ class FollowView(LoginRequiredMixin, View):
                 Follower.objects.get(recipient=profile, sender=sender).delete()
             except Follower.DoesNotExist:
                 raise Http404
-            except Follower.MultipleObjectsReturned:
-                Follower.objects.filter(recipient=profile, sender=sender).delete()
 
         return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
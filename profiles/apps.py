@@ -7,4 +7,5 @@ class ProfilesConfig(AppConfig):
     verbose_name = 'Профили'
 
     def ready(self):
+        import profiles.checks
         import profiles.signals
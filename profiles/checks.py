@@ -0,0 +1,8 @@
+from django.core.checks import Tags, register
+
+from content.checks import process_local_cache_warnings
+
+
+@register(Tags.caches, deploy=True)
+def check_profile_index_cache(app_configs, **kwargs):
+    return process_local_cache_warnings('индекс подсказок профилей', 'profiles.W001')
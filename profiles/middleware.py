@@ -0,0 +1,12 @@
+from .services.profile_services import get_active_profile
+
+
+class ActiveProfileMiddleware:
+    """Определение используемого профиля пользователя один раз за запрос (request.profile)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = get_active_profile(request.user)
+        return self.get_response(request)
@@ -0,0 +1,41 @@
+# Generated by Django 4.0.10 on 2026-10-18 08:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_followers_count(apps, schema_editor):
+    """Заполнение счетчика подписчиков для существующих профилей"""
+    Profile = apps.get_model('profiles', 'Profile')
+    Follower = apps.get_model('followers', 'Follower')
+
+    counts = Follower.objects.filter(
+        recipient=OuterRef('pk')
+    ).order_by().values('recipient').annotate(count=Count('pk')).values('count')
+    Profile.objects.update(followers_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('profiles', '0003_profile_used'),
+        ('followers', '0002_alter_follower_recipient_alter_follower_sender'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Подписчики'),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profiles', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.RunPython(fill_followers_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_profile_followers_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['name', 'id'], name='profile_name_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.10 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_profile_name_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота фотографии'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина фотографии'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_profile_avatar_dimensions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(condition=models.Q(('used', True)), fields=['user'], name='profile_used_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pull_authors(apps, schema_editor):
+    """Отметка профилей, посты которых уже не раскладываются по лентам"""
+    Profile = apps.get_model('profiles', 'Profile')
+    Profile.objects.filter(followers_count__gt=settings.TIMELINE_FANOUT_LIMIT).update(timeline_pull=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_profile_used_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='timeline_pull',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Посты достаются при чтении лент'),
+        ),
+        migrations.RunPython(mark_pull_authors, migrations.RunPython.noop),
+    ]
@@ -11,9 +11,13 @@ class Profile(models.Model):
     about = models.TextField('О себе', max_length=500, blank=True, null=True)
     birthday = models.DateField('День рождения', blank=True, null=True)
     avatar = models.ImageField('Фотография', upload_to='user/avatar', blank=True, null=True)
+    avatar_width = models.PositiveIntegerField('Ширина фотографии', blank=True, null=True, editable=False)
+    avatar_height = models.PositiveIntegerField('Высота фотографии', blank=True, null=True, editable=False)
     user = models.ForeignKey(User, verbose_name='Пользователь', on_delete=models.CASCADE, related_name='profiles')
     slug = models.SlugField('URL', unique=True)
     used = models.BooleanField("Используется", default=False)
+    followers_count = models.PositiveIntegerField("Подписчики", default=0)
+    timeline_pull = models.BooleanField("Посты достаются при чтении лент", default=False, editable=False)
 
     def __str__(self):
         return self.name
@@ -27,3 +31,8 @@ class Profile(models.Model):
         verbose_name = "Профиль"
         verbose_name_plural = "Профили"
         ordering = ['user', 'name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='profile_name_idx'),
+            # Используемый профиль ищется на каждый запрос, а у пользователя он один
+            models.Index(fields=['user'], name='profile_used_idx', condition=models.Q(used=True)),
+        ]
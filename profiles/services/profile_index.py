@@ -0,0 +1,112 @@
+import random
+import threading
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+
+from profiles.models import Profile
+
+PROFILE_INDEX_VERSION_KEY = 'profiles:profile_index:version'
+
+
+def _index_keys(name, slug) -> set:
+    return {name.casefold(), slug.casefold()}
+
+
+class ProfilePrefixIndex:
+    """Индекс профилей в памяти для поиска по началу имени или slug
+
+    Хранит отсортированный список пар (ключ, id профиля), поиск по префиксу - двоичный поиск без запросов к бд.
+    Как и индекс тегов, строится при первом обращении, обновляется по сигналам и сверяет версию в общем кеше,
+    который при запуске в несколько процессов должен быть общим (проверка profiles.W001).
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._profiles = {}
+        self._lock = threading.RLock()
+        self._version = None
+
+    def _load(self):
+        profiles = {pk: (name, slug) for pk, name, slug in Profile.objects.values_list('id', 'name', 'slug').iterator()}
+        self._profiles = profiles
+        self._entries = sorted(
+            (key, pk) for pk, (name, slug) in profiles.items() for key in _index_keys(name, slug)
+        )
+
+    def _ensure_fresh(self):
+        version = cache.get(PROFILE_INDEX_VERSION_KEY)
+        if version is None:
+            cache.add(PROFILE_INDEX_VERSION_KEY, random.getrandbits(32), None)
+            version = cache.get(PROFILE_INDEX_VERSION_KEY)
+        if self._version != version:
+            self._load()
+            self._version = version
+
+    def _changed(self):
+        try:
+            version = cache.incr(PROFILE_INDEX_VERSION_KEY)
+        except ValueError:
+            self._version = None
+            return
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+        else:
+            self._version = None
+
+    def _discard(self, profile_id):
+        name_slug = self._profiles.pop(profile_id, None)
+        if name_slug is None:
+            return
+        for key in _index_keys(*name_slug):
+            position = bisect_left(self._entries, (key, profile_id))
+            if position < len(self._entries) and self._entries[position] == (key, profile_id):
+                del self._entries[position]
+
+    def search(self, prefix, limit=10) -> list:
+        """Профили, имя или slug которых начинается с prefix: список (id, имя, slug) в порядке ключей"""
+        prefix = prefix.casefold()
+        if not prefix:
+            return []
+
+        with self._lock:
+            self._ensure_fresh()
+            found = {}
+            position = bisect_left(self._entries, (prefix,))
+            while len(found) < limit and position < len(self._entries):
+                key, profile_id = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault(profile_id, self._profiles[profile_id])
+                position += 1
+
+            return [(profile_id, name, slug) for profile_id, (name, slug) in found.items()]
+
+    def add(self, profile_id, name, slug):
+        """Добавление или обновление профиля"""
+        with self._lock:
+            self._ensure_fresh()
+            self._discard(profile_id)
+            self._profiles[profile_id] = (name, slug)
+            for key in _index_keys(name, slug):
+                insort(self._entries, (key, profile_id))
+            self._changed()
+
+    def remove(self, profile_id):
+        """Удаление профиля"""
+        with self._lock:
+            self._ensure_fresh()
+            self._discard(profile_id)
+            self._changed()
+
+    def reset(self):
+        """Перестроение индекса при следующем обращении во всех процессах"""
+        with self._lock:
+            self._version = None
+            try:
+                cache.incr(PROFILE_INDEX_VERSION_KEY)
+            except ValueError:
+                pass
+
+
+profile_index = ProfilePrefixIndex()
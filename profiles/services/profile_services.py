@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from profiles.models import Profile
+
+ACTIVE_PROFILE_CACHE_KEY = 'profiles:active_profile:{user_id}'
+
+
+def get_active_profile(user):
+    """Используемый профиль пользователя, для анонимного пользователя None без запросов к бд"""
+    if not user.is_authenticated:
+        return None
+
+    key = ACTIVE_PROFILE_CACHE_KEY.format(user_id=user.pk)
+    profile = cache.get(key)
+    if profile is None:
+        profile = Profile.objects.filter(user=user, used=True).first()
+        if profile is not None:
+            cache.set(key, profile, settings.ACTIVE_PROFILE_CACHE_TIMEOUT)
+
+    return profile
+
+
+def invalidate_active_profile(user_id):
+    """Сброс закешированного используемого профиля пользователя"""
+    cache.delete(ACTIVE_PROFILE_CACHE_KEY.format(user_id=user_id))
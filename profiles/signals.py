@@ -1,8 +1,16 @@
+from functools import partial
+
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from content.services.image_services import track_image
+from content.services.invalidation import PROFILE
+from content.services.media_services import track_file
 from .models import Profile
+from .services.profile_index import profile_index
+from .services.profile_services import invalidate_active_profile
 
 
 @receiver(post_save, sender=User)
@@ -17,3 +25,27 @@ def change_used_profile(sender, instance, **kwargs):
     """Изменение используемого аккаунта"""
     Profile.objects.filter(used=True, user=instance.user).update(used=False)
     Profile.objects.filter(pk=instance.pk).update(used=True)
+    invalidate_active_profile(instance.user_id)
+
+
+@receiver(post_delete, sender=Profile)
+def reset_deleted_used_profile(sender, instance, **kwargs):
+    """Сброс закешированного профиля при его удалении"""
+    invalidate_active_profile(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def update_profile_index(sender, instance, **kwargs):
+    """Обновление имени и slug профиля в индексе поиска профилей"""
+    transaction.on_commit(partial(profile_index.add, instance.pk, instance.name, instance.slug))
+
+
+@receiver(post_delete, sender=Profile)
+def remove_profile_from_index(sender, instance, **kwargs):
+    """Удаление профиля из индекса поиска профилей"""
+    transaction.on_commit(partial(profile_index.remove, instance.pk))
+
+
+# Размеры и уменьшенные варианты фотографии профиля
+track_image(Profile, 'avatar', PROFILE)
+track_file(Profile, 'avatar')
@@ -0,0 +1,18 @@
+from django.test import SimpleTestCase, override_settings
+
+from profiles.checks import check_profile_index_cache
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    """Тесты для проверки общего кеша индекса подсказок профилей"""
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_reported(self):
+        """Проверка предупреждения для кеша, который виден только своему процессу"""
+        self.assertEqual([warning.id for warning in check_profile_index_cache(None)], ['profiles.W001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                           'LOCATION': 'redis://127.0.0.1:6379'}})
+    def test_shared_cache_accepted(self):
+        """Проверка отсутствия предупреждения для общего кеша"""
+        self.assertEqual(check_profile_index_cache(None), [])
@@ -0,0 +1,50 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory
+
+from ..middleware import ActiveProfileMiddleware
+from ..models import Profile
+
+
+class ActiveProfileMiddlewareTest(TestCase):
+    """Тесты для определения используемого профиля в запросе"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='test_user', password='password')
+        self.middleware = ActiveProfileMiddleware(lambda request: request)
+
+    def get_request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return self.middleware(request)
+
+    def test_anonymous_user_costs_no_queries(self):
+        """Проверка отсутствия запросов для анонимного пользователя"""
+        with self.assertNumQueries(0):
+            request = self.get_request(AnonymousUser())
+
+        self.assertIsNone(request.profile)
+
+    def test_active_profile_is_cached(self):
+        """Проверка кеширования используемого профиля"""
+        with self.assertNumQueries(1):
+            request = self.get_request(self.user)
+        with self.assertNumQueries(0):
+            self.get_request(self.user)
+
+        self.assertEqual(request.profile, Profile.objects.get(user=self.user, used=True))
+
+    def test_cache_reset_when_used_profile_changed(self):
+        """Проверка сброса кеша при смене используемого профиля"""
+        self.get_request(self.user)
+        new_profile = Profile.objects.create(name='test_profile2', user=self.user)
+
+        self.assertEqual(self.get_request(self.user).profile, new_profile)
+
+    def test_cache_reset_when_profile_deleted(self):
+        """Проверка сброса кеша при удалении используемого профиля"""
+        self.get_request(self.user)
+        Profile.objects.filter(user=self.user).delete()
+
+        self.assertIsNone(self.get_request(self.user).profile)
@@ -0,0 +1,19 @@
+from django.test import TestCase
+
+from content.tests.query_budget import Budget, QueryBudgetMixin
+
+
+class ProfilesQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Бюджеты SQL-запросов страниц приложения profiles"""
+    urls = 'profiles.urls'
+    budgets = {
+        'login': Budget(3),
+        'register': Budget(3),
+        'logout': Budget(5),
+        'profiles': Budget(4),
+        'all_profiles': Budget(4),
+        'profiles_typeahead': Budget(4, query_string='?q=budget'),
+        'add_profile': Budget(3),
+        'edit_profile': Budget(4, kwargs=lambda data: {'profile_slug': data.extra_profile.slug}),
+        'delete_profile': Budget(4, kwargs=lambda data: {'profile_slug': data.extra_profile.slug}),
+    }
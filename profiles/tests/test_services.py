@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..models import Profile
+from ..services.profile_index import profile_index
+
+
+class ProfilePrefixIndexTest(TestCase):
+    """Тесты для индекса поиска профилей по началу имени"""
+
+    def setUp(self) -> None:
+        profile_index.reset()
+        User.objects.create_user(username='alice', password='password')
+        User.objects.create_user(username='alina', password='password')
+        self.profile = Profile.objects.get(name='alice')
+
+    def test_search_by_name_and_slug_prefix(self):
+        """Проверка поиска по началу имени и slug"""
+        self.assertEqual([name for _, name, _ in profile_index.search('ALI')], ['alice', 'alina'])
+        self.assertEqual([name for _, name, _ in profile_index.search(self.profile.slug)], ['alice'])
+        self.assertEqual(profile_index.search('ali', limit=1)[0][1], 'alice')
+
+    def test_index_is_updated_on_save_and_delete(self):
+        """Проверка обновления индекса при изменении и удалении профиля"""
+        profile_index.search('a')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.name = 'bob'
+            self.profile.save()
+
+        with self.assertNumQueries(0):
+            # slug профиля не меняется при смене имени, поэтому он по-прежнему находится по старому началу
+            self.assertEqual([name for _, name, _ in profile_index.search('ali')], ['bob', 'alina'])
+            self.assertEqual([name for _, name, _ in profile_index.search('bob')], ['bob'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.delete()
+
+        self.assertEqual(profile_index.search('bob'), [])
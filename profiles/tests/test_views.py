@@ -1,8 +1,9 @@
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from profiles.models import Profile
+from profiles.services.profile_index import profile_index
 
 
 class LoginUserTest(TestCase):
@@ -292,3 +293,36 @@ class DeleteUserProfileTest(TestCase):
         self.assertRedirects(response, reverse('profiles:profiles'))
 
         self.assertEqual(len(profile_list), 1)
+
+
+@override_settings(PROFILES_PAGE_SIZE=2)
+class AllProfilesTest(TestCase):
+    """Тесты для класса отображения всех профилей"""
+
+    def setUp(self) -> None:
+        profile_index.reset()
+        for username in ('carol', 'alice', 'bob'):
+            User.objects.create_user(username=username, password='password')
+
+    def test_profiles_are_paginated_by_name(self):
+        """Проверка постраничного вывода профилей по имени"""
+        response = self.client.get(reverse('profiles:all_profiles'))
+        page = response.context['page']
+
+        self.assertEqual([profile.name for profile in response.context['profiles']], ['alice', 'bob'])
+        self.assertTrue(page.has_next)
+
+        response = self.client.get(reverse('profiles:all_profiles'), {'cursor': page.next_cursor})
+
+        self.assertEqual([profile.name for profile in response.context['profiles']], ['carol'])
+        self.assertFalse(response.context['page'].has_next)
+
+    def test_typeahead(self):
+        """Проверка подсказок профилей по началу имени"""
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(username='bobby', password='password')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('profiles:profiles_typeahead'), {'q': 'Bob'})
+
+        self.assertEqual([result['name'] for result in response.json()['results']], ['bob', 'bobby'])
@@ -1,12 +1,16 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
+from django.http import JsonResponse
 from django.urls import reverse
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
 
+from content.services.pagination import paginate_queryset
 from .models import Profile
 from .forms import CustomUserCreationForm, UserProfileForm
+from .services.profile_index import profile_index
 
 
 class LoginUserView(View):
@@ -84,10 +88,7 @@ class UserProfilesView(LoginRequiredMixin, View):
         user = request.user
         profiles = Profile.objects.filter(user=user)
 
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = request.profile
 
         context = {
             'profiles': profiles,
@@ -98,25 +99,48 @@ class UserProfilesView(LoginRequiredMixin, View):
 
 class AllProfilesView(TemplateView):
     """Отображение списка всех профилей"""
+    read_from_replica = True
     template_name = 'profiles/all_profiles.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        user = self.request.user
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = self.request.profile
 
-        profiles = Profile.objects.all()
+        # Профили по имени, страницы по курсору (name, id) без OFFSET
+        page = paginate_queryset(
+            Profile.objects.all(), self.request.GET.get('cursor'), settings.PROFILES_PAGE_SIZE,
+            value_field='name', descending=False, parse=str
+        )
 
         context['used_profile'] = profile
-        context['profiles'] = profiles
+        context['profiles'] = page.object_list
+        context['page'] = page
 
         return context
 
 
+class ProfilesTypeaheadView(View):
+    """Подсказки профилей по началу имени или slug в JSON: ?q=начало&limit=10"""
+    read_from_replica = True
+    max_limit = 20
+
+    def get(self, request):
+        try:
+            limit = min(int(request.GET.get('limit', 10)), self.max_limit)
+        except ValueError:
+            limit = 10
+
+        results = profile_index.search(request.GET.get('q', '').strip(), limit)
+
+        return JsonResponse({
+            'results': [
+                {'id': profile_id, 'name': name, 'slug': slug, 'url': reverse('content:profile_posts_list', args=[slug])}
+                for profile_id, name, slug in results
+            ]
+        })
+
+
 class AddUserProfileView(LoginRequiredMixin, View):
     """Добавление нового профиля пользователя"""
     template_name = 'profiles/add_profile.html'
@@ -128,12 +152,8 @@ class AddUserProfileView(LoginRequiredMixin, View):
 
     def get(self, request):
         """Отображение формы для добавления нового профиля"""
-        user = request.user
 
-        try:
-            profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            profile = Profile.objects.filter(user=user, used=True).first()
+        profile = request.profile
 
         context = {
             'form': self.form(),
@@ -175,10 +195,7 @@ class EditUserProfileView(LoginRequiredMixin, View):
         profile = Profile.objects.get(slug=profile_slug, user=user)
         form = self.form(instance=profile)
 
-        try:
-            used_profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            used_profile = Profile.objects.filter(user=user, used=True).first()
+        used_profile = request.profile
 
         context = {
             'profile': profile,
@@ -218,10 +235,7 @@ class DeleteUserProfile(LoginRequiredMixin, View):
         user = request.user
         profile = Profile.objects.get(slug=profile_slug, user=user)
 
-        try:
-            used_profile = Profile.objects.get(user=user, used=True)
-        except Profile.MultipleObjectsReturned:
-            used_profile = Profile.objects.filter(user=user, used=True).first()
+        used_profile = request.profile
 
         context = {
             'profile': profile,
@@ -47,10 +47,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'content.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'profiles.middleware.ActiveProfileMiddleware',
+    'content.middleware.InvalidationBatchMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
@@ -88,9 +91,46 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # Read replica stand-in: a snapshot of the primary refreshed by `manage.py sync_replica`
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['content.routers.ReplicaRouter']
+
+# Read-only pages read from the replica once it is kept in sync. A browser that
+# has just written reads from the primary for REPLICA_STICKY_SECONDS, which
+# should exceed REPLICA_SYNC_INTERVAL plus the time a snapshot takes
+
+REPLICA_READS_ENABLED = False
+
+REPLICA_STICKY_SECONDS = 15
+
+REPLICA_STICKY_COOKIE = 'primary_until'
+
+REPLICA_SYNC_INTERVAL = 5
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Use a shared backend (Redis, Memcached) when running several processes,
+# otherwise invalidation only reaches the current process and the in-memory
+# tag and profile indexes never see changes made by other processes.
+# `manage.py check --deploy` reports a process-local backend.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+ACTIVE_PROFILE_CACHE_TIMEOUT = 60 * 5
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -129,7 +169,106 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored under MEDIA_ROOT/cas/ by the SHA-256 of their content, so
+# a file name never changes meaning. Serve MEDIA_URL + 'cas/' with
+# `Cache-Control: public, max-age=MEDIA_IMMUTABLE_MAX_AGE, immutable` in the
+# web server; content.views.MediaView does the same when DEBUG is on.
+# Move older uploads with `manage.py rehash_media`
+
+DEFAULT_FILE_STORAGE = 'content.storage.ContentAddressedStorage'
+
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Home feed timelines
+# Posts of profiles with more followers than this are not copied into follower
+# timelines and are pulled on read instead. Such a profile stays in pull mode
+# after losing followers until `manage.py rebuild_timelines` fans its posts out.
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Post lists are paginated with (publication_date, id) cursors
+
+POSTS_PAGE_SIZE = 20
+
+# Post views are buffered in memory and written to the database in one batched
+# UPDATE every VIEW_COUNTER_FLUSH_INTERVAL seconds (0 writes every view at once)
+
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+
+# Rendered comment trees are cached per post and version; naturaltime values in
+# them are refreshed at least this often (seconds)
+
+COMMENT_TREE_CACHE_TIMEOUT = 60 * 5
+
+# Post pages show COMMENT_THREADS_PAGE_SIZE root comments with replies up to
+# COMMENT_THREAD_DEPTH levels deep; the rest is loaded on demand
+
+COMMENT_THREADS_PAGE_SIZE = 20
+
+COMMENT_THREAD_DEPTH = 3
+
+# Comment tree storage: 'mptt' keeps threads in django-mptt lft/rght/tree_id,
+# 'path' keeps them in Comment.path so a new reply is a single-row write.
+# Only the selected storage is maintained: before switching, rebuild the other
+# one with `manage.py rebuild_comment_tree --storage <name>`
+
+COMMENT_TREE_STORAGE = 'mptt'
+
+# Profiles per page in the profile directory
+
+PROFILES_PAGE_SIZE = 50
+
+# Rendered post cards are cached per post, author and version; naturaltime
+# values in them are refreshed at least this often (seconds)
+
+POST_CARD_CACHE_TIMEOUT = 60 * 5
+
+# Cache stampede protection: an expired fragment is rebuilt by the one worker
+# holding its lock (for at most CACHE_LOCK_TIMEOUT seconds) while the others
+# serve the old value for up to CACHE_STALE_TIMEOUT seconds past expiry.
+# CACHE_EARLY_EXPIRY_BETA > 1 starts rebuilds earlier, 0 disables early expiry
+
+CACHE_LOCK_TIMEOUT = 10
+
+CACHE_STALE_TIMEOUT = 60
+
+CACHE_EARLY_EXPIRY_BETA = 1.0
+
+# Uploaded images are resized to these widths (never wider than the original)
+# and saved next to it as WebP with a JPEG fallback; templates pick a variant
+# through srcset. Run `manage.py generate_image_variants` after changing them
+
+IMAGE_VARIANT_WIDTHS = {
+    'content.Post.picture': (480, 960, 1600),
+    'profiles.Profile.avatar': (64, 128),
+}
+
+IMAGE_VARIANT_QUALITY = 80
+
+# Background jobs (image processing) are stored in the Job table and executed
+# by `manage.py run_jobs` with JOB_WORKER_THREADS threads. A failed job is
+# retried JOB_MAX_ATTEMPTS times with exponential backoff starting at
+# JOB_RETRY_BASE_DELAY seconds; a job held by a crashed worker for longer than
+# JOB_LOCK_TIMEOUT seconds is picked up again, or marked failed if that was its
+# last attempt
+
+JOB_WORKER_THREADS = 4
+
+JOB_POLL_INTERVAL = 1.0
+
+JOB_BATCH_SIZE = 20
+
+JOB_MAX_ATTEMPTS = 5
+
+JOB_RETRY_BASE_DELAY = 10
+
+JOB_RETRY_MAX_DELAY = 60 * 60
+
+JOB_LOCK_TIMEOUT = 60 * 10
+
+JOB_RETENTION_DAYS = 7